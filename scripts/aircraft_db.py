@@ -1,57 +1,326 @@
 import sqlite3
+import queue
+import re
+from contextlib import contextmanager
 import datetime
 import pytz
 from typing import Dict, List, Optional
 import os
-import shutil
+from geofence import haversine_km, radius_bounding_box
+from constants import COLD_STORAGE_DIRNAME, COLD_STORAGE_AFTER_DAYS
+from cold_storage import (
+    ColdStore, COLD_COLUMNS, HEX_COLUMN, ID_COLUMN, TS_COLUMN, month_key, month_bounds
+)
+
+# Rollup bucket sizes in seconds, keyed by granularity name
+ROLLUP_GRANULARITIES = {
+    'hour': 3600,
+    'day': 86400
+}
+
+# Reference CSV columns counted per rollup bucket, keyed by dimension name
+ROLLUP_DIMENSIONS = {
+    'operator': '$Operator',
+    'category': 'Category'
+}
+
+# Latitude/longitude are stored as integer micro-degrees (~0.1 m resolution),
+# ground speed as tenths of a knot and track as hundredths of a degree
+COORDINATE_SCALE = 1000000
+GROUND_SPEED_SCALE = 10
+TRACK_SCALE = 100
+
+# Dimension tables for repeated sighting text, keyed by the legacy column they replace
+DIMENSION_TABLES = {
+    'operator': 'operators',
+    'aircraft_type': 'aircraft_types',
+    'image_url': 'image_urls',
+    'country': 'countries'
+}
+
+# tar1090 message source values ('type') that legacy databases stored as the
+# aircraft type; the ICAO type designator was never recorded for those rows
+LEGACY_MESSAGE_TYPES = (
+    'adsb_icao', 'adsb_icao_nt', 'adsr_icao', 'tisb_icao', 'adsc', 'mlat', 'other',
+    'mode_s', 'adsb_other', 'adsr_other', 'tisb_other', 'tisb_trackfile', 'unknown'
+)
+
+# Ground speed in the legacy INTEGER column came back as an integer when
+# whole and as a REAL otherwise; tar1090 reports it to a tenth of a knot
+GROUND_SPEED_SQL = f'''
+    CASE WHEN s.ground_speed_e1 % {GROUND_SPEED_SCALE} = 0 THEN s.ground_speed_e1 / {GROUND_SPEED_SCALE}
+         ELSE s.ground_speed_e1 / {GROUND_SPEED_SCALE}.0 END
+'''
+
+# Legacy timestamps were Python's str() of an aware UTC datetime, which only
+# has a fraction when the microseconds aren't zero
+TIMESTAMP_SQL = '''
+    strftime('%Y-%m-%d %H:%M:%S', s.ts, 'unixepoch')
+    || CASE WHEN s.ts_us <> 0 THEN printf('.%06d', s.ts_us) ELSE '' END || '+00:00'
+'''
+
+# Compact sighting columns mapped back to the legacy aircraft_sightings layout.
+# Shared by the compatibility views and the query methods, which select from
+# the compact tables directly so filters can use the integer indexes.
+SIGHTING_COLUMNS = f'''
+    s.id,
+    s.hex_code,
+    s.flight_number,
+    s.altitude,
+    {GROUND_SPEED_SQL} AS ground_speed,
+    s.track_e2 / {TRACK_SCALE}.0 AS track,
+    COALESCE(o.value, '') AS operator,
+    COALESCE(t.value, '') AS aircraft_type,
+    COALESCE(i.value, '') AS image_url,
+    {TIMESTAMP_SQL} AS timestamp,
+    s.lat_e6 / {COORDINATE_SCALE}.0 AS latitude,
+    s.lon_e6 / {COORDINATE_SCALE}.0 AS longitude,
+    s.squawk_code,
+    c.value AS country,
+    s.is_military
+'''
+
+SIGHTING_JOINS = '''
+    LEFT JOIN operators o ON o.id = s.operator_id
+    LEFT JOIN aircraft_types t ON t.id = s.type_id
+    LEFT JOIN image_urls i ON i.id = s.image_id
+    LEFT JOIN countries c ON c.id = s.country_id
+'''
+
+# Columns shared by the compact sightings and archived_sightings tables
+COMPACT_COLUMNS = '''
+    hex_code, flight_number, altitude, ground_speed_e1, track_e2,
+    operator_id, type_id, image_id, ts, lat_e6, lon_e6,
+    squawk_code, country_id, is_military
+'''
+
+
+# archived_sightings columns in cold_storage.COLD_COLUMNS order, with dimension text inlined
+COLD_EXPORT_COLUMNS = f'''
+    s.id,
+    s.hex_code,
+    s.flight_number,
+    s.altitude,
+    {GROUND_SPEED_SQL},
+    s.track_e2 / {TRACK_SCALE}.0,
+    o.value,
+    t.value,
+    i.value,
+    s.ts,
+    s.lat_e6 / {COORDINATE_SCALE}.0,
+    s.lon_e6 / {COORDINATE_SCALE}.0,
+    s.squawk_code,
+    c.value,
+    s.is_military,
+    s.archive_ts,
+    s.ts_us
+'''
+
+
+def to_epoch(date: datetime.datetime) -> int:
+    """Convert a datetime to integer epoch seconds, treating naive values as UTC"""
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=pytz.UTC)
+    return int(date.timestamp())
+
+
+def scale_value(value: Optional[float], scale: int) -> Optional[int]:
+    """Convert a float to its stored scaled-integer form"""
+    if value is None:
+        return None
+    return int(round(value * scale))
+
+
+def format_epoch(epoch: int, microseconds: int = 0) -> str:
+    """Epoch seconds (and microseconds past them) in the timestamp format used by the sighting views"""
+    return str(datetime.datetime.fromtimestamp(epoch, pytz.UTC).replace(microsecond=microseconds))
+
+
+def default_cold_storage_dir(db_path: str) -> str:
+    return os.path.join(os.path.dirname(db_path), COLD_STORAGE_DIRNAME)
+
+
+# Columns of the flight_search full-text index
+SEARCH_COLUMNS = ['callsign', 'registration', 'operator', 'aircraft_type', 'tags']
+
+# Searches only need matching rowids, so the index keeps no copy of the
+# documents (content='') and no per-column sizes for ranking (columnsize=0)
+SEARCH_INDEX_SQL = '''
+    CREATE VIRTUAL TABLE {if_not_exists} flight_search USING fts5(
+        callsign, registration, operator, aircraft_type, tags,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3',
+        content = '',
+        columnsize = 0
+    )
+'''
+
+# Reference CSV keys folded into the search tags
+SEARCH_TAG_COLUMNS = ['$Tag 1', '$#Tag 2', '$#Tag 3', 'Category', '#CMPG']
+
+# (hex_code, callsign) -> aircraft_flights.id entries kept by record_sighting
+FLIGHT_CACHE_SIZE = 10000
+
+COLD_FLIGHT_COLUMN = COLD_COLUMNS.index('flight_number')
+COLD_ALTITUDE_COLUMN = COLD_COLUMNS.index('altitude')
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+# Type designators with a mission prefix: HC130J, KC135R, MC130H
+_DESIGNATOR = re.compile(r'^([A-Za-z]{2,})(\d\w*)$')
+
+
+def normalize_callsign(flight: Optional[str]) -> str:
+    """tar1090 pads callsigns with trailing spaces; they are stored trimmed and upper case"""
+    return (flight or '').strip().upper()
+
+
+def _searchable(values: List[Optional[str]], designators: bool = False) -> str:
+    """
+    Join text for the search index. Words with punctuation are added a
+    second time without it, so C-130J can be found as C130 as well as 130.
+    With designators, prefixed type designators are also added without
+    their leading letters, so C130 finds HC-130J and C135 finds KC-135R.
+    """
+    words = []
+    for value in values:
+        if value and str(value) not in words:
+            words.append(str(value))
+    words = ' '.join(words).split()
+    extra = [_PUNCTUATION.sub('', word) for word in words if _PUNCTUATION.search(word)]
+    if designators:
+        for word in [_PUNCTUATION.sub('', word) for word in words]:
+            designator = _DESIGNATOR.match(word)
+            if designator:
+                letters = designator.group(1)
+                extra += [word[i:] for i in range(1, len(letters))]
+    return ' '.join(words + [word for word in extra if word])
+
+
+def search_document(callsign: str, data: Dict) -> tuple:
+    """
+    flight_search column values for a flight.
+
+    data is a tar1090 aircraft dict and/or reference CSV row, as passed to
+    record_sighting, optionally with the operator, aircraft_type, country
+    and military values stored with its sightings.
+    """
+    tags = [data.get(column) for column in SEARCH_TAG_COLUMNS]
+    tags.append(data.get('country'))
+    if data.get('military'):
+        tags.append('Military')
+    return (
+        _searchable([callsign]),
+        _searchable([data.get('$Registration') or data.get('r')]),
+        _searchable([data.get('$Operator') or data.get('ownOp') or data.get('operator')]),
+        _searchable([data.get('$Type'), data.get('$ICAO Type'), data.get('t'),
+                     data.get('desc'), data.get('aircraft_type')], designators=True),
+        _searchable(tags)
+    )
+
+
+def fts_match_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query for flight_search.
+
+    Every word must match the start of a word in some column, punctuation is
+    ignored (C-130 finds C-130J) and column:word limits a word to one column,
+    e.g. callsign:RCH or operator:navy.
+    """
+    terms = []
+    for word in text.split():
+        column = None
+        if ':' in word:
+            prefix, rest = word.split(':', 1)
+            if prefix.lower() in SEARCH_COLUMNS:
+                column, word = prefix.lower(), rest
+        term = _PUNCTUATION.sub('', word)
+        if not term:
+            continue
+        terms.append(f'{column} : "{term}"*' if column else f'"{term}"*')
+    return ' '.join(terms)
+
 
 class AircraftDatabase:
-    def __init__(self, db_path: str = "../db/aircraft_history.db"):
+    def __init__(self, db_path: str = "../db/aircraft_history.db", cold_storage_dir: Optional[str] = None):
         self.db_path = db_path
+        # Dimension value -> id, per dimension table
+        self._dimension_cache: Dict[str, Dict[str, int]] = {}
+        # (hex_code, callsign) -> aircraft_flights.id
+        self._flight_cache: Dict[tuple, int] = {}
+        # Compressed monthly files that old archived sightings are moved to
+        self.cold_storage = ColdStore(cold_storage_dir or default_cold_storage_dir(db_path))
         self._init_db()
 
+    def _connect(self):
+        """Read-write connection used by the methods that modify the database"""
+        return sqlite3.connect(self.db_path)
+
+    def _read_connection(self):
+        """Connection used by the query methods; ReadOnlyAircraftDatabase overrides this"""
+        return self._connect()
+
     def _init_db(self):
         """Initialize the database with required tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
+
+            # WAL lets readers (view_history, the HTTP API) run alongside the ingest writer
+            cursor.execute("PRAGMA journal_mode=WAL")
+
+            # Lookup tables for operator, type, image URL and country text
+            for table in DIMENSION_TABLES.values():
+                cursor.execute(f'''
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        id INTEGER PRIMARY KEY,
+                        value TEXT NOT NULL UNIQUE
+                    )
+                ''')
             
-            # Create aircraft sightings table
+            # Create compact aircraft sightings table. ts is whole epoch seconds for
+            # indexing and bucketing; ts_us keeps the microseconds past it
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS aircraft_sightings (
+                CREATE TABLE IF NOT EXISTS sightings (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     hex_code TEXT NOT NULL,
                     flight_number TEXT,
                     altitude INTEGER,
-                    ground_speed INTEGER,
-                    track REAL,
-                    operator TEXT,
-                    aircraft_type TEXT,
-                    image_url TEXT,
-                    timestamp DATETIME NOT NULL,
-                    latitude REAL,
-                    longitude REAL,
+                    ground_speed_e1 INTEGER,
+                    track_e2 INTEGER,
+                    operator_id INTEGER REFERENCES operators (id),
+                    type_id INTEGER REFERENCES aircraft_types (id),
+                    image_id INTEGER REFERENCES image_urls (id),
+                    ts INTEGER NOT NULL,
+                    lat_e6 INTEGER,
+                    lon_e6 INTEGER,
                     squawk_code TEXT,
-                    UNIQUE(hex_code, timestamp)
+                    country_id INTEGER REFERENCES countries (id),
+                    is_military INTEGER,
+                    ts_us INTEGER NOT NULL DEFAULT 0,
+                    UNIQUE(hex_code, ts, ts_us)
                 )
             ''')
             
-            # Create archived aircraft sightings table
+            # Create compact archived aircraft sightings table
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS archived_aircraft_sightings (
+                CREATE TABLE IF NOT EXISTS archived_sightings (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     hex_code TEXT NOT NULL,
                     flight_number TEXT,
                     altitude INTEGER,
-                    ground_speed INTEGER,
-                    track REAL,
-                    operator TEXT,
-                    aircraft_type TEXT,
-                    image_url TEXT,
-                    timestamp DATETIME NOT NULL,
-                    latitude REAL,
-                    longitude REAL,
+                    ground_speed_e1 INTEGER,
+                    track_e2 INTEGER,
+                    operator_id INTEGER REFERENCES operators (id),
+                    type_id INTEGER REFERENCES aircraft_types (id),
+                    image_id INTEGER REFERENCES image_urls (id),
+                    ts INTEGER NOT NULL,
+                    lat_e6 INTEGER,
+                    lon_e6 INTEGER,
                     squawk_code TEXT,
-                    archive_date DATETIME NOT NULL
+                    country_id INTEGER REFERENCES countries (id),
+                    is_military INTEGER,
+                    archive_ts INTEGER NOT NULL,
+                    ts_us INTEGER NOT NULL DEFAULT 0
                 )
             ''')
             
@@ -84,9 +353,214 @@ class AircraftDatabase:
                     archive_date DATETIME NOT NULL
                 )
             ''')
+
+            # Compact tables created before sub-second timestamps were kept
+            for table in ['sightings', 'archived_sightings']:
+                self._add_missing_columns(cursor, table, {'ts_us': 'INTEGER NOT NULL DEFAULT 0'})
+
+            # Move databases created before the compact schema over in place
+            migrated = False
+            for legacy_table, compact_table in [('aircraft_sightings', 'sightings'),
+                                                ('archived_aircraft_sightings', 'archived_sightings')]:
+                if self._is_table(cursor, legacy_table):
+                    self._migrate_legacy_sightings(cursor, legacy_table, compact_table)
+                    migrated = True
+
+            # Views with the original row layout, for ad-hoc SQL and older tools.
+            # Recreated on open so they always match SIGHTING_COLUMNS
+            cursor.execute("DROP VIEW IF EXISTS aircraft_sightings")
+            cursor.execute("DROP VIEW IF EXISTS archived_aircraft_sightings")
+            cursor.execute(f'''
+                CREATE VIEW aircraft_sightings AS
+                SELECT {SIGHTING_COLUMNS}
+                FROM sightings s {SIGHTING_JOINS}
+            ''')
+            cursor.execute(f'''
+                CREATE VIEW archived_aircraft_sightings AS
+                SELECT {SIGHTING_COLUMNS},
+                    strftime('%Y-%m-%d %H:%M:%S', s.archive_ts, 'unixepoch') || '+00:00' AS archive_date
+                FROM archived_sightings s {SIGHTING_JOINS}
+            ''')
+            
+            # Time range scans and MIN/MAX(ts) lookups
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_sightings_ts
+                ON sightings (ts)
+            ''')
+
+            # Spatial index over sighting positions, keyed by sightings.id
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS sighting_positions USING rtree(
+                    id,
+                    min_lat, max_lat,
+                    min_lon, max_lon
+                )
+            ''')
+
+            # Hourly and daily aggregates, maintained incrementally by record_sighting
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sighting_rollups (
+                    granularity TEXT NOT NULL,
+                    bucket_start INTEGER NOT NULL,
+                    sighting_count INTEGER NOT NULL DEFAULT 0,
+                    unique_aircraft INTEGER NOT NULL DEFAULT 0,
+                    min_altitude INTEGER,
+                    max_altitude INTEGER,
+                    PRIMARY KEY (granularity, bucket_start)
+                ) WITHOUT ROWID
+            ''')
+
+            # Hex codes seen per bucket, for exact unique aircraft counts
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sighting_rollup_aircraft (
+                    granularity TEXT NOT NULL,
+                    bucket_start INTEGER NOT NULL,
+                    hex_code TEXT NOT NULL,
+                    PRIMARY KEY (granularity, bucket_start, hex_code)
+                ) WITHOUT ROWID
+            ''')
+
+            # Sighting counts per operator/category from the reference CSVs
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sighting_rollup_groups (
+                    granularity TEXT NOT NULL,
+                    bucket_start INTEGER NOT NULL,
+                    dimension TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    sighting_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (granularity, bucket_start, dimension, value)
+                ) WITHOUT ROWID
+            ''')
+
+            # One row per aircraft and callsign seen (a "flight"), linked to its
+            # sightings by (hex_code, flight_number), and a full-text index over
+            # each flight's callsign and reference data with the same rowid
+            search_is_new = not self._is_table(cursor, 'aircraft_flights')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS aircraft_flights (
+                    id INTEGER PRIMARY KEY,
+                    hex_code TEXT NOT NULL,
+                    callsign TEXT NOT NULL,
+                    first_ts INTEGER NOT NULL,
+                    last_ts INTEGER NOT NULL,
+                    UNIQUE(hex_code, callsign)
+                )
+            ''')
+            cursor.execute(SEARCH_INDEX_SQL.format(if_not_exists='IF NOT EXISTS'))
+
+            # Per-aircraft lookups in the archive; sightings has UNIQUE(hex_code, ts, ts_us)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_archived_sightings_hex_ts
+                ON archived_sightings (hex_code, ts)
+            ''')
+
+            # Index any sightings recorded before the spatial index existed
+            cursor.execute(f'''
+                INSERT INTO sighting_positions (id, min_lat, max_lat, min_lon, max_lon)
+                SELECT id,
+                       lat_e6 / {COORDINATE_SCALE}.0, lat_e6 / {COORDINATE_SCALE}.0,
+                       lon_e6 / {COORDINATE_SCALE}.0, lon_e6 / {COORDINATE_SCALE}.0
+                FROM sightings
+                WHERE lat_e6 IS NOT NULL AND lon_e6 IS NOT NULL
+                  AND id > (SELECT COALESCE(MAX(id), 0) FROM sighting_positions)
+            ''')
             
             conn.commit()
 
+        # Databases from before the search index get their flights indexed once
+        if search_is_new:
+            self.rebuild_search_index()
+
+        # Migrated history has no rollups yet; operator/category counts need
+        # the reference CSVs, so those fill in from new sightings or a rebuild
+        if migrated:
+            self.rebuild_rollups()
+            # Give the space freed by the legacy tables back to the filesystem
+            self.vacuum_database()
+
+    @staticmethod
+    def _is_table(cursor, name: str) -> bool:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+        return cursor.fetchone() is not None
+
+    @staticmethod
+    def _add_missing_columns(cursor, table: str, columns: Dict[str, str]):
+        """Add columns (name -> SQL type) to a table if they don't exist yet"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        for name, sql_type in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}")
+
+    def _migrate_legacy_sightings(self, cursor, legacy_table: str, compact_table: str):
+        """
+        Copy a legacy text-column sightings table into its compact table and drop it.
+        
+        Every row is copied with its id, so the spatial index stays valid, and
+        its timestamp to the microsecond, so no two rows collide on
+        (hex_code, ts, ts_us). A row that can't be copied raises and rolls the
+        whole migration back rather than being skipped. Aircraft types that
+        are really tar1090 message sources are dropped.
+        """
+        # Databases from before ICAO block enrichment lack these columns
+        self._add_missing_columns(cursor, legacy_table, {
+            'country': 'TEXT',
+            'is_military': 'INTEGER'
+        })
+
+        message_types = ', '.join(f"'{value}'" for value in LEGACY_MESSAGE_TYPES)
+        valid_type = f"l.aircraft_type NOT IN ({message_types})"
+
+        for column, table in DIMENSION_TABLES.items():
+            type_filter = f"AND {valid_type}" if column == 'aircraft_type' else ''
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO {table} (value)
+                SELECT DISTINCT {column} FROM {legacy_table} l
+                WHERE {column} IS NOT NULL AND {column} <> '' {type_filter}
+            ''')
+
+        archive_column, archive_value = '', ''
+        if compact_table == 'archived_sightings':
+            archive_column = ', archive_ts'
+            archive_value = ", CAST(strftime('%s', l.archive_date) AS INTEGER)"
+
+        # Python writes the fraction of 'YYYY-MM-DD HH:MM:SS.ffffff+00:00' as six digits
+        cursor.execute(f'''
+            INSERT INTO {compact_table}
+            (id, {COMPACT_COLUMNS}, ts_us{archive_column})
+            SELECT l.id, l.hex_code, l.flight_number, l.altitude,
+                   CAST(ROUND(l.ground_speed * {GROUND_SPEED_SCALE}) AS INTEGER),
+                   CAST(ROUND(l.track * {TRACK_SCALE}) AS INTEGER),
+                   o.id, t.id, i.id,
+                   CAST(strftime('%s', l.timestamp) AS INTEGER),
+                   CAST(ROUND(l.latitude * {COORDINATE_SCALE}) AS INTEGER),
+                   CAST(ROUND(l.longitude * {COORDINATE_SCALE}) AS INTEGER),
+                   l.squawk_code, c.id, l.is_military,
+                   CASE WHEN substr(l.timestamp, 20, 1) = '.'
+                        THEN CAST(substr(l.timestamp, 21, 6) AS INTEGER) ELSE 0 END{archive_value}
+            FROM {legacy_table} l
+            LEFT JOIN operators o ON o.value = l.operator
+            LEFT JOIN aircraft_types t ON t.value = l.aircraft_type AND {valid_type}
+            LEFT JOIN image_urls i ON i.value = l.image_url
+            LEFT JOIN countries c ON c.value = l.country
+        ''')
+
+        cursor.execute(f"DROP TABLE {legacy_table}")
+
+    def _dimension_id(self, cursor, column: str, value: Optional[str]) -> Optional[int]:
+        """Return the dimension table id for a legacy column value, inserting it if new"""
+        if not value:
+            return None
+        table = DIMENSION_TABLES[column]
+        cache = self._dimension_cache.setdefault(table, {})
+        dimension_id = cache.get(value)
+        if dimension_id is None:
+            cursor.execute(f"INSERT OR IGNORE INTO {table} (value) VALUES (?)", (value,))
+            cursor.execute(f"SELECT id FROM {table} WHERE value = ?", (value,))
+            dimension_id = cursor.fetchone()[0]
+            cache[value] = dimension_id
+        return dimension_id
+
     def archive_old_records(self, days_old: int = 30, batch_size: int = 1000):
         """
         Archive records older than specified days to archive tables
@@ -99,37 +573,43 @@ class AircraftDatabase:
         cutoff_date = datetime.datetime.now(pytz.UTC) - datetime.timedelta(days=days_old)
         archive_date = datetime.datetime.now(pytz.UTC)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # Archive aircraft sightings
             while True:
                 # Get batch of old records
                 cursor.execute('''
-                    SELECT * FROM aircraft_sightings 
-                    WHERE timestamp < ? 
+                    SELECT id FROM sightings 
+                    WHERE ts < ? 
+                    ORDER BY id
                     LIMIT ?
-                ''', (cutoff_date, batch_size))
+                ''', (to_epoch(cutoff_date), batch_size))
                 
-                old_records = cursor.fetchall()
-                if not old_records:
+                old_ids = [row[0] for row in cursor.fetchall()]
+                if not old_ids:
                     break
+                placeholders = ','.join('?' * len(old_ids))
                 
                 # Archive the records
-                cursor.executemany('''
-                    INSERT INTO archived_aircraft_sightings 
-                    (hex_code, flight_number, altitude, ground_speed, track, 
-                     operator, aircraft_type, image_url, timestamp, latitude, 
-                     longitude, squawk_code, archive_date)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', [(*record[1:], archive_date) for record in old_records])
+                cursor.execute('''
+                    INSERT INTO archived_sightings 
+                    ({columns}, ts_us, archive_ts)
+                    SELECT {columns}, ts_us, ? FROM sightings
+                    WHERE id IN ({placeholders})
+                '''.format(columns=COMPACT_COLUMNS, placeholders=placeholders),
+                [to_epoch(archive_date), *old_ids])
                 
                 # Delete the archived records
                 cursor.execute('''
-                    DELETE FROM aircraft_sightings 
+                    DELETE FROM sightings 
                     WHERE id IN ({})
-                '''.format(','.join('?' * len(old_records))), 
-                [record[0] for record in old_records])
+                '''.format(placeholders), old_ids)
+
+                cursor.execute('''
+                    DELETE FROM sighting_positions
+                    WHERE id IN ({})
+                '''.format(placeholders), old_ids)
                 
                 conn.commit()
             
@@ -160,9 +640,54 @@ class AircraftDatabase:
                 
                 conn.commit()
 
+    def export_cold_storage(self, days_old: int = COLD_STORAGE_AFTER_DAYS) -> int:
+        """
+        Move archived sightings into the compressed cold storage files.
+
+        Only whole months that ended more than days_old days ago are moved,
+        so the archive has stopped adding to them. Returns the number of
+        sightings moved. Safe to re-run after an interruption: rows already
+        present in a month's cold files are skipped.
+        """
+        cutoff = datetime.datetime.now(pytz.UTC) - datetime.timedelta(days=days_old)
+        cutoff_epoch = month_bounds(month_key(to_epoch(cutoff)))[0]
+        moved = 0
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT MIN(ts) FROM archived_sightings WHERE ts < ?", (cutoff_epoch,))
+            oldest = cursor.fetchone()[0]
+            month = month_key(oldest) if oldest is not None else None
+
+            while month is not None:
+                start, end = month_bounds(month)
+                if start >= cutoff_epoch:
+                    break
+
+                cursor.execute(f'''
+                    SELECT {COLD_EXPORT_COLUMNS}
+                    FROM archived_sightings s {SIGHTING_JOINS}
+                    WHERE s.ts >= ? AND s.ts < ? AND s.id > ?
+                    ORDER BY s.ts
+                ''', (start, end, self.cold_storage.max_id(month)))
+                rows = (list(row) for batch in iter(lambda: cursor.fetchmany(1000), []) for row in batch)
+                self.cold_storage.append(month, rows)
+
+                cursor.execute('''
+                    DELETE FROM archived_sightings
+                    WHERE ts >= ? AND ts < ?
+                ''', (start, end))
+                moved += cursor.rowcount
+                conn.commit()
+
+                month = month_key(end)
+
+        return moved
+
     def vacuum_database(self):
         """Run VACUUM to reclaim space and optimize the database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.execute("VACUUM")
 
     def backup_database(self, backup_path: str = None):
@@ -177,112 +702,859 @@ class AircraftDatabase:
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = f"aircraft_history_backup_{timestamp}.db"
         
-        shutil.copy2(self.db_path, backup_path)
+        # Online backup, since in WAL mode recent commits may not be in the main file yet
+        with self._read_connection() as conn:
+            backup = sqlite3.connect(backup_path)
+            try:
+                conn.backup(backup)
+            finally:
+                backup.close()
         return backup_path
 
     def get_database_stats(self) -> Dict:
         """Get statistics about the database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             
             stats = {}
             
-            # Get table sizes
-            for table in ['aircraft_sightings', 'archived_aircraft_sightings', 
-                         'weather_conditions', 'archived_weather_conditions']:
+            # Get table sizes, reported under the legacy table names
+            for name, table in [('aircraft_sightings', 'sightings'),
+                                ('archived_aircraft_sightings', 'archived_sightings'),
+                                ('weather_conditions', 'weather_conditions'),
+                                ('archived_weather_conditions', 'archived_weather_conditions')]:
                 cursor.execute(f'SELECT COUNT(*) FROM {table}')
-                stats[f'{table}_count'] = cursor.fetchone()[0]
+                stats[f'{name}_count'] = cursor.fetchone()[0]
             
             # Get database size
             stats['database_size_mb'] = os.path.getsize(self.db_path) / (1024 * 1024)
             
             # Get date ranges
-            for table in ['aircraft_sightings', 'archived_aircraft_sightings']:
+            for name, table in [('aircraft_sightings', 'sightings'),
+                                ('archived_aircraft_sightings', 'archived_sightings')]:
                 cursor.execute(f'''
-                    SELECT MIN(timestamp), MAX(timestamp) 
+                    SELECT strftime('%Y-%m-%d %H:%M:%S', MIN(ts), 'unixepoch') || '+00:00',
+                           strftime('%Y-%m-%d %H:%M:%S', MAX(ts), 'unixepoch') || '+00:00'
                     FROM {table}
                 ''')
                 min_date, max_date = cursor.fetchone()
-                stats[f'{table}_date_range'] = {
+                stats[f'{name}_date_range'] = {
                     'min': min_date,
                     'max': max_date
                 }
+
+        cold = self.cold_storage.stats()
+        stats['cold_storage_sightings_count'] = cold['rows']
+        stats['cold_storage_size_mb'] = cold['size_bytes'] / (1024 * 1024)
+
+        # Recent activity comes from the rollups rather than raw rows
+        last_24h = self.get_rollup_summary(
+            datetime.datetime.now(pytz.UTC) - datetime.timedelta(hours=24)
+        )
+        stats['sightings_last_24h'] = last_24h['sighting_count']
+        stats['unique_aircraft_last_24h'] = last_24h['unique_aircraft']
             
-            return stats
+        return stats
 
     def record_sighting(self, aircraft_data: Dict):
-        """Record an aircraft sighting in the database"""
-        with sqlite3.connect(self.db_path) as conn:
+        """
+        Record an aircraft sighting in the database.
+        
+        aircraft_data is a tar1090 aircraft dict, optionally merged with its
+        reference CSV row ($Operator, $Type, #ImageLink) and ICAO block
+        enrichment (country, military).
+        """
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # Get current timestamp in UTC
             timestamp = datetime.datetime.now(pytz.UTC)
+            epoch = to_epoch(timestamp)
+            hex_code = aircraft_data.get('hex', '').upper()
+            callsign = normalize_callsign(aircraft_data.get('flight'))
+            latitude = aircraft_data.get('lat')
+            longitude = aircraft_data.get('lon')
+
+            try:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO sightings 
+                    ({}, ts_us)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                '''.format(COMPACT_COLUMNS), (
+                    hex_code,
+                    callsign,
+                    aircraft_data.get('alt_geom'),
+                    scale_value(aircraft_data.get('gs'), GROUND_SPEED_SCALE),
+                    scale_value(aircraft_data.get('track'), TRACK_SCALE),
+                    self._dimension_id(cursor, 'operator',
+                                       aircraft_data.get('$Operator') or aircraft_data.get('operator')),
+                    # tar1090's 'type' is the message source, 't' is the ICAO type designator
+                    self._dimension_id(cursor, 'aircraft_type',
+                                       aircraft_data.get('$Type') or aircraft_data.get('t')),
+                    self._dimension_id(cursor, 'image_url',
+                                       aircraft_data.get('#ImageLink') or aircraft_data.get('image_url')),
+                    epoch,
+                    scale_value(latitude, COORDINATE_SCALE),
+                    scale_value(longitude, COORDINATE_SCALE),
+                    aircraft_data.get('squawk', ''),
+                    self._dimension_id(cursor, 'country', aircraft_data.get('country')),
+                    aircraft_data.get('military'),
+                    timestamp.microsecond
+                ))
+            except sqlite3.Error:
+                # Ids cached during a rolled back transaction may not exist
+                self._dimension_cache.clear()
+                raise
+            inserted = cursor.rowcount == 1
+            sighting_id = cursor.lastrowid
+
+            if inserted and latitude is not None and longitude is not None:
+                cursor.execute('''
+                    INSERT INTO sighting_positions (id, min_lat, max_lat, min_lon, max_lon)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (sighting_id, latitude, latitude, longitude, longitude))
+
+            if inserted:
+                self._update_rollups(
+                    cursor,
+                    epoch,
+                    hex_code,
+                    aircraft_data.get('alt_geom'),
+                    {dimension: aircraft_data.get(column)
+                     for dimension, column in ROLLUP_DIMENSIONS.items()}
+                )
+                try:
+                    self._index_flight(cursor, hex_code, callsign, epoch, aircraft_data)
+                except sqlite3.Error:
+                    self._flight_cache.clear()
+                    raise
             
+            conn.commit()
+
+    def _index_flight(self, cursor, hex_code: str, callsign: str, epoch: int, aircraft_data: Dict):
+        """Extend a known flight's time range, or add a new flight to the search index"""
+        key = (hex_code, callsign)
+        flight_id = self._flight_cache.get(key)
+        if flight_id is None:
             cursor.execute('''
-                INSERT OR IGNORE INTO aircraft_sightings 
-                (hex_code, flight_number, altitude, ground_speed, track, 
-                 operator, aircraft_type, image_url, timestamp, latitude, 
-                 longitude, squawk_code)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                aircraft_data.get('hex', '').upper(),
-                aircraft_data.get('flight', ''),
-                aircraft_data.get('alt_geom'),
-                aircraft_data.get('gs'),
-                aircraft_data.get('track'),
-                aircraft_data.get('operator', ''),
-                aircraft_data.get('type', ''),
-                aircraft_data.get('image_url', ''),
-                timestamp,
-                aircraft_data.get('lat'),
-                aircraft_data.get('lon'),
-                aircraft_data.get('squawk', '')
-            ))
-            
+                INSERT OR IGNORE INTO aircraft_flights (hex_code, callsign, first_ts, last_ts)
+                VALUES (?, ?, ?, ?)
+            ''', (hex_code, callsign, epoch, epoch))
+            new_flight = cursor.rowcount == 1
+            if new_flight:
+                flight_id = cursor.lastrowid
+                cursor.execute('''
+                    INSERT INTO flight_search (rowid, {})
+                    VALUES (?, ?, ?, ?, ?, ?)
+                '''.format(', '.join(SEARCH_COLUMNS)), (flight_id, *search_document(callsign, aircraft_data)))
+            else:
+                cursor.execute("SELECT id FROM aircraft_flights WHERE hex_code = ? AND callsign = ?", key)
+                flight_id = cursor.fetchone()[0]
+            if len(self._flight_cache) >= FLIGHT_CACHE_SIZE:
+                self._flight_cache.clear()
+            self._flight_cache[key] = flight_id
+            if new_flight:
+                return
+        cursor.execute('''
+            UPDATE aircraft_flights SET last_ts = MAX(last_ts, ?) WHERE id = ?
+        ''', (epoch, flight_id))
+
+    def insert_sightings(self, cursor, rows: List[tuple]) -> int:
+        """
+        Bulk insert sightings that carry their own timestamps, for importers.
+
+        Each row is (hex_code, flight, altitude, ground_speed_e1, track_e2,
+        operator, aircraft_type, image_url, epoch, lat_e6, lon_e6, squawk,
+        country, is_military): values already scaled as stored, dimensions as
+        text. Runs in the caller's transaction. The spatial index, rollups and
+        search index are not updated; call restore_indexes(), rebuild_rollups()
+        and rebuild_search_index() after.
+        Returns the number of rows inserted (duplicates are ignored).
+        """
+        try:
+            cursor.executemany('''
+                INSERT OR IGNORE INTO sightings 
+                ({})
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            '''.format(COMPACT_COLUMNS), [
+                (hex_code, normalize_callsign(flight), altitude, ground_speed, track,
+                 self._dimension_id(cursor, 'operator', operator),
+                 self._dimension_id(cursor, 'aircraft_type', aircraft_type),
+                 self._dimension_id(cursor, 'image_url', image_url),
+                 epoch, latitude, longitude, squawk,
+                 self._dimension_id(cursor, 'country', country),
+                 military)
+                for (hex_code, flight, altitude, ground_speed, track, operator, aircraft_type,
+                     image_url, epoch, latitude, longitude, squawk, country, military) in rows
+            ])
+        except sqlite3.Error:
+            self._dimension_cache.clear()
+            raise
+        # executemany's rowcount is the total over all rows, and ignored duplicates count 0
+        return cursor.rowcount
+
+    @staticmethod
+    def defer_indexes(cursor):
+        """Drop secondary indexes ahead of a bulk insert; restore_indexes() puts them back"""
+        cursor.execute("DROP INDEX IF EXISTS idx_sightings_ts")
+
+    def restore_indexes(self):
+        """Recreate deferred indexes and add any unindexed sightings to the spatial index"""
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_sightings_ts
+                ON sightings (ts)
+            ''')
+            cursor.execute(f'''
+                INSERT INTO sighting_positions (id, min_lat, max_lat, min_lon, max_lon)
+                SELECT id,
+                       lat_e6 / {COORDINATE_SCALE}.0, lat_e6 / {COORDINATE_SCALE}.0,
+                       lon_e6 / {COORDINATE_SCALE}.0, lon_e6 / {COORDINATE_SCALE}.0
+                FROM sightings s
+                WHERE lat_e6 IS NOT NULL AND lon_e6 IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM sighting_positions p WHERE p.id = s.id)
+            ''')
+            conn.commit()
+
+    def _update_rollups(self, cursor, epoch: int, hex_code: str,
+                        altitude: Optional[int], groups: Dict[str, Optional[str]]):
+        """Fold a single new sighting into the hourly and daily rollups"""
+        for granularity, seconds in ROLLUP_GRANULARITIES.items():
+            bucket_start = epoch - epoch % seconds
+
+            cursor.execute('''
+                INSERT OR IGNORE INTO sighting_rollup_aircraft
+                (granularity, bucket_start, hex_code)
+                VALUES (?, ?, ?)
+            ''', (granularity, bucket_start, hex_code))
+            new_aircraft = cursor.rowcount
+
+            cursor.execute('''
+                INSERT INTO sighting_rollups
+                (granularity, bucket_start, sighting_count, unique_aircraft,
+                 min_altitude, max_altitude)
+                VALUES (?, ?, 1, ?, ?, ?)
+                ON CONFLICT (granularity, bucket_start) DO UPDATE SET
+                    sighting_count = sighting_count + 1,
+                    unique_aircraft = unique_aircraft + excluded.unique_aircraft,
+                    min_altitude = CASE
+                        WHEN min_altitude IS NULL OR excluded.min_altitude < min_altitude
+                        THEN excluded.min_altitude ELSE min_altitude END,
+                    max_altitude = CASE
+                        WHEN max_altitude IS NULL OR excluded.max_altitude > max_altitude
+                        THEN excluded.max_altitude ELSE max_altitude END
+            ''', (granularity, bucket_start, new_aircraft, altitude, altitude))
+
+            for dimension, value in groups.items():
+                if not value:
+                    continue
+                cursor.execute('''
+                    INSERT INTO sighting_rollup_groups
+                    (granularity, bucket_start, dimension, value, sighting_count)
+                    VALUES (?, ?, ?, ?, 1)
+                    ON CONFLICT (granularity, bucket_start, dimension, value) DO UPDATE SET
+                        sighting_count = sighting_count + 1
+                ''', (granularity, bucket_start, dimension, value))
+
+    def rebuild_rollups(self, csv_data: Optional[Dict[str, Dict]] = None):
+        """
+        Regenerate the rollup tables from current and archived sightings.
+
+        Buckets of months that are only in cold storage are kept as they are,
+        since their sightings are no longer in the database. A cold month
+        that also has sightings in the database (e.g. backfilled after it was
+        exported) is recounted from both.
+
+        Args:
+            csv_data: Reference CSV rows keyed by hex code, used for the
+                      operator/category counts. Group counts are skipped if None.
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                SELECT DISTINCT strftime('%Y-%m', ts, 'unixepoch') FROM (
+                    SELECT ts FROM sightings
+                    UNION ALL
+                    SELECT ts FROM archived_sightings
+                )
+            ''')
+            stored_months = {row[0] for row in cursor.fetchall()}
+            cold_months = set(self.cold_storage.months())
+
+            # Cold months are whole UTC months, so on hour and day bucket boundaries
+            cursor.execute('''
+                CREATE TEMP TABLE rollup_kept (
+                    start_epoch INTEGER NOT NULL,
+                    end_epoch INTEGER NOT NULL
+                )
+            ''')
+            cursor.executemany("INSERT INTO rollup_kept (start_epoch, end_epoch) VALUES (?, ?)",
+                               [month_bounds(month) for month in sorted(cold_months - stored_months)])
+            for table in ('sighting_rollups', 'sighting_rollup_aircraft', 'sighting_rollup_groups'):
+                cursor.execute(f'''
+                    DELETE FROM {table}
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM rollup_kept k
+                        WHERE bucket_start >= k.start_epoch AND bucket_start < k.end_epoch
+                    )
+                ''')
+
+            # Cold rows of months that are being recounted. An export interrupted
+            # before its delete can leave a row in both places, so ids are unique.
+            cursor.execute('''
+                CREATE TEMP TABLE rollup_cold (
+                    id INTEGER PRIMARY KEY,
+                    hex_code TEXT NOT NULL,
+                    altitude INTEGER,
+                    ts INTEGER NOT NULL
+                )
+            ''')
+            for month in sorted(cold_months & stored_months):
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO rollup_cold (id, hex_code, altitude, ts)
+                    VALUES (?, ?, ?, ?)
+                ''', ((row[ID_COLUMN], row[HEX_COLUMN], row[COLD_ALTITUDE_COLUMN], row[TS_COLUMN])
+                      for row in self.cold_storage.month_rows(month)))
+
+            history = '''
+                SELECT hex_code, altitude, ts AS epoch FROM sightings
+                UNION ALL
+                SELECT hex_code, altitude, ts AS epoch FROM archived_sightings
+                WHERE id NOT IN (SELECT id FROM rollup_cold)
+                UNION ALL
+                SELECT hex_code, altitude, ts AS epoch FROM rollup_cold
+            '''
+
+            if csv_data:
+                cursor.execute('''
+                    CREATE TEMP TABLE rollup_reference (
+                        hex_code TEXT NOT NULL,
+                        dimension TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        PRIMARY KEY (hex_code, dimension)
+                    )
+                ''')
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO rollup_reference (hex_code, dimension, value)
+                    VALUES (?, ?, ?)
+                ''', [
+                    (hex_code.upper(), dimension, row[column])
+                    for hex_code, row in csv_data.items()
+                    for dimension, column in ROLLUP_DIMENSIONS.items()
+                    if row.get(column)
+                ])
+
+            for granularity, seconds in ROLLUP_GRANULARITIES.items():
+                bucketed = f'''
+                    SELECT hex_code, altitude, epoch - epoch % {seconds} AS bucket_start
+                    FROM ({history})
+                    WHERE epoch IS NOT NULL
+                '''
+
+                cursor.execute(f'''
+                    INSERT INTO sighting_rollups
+                    (granularity, bucket_start, sighting_count, unique_aircraft,
+                     min_altitude, max_altitude)
+                    SELECT ?, bucket_start, COUNT(*), COUNT(DISTINCT hex_code),
+                           MIN(altitude), MAX(altitude)
+                    FROM ({bucketed})
+                    GROUP BY bucket_start
+                ''', (granularity,))
+
+                cursor.execute(f'''
+                    INSERT INTO sighting_rollup_aircraft (granularity, bucket_start, hex_code)
+                    SELECT DISTINCT ?, bucket_start, hex_code
+                    FROM ({bucketed})
+                ''', (granularity,))
+
+                if csv_data:
+                    cursor.execute(f'''
+                        INSERT INTO sighting_rollup_groups
+                        (granularity, bucket_start, dimension, value, sighting_count)
+                        SELECT ?, b.bucket_start, r.dimension, r.value, COUNT(*)
+                        FROM ({bucketed}) b
+                        JOIN rollup_reference r ON r.hex_code = b.hex_code
+                        GROUP BY b.bucket_start, r.dimension, r.value
+                    ''', (granularity,))
+
+            conn.commit()
+
+    def rebuild_search_index(self, csv_data: Optional[Dict[str, Dict]] = None) -> int:
+        """
+        Normalize stored callsigns and regenerate the flight search index.
+
+        Flights are added or widened from current and archived sightings;
+        flights whose sightings have moved to cold storage are kept. Every
+        flight's document is rewritten from csv_data (registration, tags and
+        the rest of the reference row) and the values stored with its
+        sightings, so run this after the reference CSVs change or after a
+        bulk import. Returns the number of flights indexed.
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+
+            for table in ('sightings', 'archived_sightings'):
+                cursor.execute(f'''
+                    UPDATE {table} SET flight_number = UPPER(TRIM(COALESCE(flight_number, '')))
+                    WHERE flight_number IS NULL OR flight_number <> UPPER(TRIM(flight_number))
+                ''')
+
+            # One pass over the history for both the flights and each aircraft's stored values
+            cursor.execute('''
+                CREATE TEMP TABLE search_flights AS
+                SELECT hex_code, flight_number AS callsign, MIN(ts) AS first_ts, MAX(ts) AS last_ts,
+                       MAX(operator_id) AS operator_id, MAX(type_id) AS type_id,
+                       MAX(country_id) AS country_id, MAX(is_military) AS is_military
+                FROM (
+                    SELECT hex_code, flight_number, ts, operator_id, type_id, country_id, is_military
+                    FROM sightings
+                    UNION ALL
+                    SELECT hex_code, flight_number, ts, operator_id, type_id, country_id, is_military
+                    FROM archived_sightings
+                )
+                GROUP BY hex_code, flight_number
+            ''')
+            cursor.execute('''
+                INSERT INTO aircraft_flights (hex_code, callsign, first_ts, last_ts)
+                SELECT hex_code, callsign, first_ts, last_ts FROM search_flights WHERE true
+                ON CONFLICT (hex_code, callsign) DO UPDATE SET
+                    first_ts = MIN(first_ts, excluded.first_ts),
+                    last_ts = MAX(last_ts, excluded.last_ts)
+            ''')
+            cursor.execute('''
+                CREATE TEMP TABLE search_aircraft AS
+                SELECT hex_code, MAX(operator_id) AS operator_id, MAX(type_id) AS type_id,
+                       MAX(country_id) AS country_id, MAX(is_military) AS is_military
+                FROM search_flights
+                GROUP BY hex_code
+            ''')
+            cursor.execute("CREATE UNIQUE INDEX temp.search_aircraft_hex ON search_aircraft (hex_code)")
+
+            reference = {hex_code.upper(): row for hex_code, row in (csv_data or {}).items()}
+            # Recreated rather than emptied: a contentless index can't be
+            # DELETEd from, and this upgrades indexes made with a content table
+            cursor.execute("DROP TABLE IF EXISTS flight_search")
+            cursor.execute(SEARCH_INDEX_SQL.format(if_not_exists=''))
+            flights = conn.cursor()
+            flights.execute('''
+                SELECT f.id, f.hex_code, f.callsign, o.value, t.value, c.value, a.is_military
+                FROM aircraft_flights f
+                LEFT JOIN search_aircraft a ON a.hex_code = f.hex_code
+                LEFT JOIN operators o ON o.id = a.operator_id
+                LEFT JOIN aircraft_types t ON t.id = a.type_id
+                LEFT JOIN countries c ON c.id = a.country_id
+            ''')
+            indexed = 0
+            for batch in iter(lambda: flights.fetchmany(10000), []):
+                documents = []
+                for flight_id, hex_code, callsign, operator, aircraft_type, country, military in batch:
+                    data = {'operator': operator, 'aircraft_type': aircraft_type,
+                            'country': country, 'military': military}
+                    data.update(reference.get(hex_code) or {})
+                    documents.append((flight_id, *search_document(callsign, data)))
+                cursor.executemany('''
+                    INSERT INTO flight_search (rowid, {})
+                    VALUES (?, ?, ?, ?, ?, ?)
+                '''.format(', '.join(SEARCH_COLUMNS)), documents)
+                indexed += len(documents)
+
+            cursor.execute("DROP TABLE temp.search_aircraft")
+            cursor.execute("DROP TABLE temp.search_flights")
+            # Merge the index b-trees written by the bulk insert
+            cursor.execute("INSERT INTO flight_search (flight_search) VALUES ('optimize')")
             conn.commit()
 
+        self._flight_cache.clear()
+        return indexed
+
+    def get_rollups(self,
+                    granularity: str = 'hour',
+                    start_date: Optional[datetime.datetime] = None,
+                    end_date: Optional[datetime.datetime] = None) -> List[Dict]:
+        """Get rollup rows for a granularity ('hour' or 'day'), oldest first"""
+        if granularity not in ROLLUP_GRANULARITIES:
+            raise ValueError(f"Unknown rollup granularity: {granularity}")
+
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+
+            query = "SELECT * FROM sighting_rollups WHERE granularity = ?"
+            params = [granularity]
+
+            if start_date:
+                query += " AND bucket_start >= ?"
+                params.append(self._rollup_bucket(start_date, granularity))
+
+            if end_date:
+                query += " AND bucket_start <= ?"
+                params.append(to_epoch(end_date))
+
+            query += " ORDER BY bucket_start"
+
+            cursor.execute(query, params)
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def get_rollup_summary(self,
+                           start_date: datetime.datetime,
+                           end_date: Optional[datetime.datetime] = None,
+                           top_n: int = 5) -> Dict:
+        """
+        Summarize a time range from the hourly rollups without touching raw sightings.
+        
+        The range is resolved to the hour containing start_date.
+        """
+        if end_date is None:
+            end_date = datetime.datetime.now(pytz.UTC)
+        start_hour = self._rollup_bucket(start_date, 'hour')
+        end_epoch = to_epoch(end_date)
+
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                SELECT COALESCE(SUM(sighting_count), 0), MIN(min_altitude), MAX(max_altitude)
+                FROM sighting_rollups
+                WHERE granularity = 'hour' AND bucket_start >= ? AND bucket_start <= ?
+            ''', (start_hour, end_epoch))
+            sighting_count, min_altitude, max_altitude = cursor.fetchone()
+
+            cursor.execute('''
+                SELECT COUNT(DISTINCT hex_code) FROM sighting_rollup_aircraft
+                WHERE granularity = 'hour' AND bucket_start >= ? AND bucket_start <= ?
+            ''', (start_hour, end_epoch))
+            unique_aircraft = cursor.fetchone()[0]
+
+            summary = {
+                'start': start_hour,
+                'end': end_epoch,
+                'sighting_count': sighting_count,
+                'unique_aircraft': unique_aircraft,
+                'min_altitude': min_altitude,
+                'max_altitude': max_altitude
+            }
+
+            for dimension in ROLLUP_DIMENSIONS:
+                cursor.execute('''
+                    SELECT value, SUM(sighting_count) AS total
+                    FROM sighting_rollup_groups
+                    WHERE granularity = 'hour' AND dimension = ?
+                      AND bucket_start >= ? AND bucket_start <= ?
+                    GROUP BY value
+                    ORDER BY total DESC
+                    LIMIT ?
+                ''', (dimension, start_hour, end_epoch, top_n))
+                summary[f'top_{dimension}'] = cursor.fetchall()
+
+            return summary
+
+    @staticmethod
+    def _rollup_bucket(date: datetime.datetime, granularity: str) -> int:
+        epoch = to_epoch(date)
+        return epoch - epoch % ROLLUP_GRANULARITIES[granularity]
+
     def get_sightings(self, 
                      hex_code: Optional[str] = None,
                      start_date: Optional[datetime.datetime] = None,
                      end_date: Optional[datetime.datetime] = None,
-                     limit: int = 100) -> List[Dict]:
-        """Query aircraft sightings with optional filters"""
-        with sqlite3.connect(self.db_path) as conn:
+                     limit: int = 100,
+                     include_archive: bool = False) -> List[Dict]:
+        """
+        Query aircraft sightings with optional filters, newest first.
+
+        With include_archive, archived sightings are searched as well, both
+        in the database and in the cold storage files.
+
+        Rows are dicts in the legacy aircraft_sightings layout and formats
+        (timestamps to the microsecond, whole ground speeds as integers),
+        plus the country and is_military columns. Callsigns are trimmed and
+        upper case, and tar1090 message sources are not reported as types.
+        """
+        with self._read_connection() as conn:
             cursor = conn.cursor()
-            
-            query = "SELECT * FROM aircraft_sightings WHERE 1=1"
-            params = []
-            
-            if hex_code:
-                query += " AND hex_code = ?"
-                params.append(hex_code.upper())
-            
+            results = self._query_sightings(cursor, 'sightings', hex_code, start_date, end_date, limit)
+            if include_archive:
+                results += self._query_sightings(cursor, 'archived_sightings', hex_code,
+                                                 start_date, end_date, limit)
+
+        if include_archive:
+            cold_rows = self.cold_storage.query(
+                hex_code,
+                to_epoch(start_date) if start_date else None,
+                to_epoch(end_date) if end_date else None,
+                limit
+            )
+            results += [self._cold_sighting(row) for row in cold_rows]
+            results.sort(key=lambda sighting: sighting['timestamp'], reverse=True)
+            del results[limit:]
+
+        return results
+
+    @staticmethod
+    def _query_sightings(cursor, table: str,
+                         hex_code: Optional[str],
+                         start_date: Optional[datetime.datetime],
+                         end_date: Optional[datetime.datetime],
+                         limit: int) -> List[Dict]:
+        query = f"SELECT {SIGHTING_COLUMNS} FROM {table} s {SIGHTING_JOINS} WHERE 1=1"
+        params = []
+        
+        if hex_code:
+            query += " AND s.hex_code = ?"
+            params.append(hex_code.upper())
+        
+        if start_date:
+            query += " AND s.ts >= ?"
+            params.append(to_epoch(start_date))
+        
+        if end_date:
+            query += " AND s.ts <= ?"
+            params.append(to_epoch(end_date))
+        
+        query += " ORDER BY s.ts DESC LIMIT ?"
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        columns = [description[0] for description in cursor.description]
+        results = []
+        
+        for row in cursor.fetchall():
+            results.append(dict(zip(columns, row)))
+        
+        return results
+
+    def search_sightings(self,
+                         text: str,
+                         start_date: Optional[datetime.datetime] = None,
+                         end_date: Optional[datetime.datetime] = None,
+                         limit: int = 100,
+                         include_archive: bool = False,
+                         hex_code: Optional[str] = None) -> List[Dict]:
+        """
+        Sightings of flights matching a free-text search, newest first.
+
+        text is matched against each flight's callsign, registration,
+        operator, aircraft type and tags (see fts_match_query). Matching
+        flights come from the full-text index and are pruned by their first
+        and last seen times; only their sightings are then read, either per
+        flight through the (hex_code, ts) indexes or, for broad searches,
+        newest first through the time index until `limit` are found. hex_code
+        limits the search to one aircraft. Raises ValueError if text has
+        nothing to search for.
+        """
+        match = fts_match_query(text)
+        if not match:
+            raise ValueError(f"Nothing to search for in '{text}'")
+        start_epoch = to_epoch(start_date) if start_date else None
+        end_epoch = to_epoch(end_date) if end_date else None
+        if hex_code:
+            hex_code = hex_code.upper()
+
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+            flights = self._search_flights(cursor, match, start_epoch, end_epoch, hex_code)
+            if not flights:
+                return []
+
+            time_scan = self._prefer_time_scan(cursor, len(flights), limit)
+            results = self._search_table(cursor, 'sightings', match, start_epoch, end_epoch, limit,
+                                         time_scan, hex_code)
+            if include_archive:
+                # The archive has no time-only index, so it is always read per flight
+                results += self._search_table(cursor, 'archived_sightings', match,
+                                              start_epoch, end_epoch, limit, False, hex_code)
+
+        if include_archive:
+            flight_keys = set(flights)
+            cold_rows = self.cold_storage.query(
+                start_epoch=start_epoch,
+                end_epoch=end_epoch,
+                limit=limit,
+                hex_codes={flight_hex for flight_hex, _ in flights},
+                row_filter=lambda row: (row[HEX_COLUMN], normalize_callsign(row[COLD_FLIGHT_COLUMN])) in flight_keys
+            )
+            results += [self._cold_sighting(row) for row in cold_rows]
+
+        results.sort(key=lambda sighting: sighting['timestamp'], reverse=True)
+        del results[limit:]
+        return results
+
+    @staticmethod
+    def _search_flights(cursor, match: str, start_epoch: Optional[int], end_epoch: Optional[int],
+                        hex_code: Optional[str] = None) -> List[tuple]:
+        """(hex_code, callsign) of flights matching an FTS query and overlapping the time range"""
+        query = '''
+            SELECT f.hex_code, f.callsign
+            FROM flight_search CROSS JOIN aircraft_flights f ON f.id = flight_search.rowid
+            WHERE flight_search MATCH ?
+        '''
+        params = [match]
+        if hex_code:
+            query += " AND f.hex_code = ?"
+            params.append(hex_code)
+        if start_epoch is not None:
+            query += " AND f.last_ts >= ?"
+            params.append(start_epoch)
+        if end_epoch is not None:
+            query += " AND f.first_ts <= ?"
+            params.append(end_epoch)
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    @staticmethod
+    def _prefer_time_scan(cursor, matched: int, limit: int) -> bool:
+        """
+        Whether walking sightings newest first is cheaper than reading every
+        matched flight. Reading per flight touches about matched * rows per
+        flight rows; the time scan about limit * flights / matched rows until
+        it has `limit` matches, if sightings are spread evenly over flights.
+        """
+        cursor.execute("SELECT MAX(id) FROM aircraft_flights")
+        total_flights = cursor.fetchone()[0] or 1
+        # Row ids are a cheap stand-in for COUNT(*) on a large table. MIN and MAX
+        # are separate queries so each is a single b-tree lookup, not a scan.
+        cursor.execute("SELECT MAX(id) FROM sightings")
+        last_id = cursor.fetchone()[0]
+        cursor.execute("SELECT MIN(id) FROM sightings")
+        first_id = cursor.fetchone()[0]
+        total_rows = last_id - first_id + 1 if last_id is not None else 0
+        return matched * matched * total_rows > limit * total_flights * total_flights
+
+    @staticmethod
+    def _search_table(cursor, table: str, match: str, start_epoch: Optional[int],
+                      end_epoch: Optional[int], limit: int, time_scan: bool,
+                      hex_code: Optional[str] = None) -> List[Dict]:
+        if time_scan:
+            # The unary + keeps the planner off the hex_code index, so it walks
+            # idx_sightings_ts backwards and stops after `limit` matches
+            query = f'''
+                SELECT {SIGHTING_COLUMNS}
+                FROM {table} s {SIGHTING_JOINS}
+                WHERE (+s.hex_code, s.flight_number) IN (
+                    SELECT f.hex_code, f.callsign
+                    FROM flight_search CROSS JOIN aircraft_flights f ON f.id = flight_search.rowid
+                    WHERE flight_search MATCH ?
+                )
+            '''
+        else:
+            # CROSS JOIN fixes the join order: index matches, then their flights,
+            # then each flight's sightings by (hex_code, ts)
+            query = f'''
+                SELECT {SIGHTING_COLUMNS}
+                FROM flight_search
+                CROSS JOIN aircraft_flights f ON f.id = flight_search.rowid
+                CROSS JOIN {table} s ON s.hex_code = f.hex_code
+                {SIGHTING_JOINS}
+                WHERE flight_search MATCH ? AND s.flight_number = f.callsign
+            '''
+        params = [match]
+        if hex_code:
+            # The time scan has no f outside its subquery; either way one
+            # aircraft can be read through the (hex_code, ts) index
+            query += " AND s.hex_code = ?" if time_scan else " AND f.hex_code = ?"
+            params.append(hex_code)
+        if start_epoch is not None:
+            query += " AND s.ts >= ?"
+            params.append(start_epoch)
+            if not time_scan:
+                query += " AND f.last_ts >= ?"
+                params.append(start_epoch)
+        if end_epoch is not None:
+            query += " AND s.ts <= ?"
+            params.append(end_epoch)
+            if not time_scan:
+                query += " AND f.first_ts <= ?"
+                params.append(end_epoch)
+        query += " ORDER BY s.ts DESC LIMIT ?"
+        params.append(limit)
+
+        cursor.execute(query, params)
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _cold_sighting(row: list) -> Dict:
+        """A cold storage row in the same layout as get_sightings results"""
+        values = dict(zip(COLD_COLUMNS, row))
+        return {
+            'id': values['id'],
+            'hex_code': values['hex_code'],
+            'flight_number': values['flight_number'],
+            'altitude': values['altitude'],
+            'ground_speed': values['ground_speed'],
+            'track': values['track'],
+            'operator': values['operator'] or '',
+            'aircraft_type': values['aircraft_type'] or '',
+            'image_url': values['image_url'] or '',
+            'timestamp': format_epoch(values['ts'], values.get('ts_us') or 0),
+            'latitude': values['latitude'],
+            'longitude': values['longitude'],
+            'squawk_code': values['squawk_code'],
+            'country': values['country'],
+            'is_military': values['is_military']
+        }
+
+    def get_sightings_near(self,
+                           latitude: float,
+                           longitude: float,
+                           radius_km: float,
+                           start_date: Optional[datetime.datetime] = None,
+                           end_date: Optional[datetime.datetime] = None,
+                           limit: int = 1000) -> List[Dict]:
+        """
+        Query sightings within radius_km of a point using the R*Tree index.
+
+        The index narrows the search to the circle's bounding box; the exact
+        great-circle distance is then checked for each candidate.
+        """
+        min_lat, max_lat, min_lon, max_lon = radius_bounding_box(latitude, longitude, radius_km)
+
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+
+            query = f'''
+                SELECT {SIGHTING_COLUMNS} FROM sighting_positions p
+                JOIN sightings s ON s.id = p.id
+                {SIGHTING_JOINS}
+                WHERE p.max_lat >= ? AND p.min_lat <= ?
+                  AND p.max_lon >= ? AND p.min_lon <= ?
+            '''
+            params = [min_lat, max_lat, min_lon, max_lon]
+
             if start_date:
-                query += " AND timestamp >= ?"
-                params.append(start_date)
-            
+                query += " AND s.ts >= ?"
+                params.append(to_epoch(start_date))
+
             if end_date:
-                query += " AND timestamp <= ?"
-                params.append(end_date)
-            
-            query += " ORDER BY timestamp DESC LIMIT ?"
-            params.append(limit)
-            
+                query += " AND s.ts <= ?"
+                params.append(to_epoch(end_date))
+
+            query += " ORDER BY s.ts DESC"
+
             cursor.execute(query, params)
             columns = [description[0] for description in cursor.description]
             results = []
-            
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            
+
+            for row in cursor:
+                sighting = dict(zip(columns, row))
+                distance = haversine_km(latitude, longitude, sighting['latitude'], sighting['longitude'])
+                if distance > radius_km:
+                    continue
+                sighting['distance_km'] = distance
+                results.append(sighting)
+                if len(results) >= limit:
+                    break
+
             return results
 
     def record_weather(self, weather_data: Dict):
         """Record weather conditions for ML feature"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
-            timestamp = datetime.datetime.now(pytz.UTC)
+            timestamp = weather_data.get('timestamp') or datetime.datetime.now(pytz.UTC)
             
             cursor.execute('''
                 INSERT OR IGNORE INTO weather_conditions
@@ -299,4 +1571,70 @@ class AircraftDatabase:
                 weather_data.get('pressure')
             ))
             
-            conn.commit() 
\ No newline at end of file
+            conn.commit() 
+
+    def get_weather(self,
+                    start_date: Optional[datetime.datetime] = None,
+                    end_date: Optional[datetime.datetime] = None) -> List[Dict]:
+        """Query recorded weather conditions, oldest first"""
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+
+            query = "SELECT * FROM weather_conditions WHERE 1=1"
+            params = []
+
+            if start_date:
+                query += " AND timestamp >= ?"
+                params.append(start_date)
+
+            if end_date:
+                query += " AND timestamp <= ?"
+                params.append(end_date)
+
+            query += " ORDER BY timestamp"
+
+            cursor.execute(query, params)
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+class ReadOnlyAircraftDatabase(AircraftDatabase):
+    """
+    AircraftDatabase query methods over a pool of read-only connections.
+
+    The database must already have been created by AircraftDatabase, which
+    puts it in WAL mode, so these readers never block the ingest writer.
+    Methods that write raise sqlite3.OperationalError.
+    """
+
+    def __init__(self, db_path: str = "../db/aircraft_history.db", pool_size: int = 4,
+                 cold_storage_dir: Optional[str] = None):
+        self.db_path = db_path
+        self._dimension_cache: Dict[str, Dict[str, int]] = {}
+        self._flight_cache: Dict[tuple, int] = {}
+        self.cold_storage = ColdStore(cold_storage_dir or default_cold_storage_dir(db_path))
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute("PRAGMA query_only=ON")
+            self._pool.put(conn)
+
+    def _connect(self):
+        raise sqlite3.OperationalError("attempt to write a readonly database")
+
+    @contextmanager
+    def _read_connection(self):
+        """Borrow a pooled connection, waiting if every connection is in use"""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            # End any read transaction so the WAL can be checkpointed
+            if conn.in_transaction:
+                conn.rollback()
+            self._pool.put(conn)
+
+    def close(self):
+        """Close every pooled connection"""
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
@@ -8,10 +8,19 @@ from datetime import datetime
 from email.message import EmailMessage
 from env_vars_config import senderEmail, gatewayAddress, appKey, healthCheckEmail
 from util import get_aircraft_data
+from logging_util import get_last_log_lines
+from profiling import span
 import sys
 
-def send_health_check(logger,db,subject_prefix="SkyWatch Health Check Report", include_startup_info=False):
-    """Send a detailed health check email with system and application statistics"""
+def send_health_check(logger,db,subject_prefix="SkyWatch Health Check Report", include_startup_info=False, tracker=None,
+                      weather=None):
+    """
+    Send a detailed health check email with system and application statistics.
+
+    If the live AircraftTracker is passed, the aircraft count comes from it
+    instead of fetching the feed again. weather is the current observation
+    (WeatherProvider.latest()), reported when there is one.
+    """
     # print("Sending Health Check...")
     try:
         pid = os.getpid()
@@ -35,12 +44,12 @@ def send_health_check(logger,db,subject_prefix="SkyWatch Health Check Report", i
         uptime = now_local - start_time
         
         # Application stats
-        aircraft_data = get_aircraft_data()
-        aircraft_count = len(aircraft_data)
+        if tracker is not None:
+            aircraft_count = len(tracker)
+        else:
+            aircraft_count = len(get_aircraft_data())
         
         # Database stats
-        recent_sightings = db.get_sightings(limit=1000)
-        unique_aircraft = len(set(s['hex_code'] for s in recent_sightings))
         stats = db.get_database_stats()
         
         # # Alert statistics
@@ -70,14 +79,28 @@ def send_health_check(logger,db,subject_prefix="SkyWatch Health Check Report", i
             f"  Memory Usage: {memory_info.rss / (1024 * 1024):.2f} MB ({memory_percent:.2f}%)\n\n"
             f"Aircraft Statistics:\n"
             f"  Aircraft Currently Tracking: {aircraft_count}\n"
-            f"  Unique Aircraft Spotted (last 1000 records): {unique_aircraft}\n\n"
+            f"  Sightings (last 24 hours): {stats['sightings_last_24h']}\n"
+            f"  Unique Aircraft Spotted (last 24 hours): {stats['unique_aircraft_last_24h']}\n\n"
             # f"Alert Statistics (last 24 hours):\n"
             # f"  Watchlist Alerts: {watchlist_alerts}\n"
             # f"  Squawk Alerts: {squawk_alerts}\n\n"
             f"Database Statistics:\n"
             f"  Current sightings: {stats['aircraft_sightings_count']}\n"
             f"  Archived sightings: {stats['archived_aircraft_sightings_count']}\n"
-            f"  Database size: {stats['database_size_mb']:.2f} MB\n"
+            f"  Database size: {stats['database_size_mb']:.2f} MB\n\n"
+        )
+
+        if weather:
+            healthCheckMessage += (
+                f"Weather ({weather['timestamp'].astimezone(local_tz):%H:%M %Z}):\n"
+                f"  Temperature: {weather.get('temperature', 'N/A')} C\n"
+                f"  Wind: {weather.get('wind_speed', 'N/A')} m/s from {weather.get('wind_direction', 'N/A')}\n"
+                f"  Visibility: {weather.get('visibility', 'N/A')} km\n\n"
+            )
+
+        healthCheckMessage += (
+            f"Recent Log Entries:\n"
+            f"{get_last_log_lines(num_lines=20)}\n"
         )
         
         send_email_alert(healthCheckEmail, subject_prefix, healthCheckMessage)
@@ -91,8 +114,13 @@ def send_health_check(logger,db,subject_prefix="SkyWatch Health Check Report", i
         # print(f"exception : {e}")
         logger.error(f"Failed to send health check email: {str(e)}")
 
-def create_alert_message(hex_code, aircraft, alert_type, alert_detail, context=None):
-    """Generate alert message for squawk or watchlist alerts."""
+def create_alert_message(hex_code, aircraft, alert_type, alert_detail, context=None, inbound=None):
+    """
+    Generate alert message for squawk or watchlist alerts.
+
+    inbound is an optional pass prediction line (see
+    TrajectoryPredictions.inbound_line), added after the position.
+    """
     base_message = (
         f"{alert_type} Alert!\n"
         f"Hex: {hex_code}\n"
@@ -104,6 +132,8 @@ def create_alert_message(hex_code, aircraft, alert_type, alert_detail, context=N
         f"\nLatitude: {aircraft.get('lat', 'N/A')}\n"
         f"Longitude: {aircraft.get('lon', 'N/A')}\n"
     )
+    if inbound:
+        base_message += f"{inbound}\n"
     if context:
         base_message += (
             f"\nOperator: {context.get('$Operator', 'N/A')}\n"
@@ -120,9 +150,10 @@ def send_email_alert(email, subject, content):
     msg['To'] = email
     msg['Subject'] =subject
 
-    server = smtplib.SMTP('smtp.gmail.com', 587)
-    server.starttls()
-    server.login(senderEmail, appKey)
+    with span('smtp'):
+        server = smtplib.SMTP('smtp.gmail.com', 587)
+        server.starttls()
+        server.login(senderEmail, appKey)
 
-    server.send_message(msg)
-    server.quit()
\ No newline at end of file
+        server.send_message(msg)
+        server.quit()
\ No newline at end of file
@@ -0,0 +1,329 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+
+from constants import ANOMALY_RULES, ANOMALY_WINDOW, ANOMALY_COOLDOWN
+from geofence import EARTH_RADIUS_KM
+
+RULE_NAMES = ('rapid_descent', 'low_altitude_speed', 'orbit', 'transponder_dropout')
+
+
+class Anomaly:
+    """A rule firing for one aircraft"""
+
+    __slots__ = ('hex_code', 'rule', 'detail', 'timestamp', 'latitude', 'longitude', 'altitude', 'ground_speed')
+
+    def __init__(self, hex_code, rule, detail, timestamp, latitude, longitude, altitude, ground_speed):
+        self.hex_code = hex_code
+        self.rule = rule
+        self.detail = detail
+        self.timestamp = timestamp
+        self.latitude = latitude
+        self.longitude = longitude
+        self.altitude = altitude
+        self.ground_speed = ground_speed
+
+    def as_aircraft(self) -> Dict:
+        """Last known values in tar1090 key names, for create_alert_message"""
+        return {
+            'hex': self.hex_code,
+            'alt_geom': self.altitude,
+            'gs': self.ground_speed,
+            'lat': self.latitude,
+            'lon': self.longitude
+        }
+
+
+def _nan(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class AnomalyDetector:
+    """
+    Rolling-window anomaly rules over every tracked aircraft.
+
+    Each aircraft owns a row ("slot") in a set of (capacity, window) NumPy
+    ring buffers. A cycle writes the new samples for all updated aircraft in
+    one vectorized step and keeps running sums for the rolling statistics,
+    so each update is O(1) per aircraft regardless of the window size.
+
+    Samples are only added when an aircraft moves, but dropouts and expiry
+    go by when it was last heard at all, which touch() keeps current for
+    aircraft that are still transmitting without moving.
+    """
+
+    def __init__(self, rules: Dict = ANOMALY_RULES, window: int = ANOMALY_WINDOW,
+                 cooldown: float = ANOMALY_COOLDOWN, capacity: int = 1024,
+                 expire_after: float = 900):
+        self.rules = rules
+        self.window = window
+        self.cooldown = cooldown
+        self.expire_after = expire_after
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self.capacity = 0
+        self._grow(capacity)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _rule(self, name: str) -> Optional[Dict]:
+        rule = self.rules.get(name)
+        if rule and rule.get('enabled', True):
+            return rule
+        return None
+
+    def _grow(self, capacity: int):
+        """Resize every per-slot array to capacity rows, keeping existing contents"""
+        old = self.capacity
+        window = self.window
+
+        def resize(name, shape, fill, dtype=float):
+            array = np.full(shape, fill, dtype=dtype)
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+
+        for name in ('_time', '_alt', '_lat', '_lon', '_gs', '_vrate'):
+            resize(name, (capacity, window), np.nan)
+        resize('_turn', (capacity, window), 0.0)
+        for name in ('_gs_sum', '_vrate_sum', '_turn_sum'):
+            resize(name, capacity, 0.0)
+        for name in ('_gs_n', '_vrate_n', '_head', '_count'):
+            resize(name, capacity, 0, dtype=np.int64)
+        for name in ('_last_time', '_last_seen', '_last_alt', '_last_track'):
+            resize(name, capacity, np.nan)
+        resize('_fired', (capacity, len(RULE_NAMES)), -np.inf)
+        resize('_active', capacity, False, dtype=bool)
+        resize('_hex', capacity, None, dtype=object)
+
+        self._free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def _reset(self, slot: int):
+        for name in ('_time', '_alt', '_lat', '_lon', '_gs', '_vrate',
+                     '_last_time', '_last_seen', '_last_alt', '_last_track'):
+            getattr(self, name)[slot] = np.nan
+        self._turn[slot] = 0.0
+        for name in ('_gs_sum', '_vrate_sum', '_turn_sum', '_gs_n', '_vrate_n', '_head', '_count'):
+            getattr(self, name)[slot] = 0
+        self._fired[slot] = -np.inf
+
+    def _slot_for(self, hex_code: str) -> int:
+        slot = self._slots.get(hex_code)
+        if slot is None:
+            if not self._free:
+                self._grow(self.capacity * 2)
+            slot = self._free.pop()
+            self._reset(slot)
+            self._slots[hex_code] = slot
+            self._hex[slot] = hex_code
+            self._active[slot] = True
+        return slot
+
+    def _release(self, slots: np.ndarray):
+        for slot in slots:
+            del self._slots[self._hex[slot]]
+            self._hex[slot] = None
+            self._active[slot] = False
+            self._free.append(int(slot))
+
+    @staticmethod
+    def _ring_write(values, sums, counts, slots, pos, new):
+        """Overwrite one ring position and adjust the running sum/count of valid values"""
+        old = values[slots, pos]
+        old_valid = ~np.isnan(old)
+        new_valid = ~np.isnan(new)
+        sums[slots] += np.where(new_valid, new, 0.0) - np.where(old_valid, old, 0.0)
+        counts[slots] += new_valid.astype(np.int64) - old_valid.astype(np.int64)
+        values[slots, pos] = new
+
+    def update(self, hex_codes: List[str], times, altitudes, speeds, tracks,
+               latitudes, longitudes, vertical_rates=None, now: Optional[float] = None) -> List[Anomaly]:
+        """
+        Add one sample per aircraft and evaluate the rules.
+
+        All arguments after hex_codes are equal-length sequences; missing
+        values may be None or NaN. vertical_rates (ft/min) is derived from the
+        altitude change when not given. Returns the anomalies that fired.
+        """
+        n = len(hex_codes)
+        if now is None:
+            now = float(np.max(times)) if n else 0.0
+        anomalies = []
+
+        if n:
+            slots = np.fromiter((self._slot_for(h) for h in hex_codes), dtype=np.intp, count=n)
+            times = np.asarray([_nan(v) for v in times])
+            altitudes = np.asarray([_nan(v) for v in altitudes])
+            speeds = np.asarray([_nan(v) for v in speeds])
+            tracks = np.asarray([_nan(v) for v in tracks])
+            latitudes = np.asarray([_nan(v) for v in latitudes])
+            longitudes = np.asarray([_nan(v) for v in longitudes])
+            if vertical_rates is None:
+                vertical_rates = np.full(n, np.nan)
+            else:
+                vertical_rates = np.asarray([_nan(v) for v in vertical_rates])
+
+            window = self.window
+            pos = self._head[slots]
+            prev = (pos - 1) % window
+
+            # Derive vertical rate from the previous sample where the feed has none
+            prev_time = self._time[slots, prev]
+            prev_alt = self._alt[slots, prev]
+            elapsed = times - prev_time
+            with np.errstate(invalid='ignore', divide='ignore'):
+                derived = np.where(elapsed > 0, (altitudes - prev_alt) / elapsed * 60.0, np.nan)
+            vertical_rates = np.where(np.isnan(vertical_rates), derived, vertical_rates)
+
+            # Absolute heading change since the previous sample, wrapped to [0, 180]
+            turns = np.abs((tracks - self._last_track[slots] + 180.0) % 360.0 - 180.0)
+            turns = np.nan_to_num(turns, nan=0.0)
+            self._turn_sum[slots] += turns - self._turn[slots, pos]
+            self._turn[slots, pos] = turns
+
+            self._ring_write(self._gs, self._gs_sum, self._gs_n, slots, pos, speeds)
+            self._ring_write(self._vrate, self._vrate_sum, self._vrate_n, slots, pos, vertical_rates)
+            self._time[slots, pos] = times
+            self._alt[slots, pos] = altitudes
+            self._lat[slots, pos] = latitudes
+            self._lon[slots, pos] = longitudes
+
+            self._head[slots] = (pos + 1) % window
+            self._count[slots] = np.minimum(self._count[slots] + 1, window)
+            self._last_time[slots] = times
+            self._last_seen[slots] = np.fmax(self._last_seen[slots], times)
+            self._last_alt[slots] = np.where(np.isnan(altitudes), self._last_alt[slots], altitudes)
+            self._last_track[slots] = np.where(np.isnan(tracks), self._last_track[slots], tracks)
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean_gs = self._gs_sum[slots] / self._gs_n[slots]
+                mean_vrate = self._vrate_sum[slots] / self._vrate_n[slots]
+
+            rule = self._rule('rapid_descent')
+            if rule:
+                hits = (self._vrate_n[slots] >= rule.get('min_samples', 3)) & \
+                       (mean_vrate <= -rule['descent_rate_fpm'])
+                anomalies += self._fire('rapid_descent', slots, hits, now,
+                                        lambda i: f"Descending at {-mean_vrate[i]:.0f} ft/min")
+
+            rule = self._rule('low_altitude_speed')
+            if rule:
+                hits = (self._gs_n[slots] >= rule.get('min_samples', 3)) & \
+                       (altitudes < rule['max_altitude']) & \
+                       (altitudes > rule.get('min_altitude', 0)) & \
+                       (mean_gs > rule['max_speed_kts'])
+                anomalies += self._fire('low_altitude_speed', slots, hits, now,
+                                        lambda i: f"{mean_gs[i]:.0f} kts at {altitudes[i]:.0f} ft")
+
+            rule = self._rule('orbit')
+            if rule:
+                # Once the window is full the head points at the oldest sample
+                oldest = self._head[slots]
+                displacement = _haversine_km(
+                    self._lat[slots, oldest], self._lon[slots, oldest], latitudes, longitudes
+                )
+                turn_sum = self._turn_sum[slots]
+                hits = (self._count[slots] == window) & \
+                       (turn_sum >= rule['min_turn_degrees']) & \
+                       (displacement <= rule['max_radius_km'])
+                anomalies += self._fire('orbit', slots, hits, now,
+                                        lambda i: f"Turned {turn_sum[i]:.0f} degrees within {displacement[i]:.1f} km")
+
+        anomalies += self._check_dropouts(now)
+
+        expired = np.flatnonzero(self._active & (now - self._last_seen > self.expire_after))
+        if len(expired):
+            self._release(expired)
+
+        return anomalies
+
+    def touch(self, hex_codes: List[str], times):
+        """
+        Record that aircraft were heard at times (epoch seconds) without
+        adding samples. Aircraft without a slot are ignored.
+        """
+        pairs = [(self._slots[hex_code], time) for hex_code, time in zip(hex_codes, times)
+                 if hex_code in self._slots and time is not None]
+        if pairs:
+            slots = np.fromiter((slot for slot, _ in pairs), dtype=np.intp, count=len(pairs))
+            times = np.fromiter((time for _, time in pairs), dtype=float, count=len(pairs))
+            self._last_seen[slots] = np.fmax(self._last_seen[slots], times)
+
+    def _fire(self, rule_name, slots, hits, now, describe) -> List[Anomaly]:
+        """Turn rule hits into Anomaly objects, respecting the per-aircraft cooldown"""
+        rule_index = RULE_NAMES.index(rule_name)
+        hits = hits & (now - self._fired[slots, rule_index] >= self.cooldown)
+        anomalies = []
+        for i in np.flatnonzero(hits):
+            anomalies.append(self._anomaly(slots[i], rule_name, describe(i)))
+        self._fired[slots[hits], rule_index] = now
+        return anomalies
+
+    def _check_dropouts(self, now: float) -> List[Anomaly]:
+        """Aircraft that went silent while airborne, reported once per silence"""
+        rule = self._rule('transponder_dropout')
+        if not rule:
+            return []
+        rule_index = RULE_NAMES.index('transponder_dropout')
+        gap = now - self._last_seen
+        with np.errstate(invalid='ignore'):
+            hits = self._active & (gap > rule['gap_seconds']) & \
+                   (self._last_alt >= rule['min_altitude']) & \
+                   (self._fired[:, rule_index] < self._last_seen)
+        slots = np.flatnonzero(hits)
+        anomalies = [
+            self._anomaly(slot, 'transponder_dropout',
+                          f"No messages for {gap[slot]:.0f}s at {self._last_alt[slot]:.0f} ft")
+            for slot in slots
+        ]
+        self._fired[slots, rule_index] = now
+        return anomalies
+
+    def _anomaly(self, slot, rule_name, detail) -> Anomaly:
+        newest = (self._head[slot] - 1) % self.window
+
+        def value(array):
+            v = array[slot, newest]
+            return None if np.isnan(v) else float(v)
+
+        return Anomaly(
+            self._hex[slot], rule_name, detail, float(self._last_time[slot]),
+            value(self._lat), value(self._lon), value(self._alt), value(self._gs)
+        )
+
+    def update_from_states(self, states: Iterable, now: Optional[float] = None,
+                           tracked: Optional[Iterable] = None) -> List[Anomaly]:
+        """
+        Feed TrackedAircraft states (see tracker.py) into update().
+
+        tracked is every state still in the tracker; those are touch()ed
+        first so aircraft that are heard but haven't moved are not taken
+        for dropouts.
+        """
+        if tracked is not None:
+            tracked = list(tracked)
+            self.touch([state.hex_code for state in tracked], [state.last_seen for state in tracked])
+        states = list(states)
+        vertical_rates = []
+        for state in states:
+            aircraft = state.aircraft or {}
+            rate = aircraft.get('geom_rate')
+            vertical_rates.append(rate if rate is not None else aircraft.get('baro_rate'))
+        return self.update(
+            [state.hex_code for state in states],
+            [state.last_seen for state in states],
+            [state.altitude for state in states],
+            [state.ground_speed for state in states],
+            [state.track for state in states],
+            [state.latitude for state in states],
+            [state.longitude for state in states],
+            vertical_rates,
+            now=now
+        )
@@ -0,0 +1,371 @@
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import pytz
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from aircraft_db import ReadOnlyAircraftDatabase
+from constants import (
+    API_HOST, API_PORT, API_POOL_SIZE, API_CACHE_SIZE, API_CACHE_TTL, API_LOG_FILE, API_NICE,
+    TRACKER_TIMEOUT
+)
+from logging_util import JsonFormatter, LOG_MAX_BYTES, LOG_BACKUP_COUNT
+
+MAX_LIMIT = 1000  # Largest page a client can ask for
+
+
+class CachedResponse:
+    """A serialized response body with its ETag"""
+
+    __slots__ = ('status', 'body', 'etag', 'expires')
+
+    def __init__(self, status: int, body: bytes, expires: float):
+        self.status = status
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.expires = expires
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of responses that expire after ttl seconds"""
+
+    def __init__(self, max_entries: int = API_CACHE_SIZE, ttl: float = API_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, status: int, body: bytes) -> CachedResponse:
+        entry = CachedResponse(status, body, time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, prefix: str):
+        """Drop every cached response whose URL starts with prefix"""
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(query: Dict, name: str, default: int, maximum: Optional[int] = None) -> int:
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    if value < 1:
+        raise ApiError(400, f"{name} must be positive")
+    return min(value, maximum) if maximum else value
+
+
+def _date_param(query: Dict, name: str) -> Optional[datetime.datetime]:
+    if name not in query:
+        return None
+    try:
+        date = datetime.datetime.fromisoformat(query[name][0])
+    except ValueError:
+        raise ApiError(400, f"{name} must be an ISO 8601 date")
+    return date if date.tzinfo else pytz.UTC.localize(date)
+
+
+def _epoch_to_iso(epoch: Optional[float]) -> Optional[str]:
+    if epoch is None:
+        return None
+    return datetime.datetime.fromtimestamp(epoch, pytz.UTC).isoformat()
+
+
+def live_snapshot(tracker) -> list:
+    """JSON-ready state of every aircraft the tracker is currently following"""
+    return [{
+        'hex_code': state.hex_code,
+        'flight_number': state.flight,
+        'latitude': state.latitude,
+        'longitude': state.longitude,
+        'altitude': state.altitude,
+        'ground_speed': state.ground_speed,
+        'track': state.track,
+        'squawk_code': state.squawk,
+        'country': None if state.country is None else str(state.country),
+        'is_military': bool(state.is_military),
+        'first_seen': _epoch_to_iso(state.first_seen),
+        'last_seen': _epoch_to_iso(state.last_seen)
+    } for state in tracker.currently_tracking()]
+
+
+class SkyWatchAPI:
+    """
+    Routes for the read-only API.
+
+    Live state is whatever skywatch.py last published with set_live(); until
+    something is published (e.g. when run standalone) it falls back to the
+    sightings recorded within the tracker timeout.
+    """
+
+    def __init__(self, db: ReadOnlyAircraftDatabase, cache: Optional[ResponseCache] = None):
+        self.db = db
+        self.cache = cache or ResponseCache()
+        self.live_states: Optional[list] = None
+        self.routes = {
+            'sightings': self.recent_sightings,
+            'aircraft': self.aircraft_history,
+            'live': self.live,
+            'stats': self.stats
+        }
+
+    def set_live(self, states: list):
+        self.live_states = states
+        self.cache.invalidate('/api/live')
+
+    def dispatch(self, path: str, query: Dict) -> Tuple[int, object]:
+        """Return (status, payload) for an /api/... path"""
+        parts = [part for part in path.split('/') if part]
+        if len(parts) < 2 or parts[0] != 'api' or parts[1] not in self.routes:
+            raise ApiError(404, f"Unknown endpoint: {path}")
+        return 200, self.routes[parts[1]](parts[2:], query)
+
+    def recent_sightings(self, args, query):
+        """GET /api/sightings?minutes=60&limit=100"""
+        minutes = _int_param(query, 'minutes', 60)
+        limit = _int_param(query, 'limit', 100, MAX_LIMIT)
+        start_date = datetime.datetime.now(pytz.UTC) - datetime.timedelta(minutes=minutes)
+        return self.db.get_sightings(start_date=start_date, limit=limit)
+
+    def aircraft_history(self, args, query):
+        """GET /api/aircraft/<hex>?start=...&end=...&limit=100"""
+        if len(args) != 1:
+            raise ApiError(404, "Expected /api/aircraft/<hex>")
+        return self.db.get_sightings(
+            hex_code=args[0],
+            start_date=_date_param(query, 'start'),
+            end_date=_date_param(query, 'end'),
+            limit=_int_param(query, 'limit', 100, MAX_LIMIT)
+        )
+
+    def live(self, args, query):
+        """GET /api/live"""
+        if self.live_states is not None:
+            return self.live_states
+
+        start_date = datetime.datetime.now(pytz.UTC) - datetime.timedelta(seconds=TRACKER_TIMEOUT)
+        latest = {}
+        for sighting in self.db.get_sightings(start_date=start_date, limit=MAX_LIMIT):
+            latest.setdefault(sighting['hex_code'], sighting)
+        return list(latest.values())
+
+    def stats(self, args, query):
+        """GET /api/stats"""
+        stats = self.db.get_database_stats()
+        stats['cache_hits'] = self.cache.hits
+        stats['cache_misses'] = self.cache.misses
+        if self.live_states is not None:
+            stats['currently_tracking'] = len(self.live_states)
+        return stats
+
+    def respond(self, url: str) -> CachedResponse:
+        """Serve url from the cache, computing and caching it on a miss"""
+        entry = self.cache.get(url)
+        if entry is not None:
+            return entry
+
+        parts = urlsplit(url)
+        try:
+            status, payload = self.dispatch(parts.path, parse_qs(parts.query))
+        except ApiError as e:
+            status, payload = e.status, {'error': str(e)}
+        body = json.dumps(payload, default=str).encode('utf-8')
+        if status != 200:
+            return CachedResponse(status, body, 0)
+        return self.cache.put(url, status, body)
+
+
+def make_handler(api: SkyWatchAPI, logger: logging.Logger):
+    class ApiRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            try:
+                entry = api.respond(self.path)
+            except Exception as e:
+                logger.error(f"API error for {self.path}: {str(e)}")
+                entry = CachedResponse(500, b'{"error": "Internal error"}', 0)
+
+            if entry.status == 200 and self.headers.get('If-None-Match') == entry.etag:
+                self.send_response(304)
+                self.send_header('ETag', entry.etag)
+                self.end_headers()
+                return
+
+            self.send_response(entry.status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(entry.body)))
+            if entry.status == 200:
+                self.send_header('ETag', entry.etag)
+                self.send_header('Cache-Control', f"max-age={int(api.cache.ttl)}")
+            self.end_headers()
+            self.wfile.write(entry.body)
+
+        def log_message(self, format, *args):
+            logger.debug("API %s - %s", self.address_string(), format % args)
+
+    return ApiRequestHandler
+
+
+def serve(logger, db_path: str, host: str, port: int, pool_size: int = API_POOL_SIZE,
+          live_queue=None, ready=None):
+    """
+    Run the API server until the process exits.
+
+    live_queue receives live snapshots published by ApiServer; ready is a
+    pipe end that is sent the bound port, or the error if binding failed.
+    """
+    api = SkyWatchAPI(ReadOnlyAircraftDatabase(db_path, pool_size=pool_size))
+    try:
+        server = ThreadingHTTPServer((host, port), make_handler(api, logger))
+    except OSError as e:
+        if ready is None:
+            raise
+        ready.send(str(e))
+        return
+    server.daemon_threads = True
+
+    if live_queue is not None:
+        def receive_live():
+            while True:
+                api.set_live(live_queue.get())
+        threading.Thread(target=receive_live, name='api-live', daemon=True).start()
+
+    logger.info(f"API listening on http://{host}:{server.server_address[1]}/api/")
+    if ready is not None:
+        ready.send(server.server_address[1])
+    server.serve_forever()
+
+
+def _serve_in_child(db_path, host, port, pool_size, log_file, live_queue, ready):
+    # Ctrl+C reaches the whole process group and shutdown is the parent's job
+    # (including the exit notification); the child just goes away with it
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+    os.nice(API_NICE)
+
+    root = logging.getLogger()
+    handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT
+    )
+    handler.setFormatter(JsonFormatter())
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    serve(logging.getLogger('skywatch.api'), db_path, host, port, pool_size, live_queue, ready)
+
+
+class ApiServer:
+    """
+    The API in a separate process.
+
+    Request handling (HTTP parsing, JSON encoding) never competes with the
+    ingest loop for the GIL, and queries use their own read-only connections.
+    The loop hands over live state once per cycle with publish_live().
+
+    The process is spawned rather than forked: the parent already runs the
+    log listener and weather threads, whose locks a fork could copy held.
+    """
+
+    def __init__(self, logger, db_path: str = "../db/aircraft_history.db",
+                 host: str = API_HOST, port: int = API_PORT,
+                 pool_size: int = API_POOL_SIZE, log_file: str = API_LOG_FILE):
+        self.logger = logger
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.log_file = log_file
+        self._process = None
+        self._live_queue = None
+
+    def start(self, timeout: float = 10):
+        """Start the server process; raises OSError if it cannot listen"""
+        context = multiprocessing.get_context('spawn')
+        self._live_queue = context.Queue(maxsize=2)
+        ready, child_ready = context.Pipe(duplex=False)
+        self._process = context.Process(
+            target=_serve_in_child,
+            args=(self.db_path, self.host, self.port, self.pool_size, self.log_file,
+                  self._live_queue, child_ready),
+            name='skywatch-api',
+            daemon=True
+        )
+        self._process.start()
+
+        if not ready.poll(timeout):
+            self.stop()
+            raise OSError("API server did not start in time")
+        result = ready.recv()
+        if isinstance(result, str):
+            self.stop()
+            raise OSError(result)
+        self.port = result
+        self.logger.info(f"API listening on http://{self.host}:{self.port}/api/ (PID {self._process.pid})")
+
+    def publish_live(self, tracker):
+        """Send the tracker's current state; skipped if the server is behind"""
+        if self._live_queue is None:
+            return
+        try:
+            self._live_queue.put_nowait(live_snapshot(tracker))
+        except queue.Full:
+            pass
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve sighting history as read-only JSON')
+    parser.add_argument('--db', default="../db/aircraft_history.db", help='Database path')
+    parser.add_argument('--host', default=API_HOST, help='Address to listen on')
+    parser.add_argument('--port', type=int, default=API_PORT, help='Port to listen on')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        serve(logging.getLogger('skywatch.api'), args.db, args.host, args.port)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+import argparse
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from aircraft_db import AircraftDatabase, scale_value, COORDINATE_SCALE, GROUND_SPEED_SCALE, TRACK_SCALE
+from constants import CSV_DATA_PATH, ICAO_RANGES_FILE
+from icao_ranges import load_icao_registry
+from reference_data import load_reference_csv_data
+
+BATCH_ROWS = 50000  # Rows per insert transaction
+MIN_INTERVAL = 30  # Seconds between kept positions per aircraft, like the live poll loop
+HISTORY_SUFFIXES = ('.json', '.json.gz')
+
+# Set in each worker by _init_worker
+_csv_data: Dict[str, Dict] = {}
+_icao_registry = None
+
+
+def find_history_files(paths: List[str]) -> List[str]:
+    """Expand files and directories into a sorted list of history files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names if name.endswith(HISTORY_SUFFIXES))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def read_json(path: str):
+    """Load a JSON file that may be gzip compressed whatever its name (readsb gzips traces as .json)"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+def parse_aircraft_json(data: Dict) -> List[Dict]:
+    """Sightings from a tar1090/readsb aircraft.json snapshot, timed by now - seen"""
+    now = data.get('now')
+    if now is None:
+        return []
+    sightings = []
+    for aircraft in data.get('aircraft', []):
+        if not aircraft.get('hex'):
+            continue
+        seen = aircraft.get('seen_pos', aircraft.get('seen', 0))
+        sightings.append({
+            'hex': aircraft['hex'],
+            'epoch': int(now - seen),
+            'flight': aircraft.get('flight', '').strip(),
+            'alt_geom': aircraft.get('alt_geom'),
+            'gs': aircraft.get('gs'),
+            'track': aircraft.get('track'),
+            'lat': aircraft.get('lat'),
+            'lon': aircraft.get('lon'),
+            'squawk': aircraft.get('squawk', ''),
+            't': aircraft.get('t')
+        })
+    return sightings
+
+
+def parse_trace(data: Dict) -> List[Dict]:
+    """
+    Sightings from a readsb globe_history trace file.
+
+    Each trace point is [seconds after timestamp, lat, lon, baro altitude or
+    "ground", gs, track, flags, vertical rate, details or null, source,
+    geometric altitude, ...]. Details (callsign, squawk) are only present
+    when they change, so they are carried forward.
+    """
+    hex_code = data.get('icao')
+    base = data.get('timestamp')
+    if not hex_code or base is None:
+        return []
+    flight = ''
+    squawk = ''
+    sightings = []
+    for point in data.get('trace', []):
+        details = point[8] if len(point) > 8 else None
+        if details:
+            flight = details.get('flight', flight).strip()
+            squawk = details.get('squawk', squawk)
+        altitude = point[10] if len(point) > 10 and point[10] is not None else point[3]
+        if altitude == 'ground':
+            altitude = 0
+        sightings.append({
+            'hex': hex_code,
+            'epoch': int(base + point[0]),
+            'flight': flight,
+            'alt_geom': altitude,
+            'gs': point[4],
+            'track': point[5],
+            'lat': point[1],
+            'lon': point[2],
+            'squawk': squawk,
+            't': data.get('t')
+        })
+    return sightings
+
+
+def _init_worker(csv_data, icao_registry):
+    global _csv_data, _icao_registry
+    _csv_data = csv_data
+    _icao_registry = icao_registry
+
+
+def parse_file(path: str) -> Tuple[str, List[tuple], Optional[str]]:
+    """
+    Parse and enrich one history file in a worker process.
+
+    Returns (path, rows, error) with rows in AircraftDatabase.insert_sightings
+    order, sorted by time.
+    """
+    try:
+        data = read_json(path)
+        if 'trace' in data:
+            sightings = parse_trace(data)
+        elif 'aircraft' in data:
+            sightings = parse_aircraft_json(data)
+        else:
+            return path, [], "not an aircraft.json or trace file"
+    except (OSError, ValueError, TypeError, IndexError, AttributeError) as e:
+        return path, [], str(e)
+
+    hex_codes = [sighting['hex'].upper() for sighting in sightings]
+    countries, military_blocks = _icao_registry.classify_many(hex_codes)
+    rows = []
+    for hex_code, sighting, country, military_block in zip(hex_codes, sightings, countries, military_blocks):
+        context = _csv_data.get(hex_code) or {}
+        rows.append((
+            hex_code,
+            sighting['flight'],
+            sighting['alt_geom'],
+            scale_value(sighting['gs'], GROUND_SPEED_SCALE),
+            scale_value(sighting['track'], TRACK_SCALE),
+            context.get('$Operator'),
+            context.get('$Type') or sighting['t'],
+            context.get('#ImageLink'),
+            sighting['epoch'],
+            scale_value(sighting['lat'], COORDINATE_SCALE),
+            scale_value(sighting['lon'], COORDINATE_SCALE),
+            sighting['squawk'],
+            None if country is None else str(country),
+            int(military_block)
+        ))
+    rows.sort(key=lambda row: row[8])
+    return path, rows, None
+
+
+class Thinner:
+    """Keep at most one position per aircraft every min_interval seconds"""
+
+    def __init__(self, min_interval: int):
+        self.min_interval = min_interval
+        self._last_kept: Dict[str, int] = {}
+
+    def filter(self, rows: List[tuple]) -> List[tuple]:
+        if self.min_interval <= 0:
+            return rows
+        kept = []
+        for row in rows:
+            hex_code, epoch = row[0], row[8]
+            last = self._last_kept.get(hex_code)
+            if last is None or abs(epoch - last) >= self.min_interval:
+                self._last_kept[hex_code] = epoch
+                kept.append(row)
+        return kept
+
+
+def imported_files(cursor) -> Dict[str, Tuple[int, float]]:
+    """Files already loaded, path -> (size, mtime), so interrupted imports can resume"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS backfill_files (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            rows INTEGER NOT NULL,
+            imported_at INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("SELECT path, size, mtime FROM backfill_files")
+    return {path: (size, mtime) for path, size, mtime in cursor.fetchall()}
+
+
+def rebuild_pending(cursor) -> bool:
+    """Whether an earlier import deferred the indexes and didn't finish rebuilding"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS backfill_state (
+            name TEXT PRIMARY KEY
+        )
+    ''')
+    cursor.execute("SELECT 1 FROM backfill_state WHERE name = 'rebuild'")
+    return cursor.fetchone() is not None
+
+
+def backfill(logger, db: AircraftDatabase, paths: List[str], workers: int = None,
+             min_interval: int = MIN_INTERVAL, batch_rows: int = BATCH_ROWS,
+             csv_path: str = CSV_DATA_PATH) -> Dict:
+    """
+    Import history files into db and return counts and rows/sec.
+
+    Each file is recorded in backfill_files in the same transaction as its
+    rows, so re-running after an interruption skips finished files. The
+    index, rollup and search rebuild afterwards is flagged in backfill_state
+    until it completes, so a later run finishes it even with no new files.
+    Sightings are enriched from the reference CSVs and ICAO ranges in csv_path.
+    """
+    files = find_history_files(paths)
+    conn = sqlite3.connect(db.db_path, timeout=60)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    done = imported_files(cursor)
+    resume_rebuild = rebuild_pending(cursor)
+
+    pending = []
+    for path in files:
+        stat = os.stat(path)
+        if done.get(os.path.abspath(path)) != (stat.st_size, stat.st_mtime):
+            pending.append(path)
+    logger.info(f"{len(files)} history files, {len(files) - len(pending)} already imported, {len(pending)} to go")
+
+    totals = {'files': 0, 'errors': 0, 'parsed': 0, 'inserted': 0, 'seconds': 0.0}
+    if not pending and not resume_rebuild:
+        conn.close()
+        return totals
+
+    csv_data = load_reference_csv_data(csv_path)
+    icao_registry = load_icao_registry(f"{csv_path}/{ICAO_RANGES_FILE}")
+    thinner = Thinner(min_interval)
+
+    if pending:
+        cursor.execute("INSERT OR IGNORE INTO backfill_state (name) VALUES ('rebuild')")
+        db.defer_indexes(cursor)
+        conn.commit()
+    else:
+        logger.info("Finishing the rebuild left over from an interrupted import")
+
+    started = time.perf_counter()
+    batch, batch_files = [], []
+
+    def flush():
+        totals['inserted'] += db.insert_sightings(cursor, batch)
+        cursor.executemany('''
+            INSERT OR REPLACE INTO backfill_files (path, size, mtime, rows, imported_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', batch_files)
+        conn.commit()
+        batch.clear()
+        batch_files.clear()
+        elapsed = time.perf_counter() - started
+        logger.info(f"{totals['files']}/{len(pending)} files, {totals['inserted']} rows inserted, "
+                    f"{totals['parsed'] / elapsed:.0f} rows/sec")
+
+    try:
+        if pending:
+            with multiprocessing.Pool(workers, initializer=_init_worker,
+                                      initargs=(csv_data, icao_registry)) as pool:
+                # Ordered results keep per-aircraft thinning deterministic across files
+                for path, rows, error in pool.imap(parse_file, pending, chunksize=4):
+                    totals['files'] += 1
+                    if error:
+                        # Recorded with no rows so unreadable files aren't retried every run
+                        totals['errors'] += 1
+                        logger.warning(f"Skipping {path}: {error}")
+                    rows = thinner.filter(rows)
+                    totals['parsed'] += len(rows)
+                    batch.extend(rows)
+                    stat = os.stat(path)
+                    batch_files.append((os.path.abspath(path), stat.st_size, stat.st_mtime,
+                                        len(rows), int(time.time())))
+                    if len(batch) >= batch_rows:
+                        flush()
+                flush()
+    finally:
+        conn.close()
+        logger.info("Rebuilding indexes...")
+        db.restore_indexes()
+
+    logger.info("Rebuilding rollups...")
+    db.rebuild_rollups(csv_data)
+
+    logger.info("Rebuilding search index...")
+    db.rebuild_search_index(csv_data)
+
+    conn = sqlite3.connect(db.db_path, timeout=60)
+    conn.execute("DELETE FROM backfill_state WHERE name = 'rebuild'")
+    conn.commit()
+    conn.close()
+
+    totals['seconds'] = time.perf_counter() - started
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import saved aircraft.json dumps and readsb globe_history traces')
+    parser.add_argument('paths', nargs='+', help='History files or directories to import')
+    parser.add_argument('--db', default="../db/aircraft_history.db", help='Database path')
+    parser.add_argument('--workers', type=int, help='Parser processes (default: CPU count)')
+    parser.add_argument('--min-interval', type=int, default=MIN_INTERVAL,
+                        help='Seconds between kept positions per aircraft (0 keeps everything)')
+    parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS, help='Rows per insert transaction')
+    parser.add_argument('--csv-data', default=CSV_DATA_PATH,
+                        help='Directory of the plane-alert reference CSVs and icao_ranges.csv')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger('skywatch.backfill')
+
+    db = AircraftDatabase(args.db)
+    totals = backfill(logger, db, args.paths, args.workers, args.min_interval, args.batch_rows, args.csv_data)
+    if totals['files']:
+        logger.info(
+            f"Imported {totals['files']} files ({totals['errors']} skipped): {totals['parsed']} rows parsed, "
+            f"{totals['inserted']} inserted in {totals['seconds']:.1f}s "
+            f"= {totals['parsed'] / totals['seconds']:.0f} rows/sec"
+        )
+
+
+if __name__ == "__main__":
+    main()
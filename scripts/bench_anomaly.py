@@ -0,0 +1,116 @@
+import argparse
+import glob
+import json
+import time
+import numpy as np
+
+from anomaly import AnomalyDetector
+from tracker import AircraftTracker
+
+POLL_INTERVAL = 30  # Seconds between cycles in skywatch.py
+
+
+def synthetic_cycles(num_aircraft, num_cycles, seed=0):
+    """
+    Generate tar1090-style snapshots for num_aircraft flying straight lines,
+    with a few injected descents, fast low flyers, orbits and dropouts.
+    """
+    rng = np.random.default_rng(seed)
+    hex_codes = [f"{address:06X}" for address in rng.choice(0xFFFFFF, num_aircraft, replace=False)]
+    lat = rng.uniform(38.0, 42.0, num_aircraft)
+    lon = rng.uniform(-85.0, -80.0, num_aircraft)
+    alt = rng.uniform(12000, 40000, num_aircraft)
+    gs = rng.uniform(120, 480, num_aircraft)
+    track = rng.uniform(0, 360, num_aircraft)
+    vrate = np.zeros(num_aircraft)
+
+    groups = np.array_split(rng.permutation(num_aircraft)[:max(4, num_aircraft // 50)], 4)
+    descending, fast_low, orbiting, dropping = groups
+    vrate[descending] = -6000
+    alt[fast_low] = 5000
+    gs[fast_low] = 320
+    gs[orbiting] = 150
+    vrate[fast_low] = 0
+
+    start = time.time()
+    for cycle in range(num_cycles):
+        now = start + cycle * POLL_INTERVAL
+        # Orbiting aircraft turn 90 degrees a cycle, flying a small square
+        track[orbiting] = (track[orbiting] + 90) % 360
+        alt = np.clip(alt + vrate * POLL_INTERVAL / 60, 0, None)
+        distance_deg = gs * POLL_INTERVAL / 3600 / 60
+        lat = lat + distance_deg * np.cos(np.radians(track))
+        lon = lon + distance_deg * np.sin(np.radians(track))
+
+        silent = np.zeros(num_aircraft, dtype=bool)
+        if cycle >= num_cycles // 2:
+            silent[dropping] = True
+
+        snapshot = [
+            {
+                'hex': hex_codes[i], 'seen': 0.5, 'flight': f"TST{i % 1000:03d}",
+                'lat': float(lat[i]), 'lon': float(lon[i]), 'alt_geom': int(alt[i]),
+                'gs': float(gs[i]), 'track': float(track[i]), 'geom_rate': int(vrate[i])
+            }
+            for i in range(num_aircraft) if not silent[i]
+        ]
+        yield now, snapshot
+
+
+def replayed_cycles(pattern):
+    """Yield (now, aircraft) from saved tar1090 aircraft.json files, in file name order"""
+    for path in sorted(glob.glob(pattern)):
+        with open(path) as file:
+            data = json.load(file)
+        yield data['now'], data['aircraft']
+
+
+def run(cycles):
+    tracker = AircraftTracker()
+    detector = AnomalyDetector()
+    timings = []
+    counts = {}
+    aircraft_per_cycle = []
+
+    for now, aircraft_data in cycles:
+        events = tracker.update(aircraft_data, now=now)
+        moved = [state for state, changed in events.changes() if 'position' in changed or 'altitude' in changed]
+
+        started = time.perf_counter()
+        anomalies = detector.update_from_states(moved, now=now, tracked=tracker.currently_tracking())
+        timings.append((time.perf_counter() - started) * 1000)
+
+        aircraft_per_cycle.append(len(moved))
+        for anomaly in anomalies:
+            counts[anomaly.rule] = counts.get(anomaly.rule, 0) + 1
+
+    return np.array(timings), counts, aircraft_per_cycle
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the anomaly detector against the poll interval')
+    parser.add_argument('--aircraft', type=int, default=5000, help='Synthetic aircraft per cycle')
+    parser.add_argument('--cycles', type=int, default=120, help='Synthetic cycles to run')
+    parser.add_argument('--replay', help='Glob of saved aircraft.json files to replay instead')
+    args = parser.parse_args()
+
+    if args.replay:
+        cycles = replayed_cycles(args.replay)
+    else:
+        cycles = synthetic_cycles(args.aircraft, args.cycles)
+
+    timings, counts, aircraft_per_cycle = run(cycles)
+    if len(timings) == 0:
+        print("No cycles to benchmark")
+        return
+
+    print(f"Cycles: {len(timings)}, aircraft per cycle: up to {max(aircraft_per_cycle)}")
+    print(f"Detector time per cycle: p50 {np.percentile(timings, 50):.2f} ms, "
+          f"p95 {np.percentile(timings, 95):.2f} ms, max {timings.max():.2f} ms")
+    print(f"Worst case uses {timings.max() / (POLL_INTERVAL * 1000):.3%} of the {POLL_INTERVAL}s poll interval")
+    for rule, count in sorted(counts.items()):
+        print(f"  {rule}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import psutil
+import pytz
+from tabulate import tabulate
+
+from aircraft_db import AircraftDatabase, COMPACT_COLUMNS, COORDINATE_SCALE, GROUND_SPEED_SCALE, TRACK_SCALE
+from constants import HOME_LATITUDE, HOME_LONGITUDE
+
+DEFAULT_SIZES = [100000, 1000000, 10000000]
+HISTORY_DAYS = 60  # Half of the generated history is older than the 30 day archive cutoff
+ARCHIVE_DAYS = 30
+FLEET_SIZE = 20000  # Distinct hex codes in the generated history
+WEATHER_INTERVAL = 300  # Seconds between generated weather observations
+INSERT_CHUNK = 100000
+REGRESSION_THRESHOLD = 0.25  # Slowdown (fraction of baseline) reported as a regression
+REGRESSION_MIN_MS = 1.0  # ...as long as it is also at least this much slower, to ignore timer noise
+# Results of a run with the default sizes and calls, compared against unless --baseline says otherwise
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_storage_baseline.json')
+
+OPERATORS = ['American Airlines', 'Delta Air Lines', 'Southwest Airlines', 'United Airlines',
+             'FedEx', 'UPS', 'NetJets', 'Republic Airways', 'United States Air Force', 'Private']
+AIRCRAFT_TYPES = ['B738', 'A320', 'A321', 'E75L', 'CRJ9', 'B763', 'C172', 'C17', 'KC135', 'PC12']
+COUNTRIES = ['United States', 'Canada', 'Mexico', 'United Kingdom', 'Germany']
+
+
+class PeakRssSampler:
+    """Track the peak resident set size of this process while a block runs"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.process = psutil.Process(os.getpid())
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.process.memory_info().rss
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+
+def generate_history(db_path: str, num_rows: int, seed: int = 0):
+    """
+    Fill a new database with num_rows synthetic sightings spread over
+    HISTORY_DAYS, plus weather every WEATHER_INTERVAL seconds.
+
+    Rows are bulk inserted into the compact tables; the spatial index and
+    rollups are then built the same way an upgraded database gets them.
+    """
+    rng = np.random.default_rng(seed)
+    db = AircraftDatabase(db_path)
+    end = int(time.time())
+    start = end - HISTORY_DAYS * 86400
+
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        for table, values in [('operators', OPERATORS), ('aircraft_types', AIRCRAFT_TYPES),
+                              ('countries', COUNTRIES)]:
+            cursor.executemany(f"INSERT OR IGNORE INTO {table} (value) VALUES (?)", [(v,) for v in values])
+        cursor.executemany("INSERT OR IGNORE INTO image_urls (value) VALUES (?)",
+                           [(f"https://example.com/{t}.jpg",) for t in AIRCRAFT_TYPES])
+
+        fleet = np.array([f"{address:06X}" for address in rng.choice(0xFFFFFF, FLEET_SIZE, replace=False)])
+        fleet_operator = rng.integers(1, len(OPERATORS) + 1, FLEET_SIZE)
+        fleet_type = rng.integers(1, len(AIRCRAFT_TYPES) + 1, FLEET_SIZE)
+        fleet_country = rng.integers(1, len(COUNTRIES) + 1, FLEET_SIZE)
+
+        for offset in range(0, num_rows, INSERT_CHUNK):
+            size = min(INSERT_CHUNK, num_rows - offset)
+            aircraft = rng.integers(0, FLEET_SIZE, size)
+            # Evenly spaced timestamps; the rare (hex_code, ts) repeat is dropped like a duplicate poll
+            ts = start + ((offset + np.arange(size)) * (end - start) // num_rows)
+            rows = zip(
+                fleet[aircraft].tolist(),
+                [f"TST{a % 1000:03d}" for a in aircraft.tolist()],
+                rng.integers(0, 45000, size).tolist(),
+                (rng.uniform(80, 520, size) * GROUND_SPEED_SCALE).astype(int).tolist(),
+                (rng.uniform(0, 360, size) * TRACK_SCALE).astype(int).tolist(),
+                fleet_operator[aircraft].tolist(),
+                fleet_type[aircraft].tolist(),
+                fleet_type[aircraft].tolist(),
+                ts.tolist(),
+                ((HOME_LATITUDE + rng.uniform(-2, 2, size)) * COORDINATE_SCALE).astype(int).tolist(),
+                ((HOME_LONGITUDE + rng.uniform(-2, 2, size)) * COORDINATE_SCALE).astype(int).tolist(),
+                ['1200'] * size,
+                fleet_country[aircraft].tolist(),
+                (fleet_operator[aircraft] == OPERATORS.index('United States Air Force') + 1).astype(int).tolist()
+            )
+            cursor.executemany(f'''
+                INSERT OR IGNORE INTO sightings ({COMPACT_COLUMNS})
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+
+        weather_times = range(start - start % WEATHER_INTERVAL, end, WEATHER_INTERVAL)
+        cursor.executemany('''
+            INSERT OR IGNORE INTO weather_conditions
+            (timestamp, temperature, wind_speed, wind_direction, visibility, precipitation, pressure)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (str(datetime.datetime.fromtimestamp(epoch, pytz.UTC)),
+             float(rng.uniform(-10, 35)), float(rng.uniform(0, 15)), float(rng.uniform(0, 360)),
+             10000.0, 0.0, float(rng.uniform(990, 1030)))
+            for epoch in weather_times
+        ])
+        conn.commit()
+
+    # Reopening backfills the spatial index for the bulk-inserted rows
+    db = AircraftDatabase(db_path)
+    db.rebuild_rollups()
+    db.rebuild_search_index()
+    return db
+
+
+def measure(fn, calls: int = 1):
+    """
+    Call fn() `calls` times. fn returns the number of rows it handled.
+    Returns p50/p95 latency, rows/sec over all calls and peak RSS.
+    """
+    timings = []
+    rows = 0
+    with PeakRssSampler() as sampler:
+        for _ in range(calls):
+            started = time.perf_counter()
+            rows += fn() or 0
+            timings.append(time.perf_counter() - started)
+    total = sum(timings)
+    return {
+        'calls': calls,
+        'p50_ms': float(np.percentile(timings, 50) * 1000),
+        'p95_ms': float(np.percentile(timings, 95) * 1000),
+        'rows_per_sec': rows / total if total > 0 else 0.0,
+        'peak_rss_mb': sampler.peak / (1024 * 1024)
+    }
+
+
+def count_rows(db_path: str, table: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def benchmark_size(num_rows: int, calls: int, workdir: str, seed: int = 0) -> dict:
+    """Generate a database of num_rows sightings and time each public AircraftDatabase method"""
+    db_path = os.path.join(workdir, f"bench_{num_rows}.db")
+    results = {}
+
+    print(f"Generating {num_rows:,} sightings...", flush=True)
+    generated = []
+
+    def generate():
+        generated.append(generate_history(db_path, num_rows, seed))
+        return num_rows
+
+    results['generate'] = measure(generate)
+    db = generated[0]
+    results['database_size_mb'] = os.path.getsize(db_path) / (1024 * 1024)
+
+    rng = np.random.default_rng(seed + 1)
+    now = datetime.datetime.now(pytz.UTC)
+    with sqlite3.connect(db_path) as conn:
+        hex_codes = [row[0] for row in conn.execute("SELECT DISTINCT hex_code FROM sightings LIMIT 1000")]
+
+    def recent_sightings():
+        return len(db.get_sightings(start_date=now - datetime.timedelta(hours=1), limit=100))
+
+    def hex_history():
+        return len(db.get_sightings(hex_code=str(rng.choice(hex_codes)), limit=1000))
+
+    def day_range():
+        day = now - datetime.timedelta(days=int(rng.integers(1, HISTORY_DAYS)))
+        return len(db.get_sightings(start_date=day, end_date=day + datetime.timedelta(days=1), limit=1000))
+
+    def sightings_near():
+        return len(db.get_sightings_near(HOME_LATITUDE, HOME_LONGITUDE, 10,
+                                         start_date=now - datetime.timedelta(days=7)))
+
+    def rollup_summary():
+        summary = db.get_rollup_summary(now - datetime.timedelta(days=7))
+        return summary['sighting_count']
+
+    def rollups():
+        return len(db.get_rollups('hour', start_date=now - datetime.timedelta(days=7), end_date=now))
+
+    search_queries = ['Air Force C17', 'FedEx B763', 'callsign:TST12', 'NetJets', 'KC135']
+
+    def search():
+        text = str(rng.choice(search_queries))
+        start = now - datetime.timedelta(days=30)
+        return len(db.search_sightings(text, start_date=start, limit=100))
+
+    def weather():
+        return len(db.get_weather(now - datetime.timedelta(days=7), now))
+
+    def database_stats():
+        db.get_database_stats()
+        return 0
+
+    counter = iter(range(10 ** 9))
+
+    def record_sighting():
+        # A new hex code each call so (hex_code, ts) never collides
+        db.record_sighting({
+            'hex': f"F{next(counter):05X}", 'flight': 'BENCH1', 'alt_geom': 12000, 'gs': 250.0,
+            'track': 90.0, 'lat': HOME_LATITUDE, 'lon': HOME_LONGITUDE, 'squawk': '1200',
+            '$Operator': OPERATORS[0], '$Type': AIRCRAFT_TYPES[0], 'country': COUNTRIES[0], 'military': 0
+        })
+        return 1
+
+    def record_weather():
+        db.record_weather({'timestamp': now + datetime.timedelta(seconds=next(counter)),
+                           'temperature': 20.0, 'wind_speed': 5.0, 'wind_direction': 180.0,
+                           'visibility': 10000.0, 'precipitation': 0.0, 'pressure': 1013.0})
+        return 1
+
+    # Read paths first so the write benchmarks don't change what they see
+    for name, fn in [('get_sightings_recent', recent_sightings),
+                     ('get_sightings_hex', hex_history),
+                     ('get_sightings_day', day_range),
+                     ('get_sightings_near', sightings_near),
+                     ('search_sightings', search),
+                     ('get_rollup_summary', rollup_summary),
+                     ('get_rollups', rollups),
+                     ('get_weather', weather),
+                     ('get_database_stats', database_stats),
+                     ('record_sighting', record_sighting),
+                     ('record_weather', record_weather)]:
+        print(f"  {name}", flush=True)
+        results[name] = measure(fn, calls)
+
+    print("  rebuild_rollups", flush=True)
+    results['rebuild_rollups'] = measure(lambda: db.rebuild_rollups() or count_rows(db_path, 'sightings'))
+
+    print("  rebuild_search_index", flush=True)
+    results['rebuild_search_index'] = measure(lambda: db.rebuild_search_index())
+
+    backup_path = os.path.join(workdir, "backup.db")
+    print("  backup_database", flush=True)
+    results['backup_database'] = measure(lambda: db.backup_database(backup_path) and num_rows)
+    os.remove(backup_path)
+
+    def archive():
+        before = count_rows(db_path, 'sightings')
+        db.archive_old_records(days_old=ARCHIVE_DAYS)
+        return before - count_rows(db_path, 'sightings')
+
+    print("  archive_old_records", flush=True)
+    results['archive_old_records'] = measure(archive)
+
+    # Every archived month has ended, so all of the archive moves to the cold files
+    print("  export_cold_storage", flush=True)
+    results['export_cold_storage'] = measure(lambda: db.export_cold_storage(days_old=0))
+
+    def cold_hex():
+        return len(db.cold_storage.query(hex_code=str(rng.choice(hex_codes)), limit=1000))
+
+    def cold_day():
+        day = now - datetime.timedelta(days=int(rng.integers(ARCHIVE_DAYS + 1, HISTORY_DAYS)))
+        start = int(day.timestamp())
+        return len(db.cold_storage.query(start_epoch=start, end_epoch=start + 86400, limit=1000))
+
+    def archive_hex_history():
+        return len(db.get_sightings(hex_code=str(rng.choice(hex_codes)), limit=1000, include_archive=True))
+
+    for name, fn in [('cold_query_hex', cold_hex),
+                     ('cold_query_day', cold_day),
+                     ('get_sightings_hex_archive', archive_hex_history)]:
+        print(f"  {name}", flush=True)
+        results[name] = measure(fn, calls)
+
+    print("  vacuum_database", flush=True)
+    results['vacuum_database'] = measure(lambda: db.vacuum_database() or num_rows)
+    results['database_size_after_vacuum_mb'] = os.path.getsize(db_path) / (1024 * 1024)
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    shutil.rmtree(db.cold_storage.directory, ignore_errors=True)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_ms: float = REGRESSION_MIN_MS) -> list:
+    """Return [size, method, baseline p50, p50, change] rows for methods slower than threshold"""
+    regressions = []
+    for size, methods in results['results'].items():
+        for method, result in methods.items():
+            if not isinstance(result, dict):
+                continue
+            previous = baseline.get('results', {}).get(size, {}).get(method)
+            if not previous or previous['p50_ms'] <= 0:
+                continue
+            change = result['p50_ms'] / previous['p50_ms'] - 1
+            if change > threshold and result['p50_ms'] - previous['p50_ms'] >= min_ms:
+                regressions.append([size, method, f"{previous['p50_ms']:.2f}", f"{result['p50_ms']:.2f}",
+                                    f"+{change:.0%}"])
+    return regressions
+
+
+def print_results(results: dict):
+    for size, methods in results['results'].items():
+        print(f"\n{int(size):,} rows ({methods['database_size_mb']:.1f} MB, "
+              f"{methods['database_size_after_vacuum_mb']:.1f} MB after archive and vacuum)")
+        table = [[method, result['calls'], f"{result['p50_ms']:.2f}", f"{result['p95_ms']:.2f}",
+                  f"{result['rows_per_sec']:,.0f}", f"{result['peak_rss_mb']:.1f}"]
+                 for method, result in methods.items() if isinstance(result, dict)]
+        print(tabulate(table, headers=['Method', 'Calls', 'p50 ms', 'p95 ms', 'Rows/sec', 'Peak RSS MB'],
+                       tablefmt='simple'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark AircraftDatabase at production data sizes')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Sighting counts to test')
+    parser.add_argument('--calls', type=int, default=50, help='Calls per method for the repeatable benchmarks')
+    parser.add_argument('--output', default='bench_storage_results.json', help='Where to write the results')
+    parser.add_argument('--baseline', default=BASELINE_FILE,
+                        help='Earlier results to compare against (default: the committed baseline)')
+    parser.add_argument('--no-baseline', action='store_true', help='Skip the baseline comparison')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='p50 slowdown, as a fraction, that counts as a regression')
+    parser.add_argument('--min-ms', type=float, default=REGRESSION_MIN_MS,
+                        help='Ignore slowdowns smaller than this many milliseconds')
+    parser.add_argument('--workdir', help='Directory for the temporary databases (default: system temp)')
+    args = parser.parse_args()
+
+    results = {
+        'meta': {
+            'timestamp': datetime.datetime.now(pytz.UTC).isoformat(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'results': {}
+    }
+
+    workdir = tempfile.mkdtemp(dir=args.workdir)
+    try:
+        for size in args.sizes:
+            results['results'][str(size)] = benchmark_size(size, args.calls, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print_results(results)
+    print(f"\nResults written to {args.output}")
+
+    if args.no_baseline:
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}, skipping the comparison")
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = compare(results, baseline, args.threshold, args.min_ms)
+    if regressions:
+        print(f"\nRegressions (p50 more than {args.threshold:.0%} slower than {args.baseline}):")
+        print(tabulate(regressions, headers=['Rows', 'Method', 'Baseline ms', 'Now ms', 'Change'],
+                       tablefmt='simple'))
+        sys.exit(1)
+    print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
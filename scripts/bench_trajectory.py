@@ -0,0 +1,62 @@
+import argparse
+import time
+import numpy as np
+
+from bench_anomaly import POLL_INTERVAL, synthetic_cycles, replayed_cycles
+from tracker import AircraftTracker
+from trajectory import TrajectoryPredictor
+
+
+def run(cycles, predictor):
+    tracker = AircraftTracker()
+    timings = []
+    inbound = []
+    aircraft_per_cycle = []
+
+    for now, aircraft_data in cycles:
+        tracker.update(aircraft_data, now=now)
+        states = tracker.currently_tracking()
+
+        started = time.perf_counter()
+        predictions = predictor.predict_states(states, now=now)
+        timings.append((time.perf_counter() - started) * 1000)
+
+        aircraft_per_cycle.append(len(predictions))
+        inbound.append(int(predictions.inbound.sum()))
+
+    return np.array(timings), inbound, aircraft_per_cycle
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the trajectory predictor against the poll interval')
+    parser.add_argument('--aircraft', type=int, default=5000, help='Synthetic aircraft per cycle')
+    parser.add_argument('--cycles', type=int, default=60, help='Synthetic cycles to run')
+    parser.add_argument('--replay', help='Glob of saved aircraft.json files to replay instead')
+    parser.add_argument('--radius', type=float, default=25, help='Overhead radius in km around the synthetic area')
+    args = parser.parse_args()
+
+    if args.replay:
+        cycles = replayed_cycles(args.replay)
+    else:
+        cycles = synthetic_cycles(args.aircraft, args.cycles)
+
+    # A few locations spread over the synthetic traffic area (38-42N, 85-80W)
+    locations = {f"Location {i}": (lat, lon) for i, (lat, lon) in
+                 enumerate([(39.0, -84.0), (40.0, -82.5), (41.0, -81.0), (40.5, -83.5)])}
+    predictor = TrajectoryPredictor(locations, radius_km=args.radius)
+
+    timings, inbound, aircraft_per_cycle = run(cycles, predictor)
+    if len(timings) == 0:
+        print("No cycles to benchmark")
+        return
+
+    print(f"Cycles: {len(timings)}, aircraft per cycle: up to {max(aircraft_per_cycle)}, "
+          f"{len(locations)} locations")
+    print(f"Predictor time per cycle: p50 {np.percentile(timings, 50):.2f} ms, "
+          f"p95 {np.percentile(timings, 95):.2f} ms, max {timings.max():.2f} ms")
+    print(f"Worst case uses {timings.max() / (POLL_INTERVAL * 1000):.3%} of the {POLL_INTERVAL}s poll interval")
+    print(f"Inbound (aircraft, location) pairs per cycle: mean {np.mean(inbound):.1f}, max {max(inbound)}")
+
+
+if __name__ == "__main__":
+    main()
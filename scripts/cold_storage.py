@@ -0,0 +1,283 @@
+import base64
+import datetime
+import gzip
+import hashlib
+import itertools
+import json
+import lzma
+import math
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from constants import COLD_STORAGE_COMPRESSION, COLD_CHUNK_ROWS, COLD_BLOOM_FALSE_POSITIVE
+
+# Row layout inside cold chunks. Dimension ids are replaced by their text so
+# the files are readable without the database they came from. Files written
+# before ts_us was added have rows without it.
+COLD_COLUMNS = [
+    'id', 'hex_code', 'flight_number', 'altitude', 'ground_speed', 'track',
+    'operator', 'aircraft_type', 'image_url', 'ts', 'latitude', 'longitude',
+    'squawk_code', 'country', 'is_military', 'archive_ts', 'ts_us'
+]
+TS_COLUMN = COLD_COLUMNS.index('ts')
+HEX_COLUMN = COLD_COLUMNS.index('hex_code')
+ID_COLUMN = COLD_COLUMNS.index('id')
+
+COMPRESSORS = {
+    'gzip': (gzip.compress, gzip.decompress),
+    'lzma': (lzma.compress, lzma.decompress)
+}
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, serializable into the sidecar index"""
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[bytearray] = None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, false_positive: float = COLD_BLOOM_FALSE_POSITIVE):
+        capacity = max(1, capacity)
+        num_bits = max(8, int(math.ceil(-capacity * math.log(false_positive) / math.log(2) ** 2)))
+        num_hashes = max(1, int(round(num_bits / capacity * math.log(2))))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def to_dict(self) -> Dict:
+        return {
+            'bits': self.num_bits,
+            'hashes': self.num_hashes,
+            'data': base64.b64encode(bytes(self.bits)).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict):
+        return cls(data['bits'], data['hashes'], bytearray(base64.b64decode(data['data'])))
+
+
+def month_key(epoch: int) -> str:
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).strftime('%Y-%m')
+
+
+def month_bounds(key: str):
+    """(first second, first second of the next month) of a 'YYYY-MM' key, as UTC epochs"""
+    year, month = (int(part) for part in key.split('-'))
+    start = datetime.datetime(year, month, 1, tzinfo=datetime.timezone.utc)
+    end = datetime.datetime(year + month // 12, month % 12 + 1, 1, tzinfo=datetime.timezone.utc)
+    return int(start.timestamp()), int(end.timestamp())
+
+
+class ColdStore:
+    """
+    Append-only, compressed monthly files of archived sightings.
+
+    Each month has a .chunks file of independently compressed chunks (JSON
+    lines in COLD_COLUMNS order) and a .index.json sidecar listing every
+    chunk's byte range, time range, highest sighting id and a Bloom filter
+    of its hex codes. Queries read the sidecars and only decompress chunks
+    whose time range overlaps and whose filter may contain the hex code.
+
+    Chunk data is fsynced before the sidecar is atomically replaced, so a
+    crash can only leave unreferenced bytes at the end of a .chunks file.
+    """
+
+    def __init__(self, directory: str, compression: str = COLD_STORAGE_COMPRESSION,
+                 chunk_rows: int = COLD_CHUNK_ROWS):
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {sorted(COMPRESSORS)}")
+        self.directory = directory
+        self.compression = compression
+        self.chunk_rows = chunk_rows
+        # month -> (sidecar mtime, parsed index)
+        self._indexes: Dict[str, tuple] = {}
+
+    def _chunks_path(self, month: str) -> str:
+        return os.path.join(self.directory, f"sightings-{month}.chunks")
+
+    def _index_path(self, month: str) -> str:
+        return os.path.join(self.directory, f"sightings-{month}.index.json")
+
+    def months(self) -> List[str]:
+        """Months with cold data, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name[len('sightings-'):-len('.index.json')]
+            for name in os.listdir(self.directory)
+            if name.startswith('sightings-') and name.endswith('.index.json')
+        )
+
+    def _load_index(self, month: str) -> Dict:
+        path = self._index_path(month)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return {'columns': COLD_COLUMNS, 'chunks': []}
+        cached = self._indexes.get(month)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path) as file:
+            index = json.load(file)
+        for chunk in index['chunks']:
+            chunk['bloom'] = BloomFilter.from_dict(chunk['bloom'])
+        self._indexes[month] = (mtime, index)
+        return index
+
+    def _write_index(self, month: str, index: Dict):
+        serializable = dict(index)
+        serializable['chunks'] = [
+            dict(chunk, bloom=chunk['bloom'].to_dict()) for chunk in index['chunks']
+        ]
+        path = self._index_path(month)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(serializable, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+        self._indexes.pop(month, None)
+
+    def max_id(self, month: str) -> int:
+        """Highest sighting id already stored for a month, 0 if none"""
+        return max((chunk['max_id'] for chunk in self._load_index(month)['chunks']), default=0)
+
+    def end_epoch(self) -> int:
+        """First second after the newest cold month, 0 if there is no cold data"""
+        months = self.months()
+        return month_bounds(months[-1])[1] if months else 0
+
+    def append(self, month: str, rows: Iterable[list]):
+        """
+        Append rows (COLD_COLUMNS order, all within month) as new chunks.
+
+        rows may be a lazy iterator; only one chunk is held in memory and the
+        sidecar is rewritten once at the end.
+        """
+        compress = COMPRESSORS[self.compression][0]
+        new_chunks = []
+        rows = iter(rows)
+        chunk_rows = list(itertools.islice(rows, self.chunk_rows))
+        if not chunk_rows:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._chunks_path(month), 'ab') as file:
+            while chunk_rows:
+                data = compress('\n'.join(json.dumps(row) for row in chunk_rows).encode('utf-8'))
+                offset = file.seek(0, os.SEEK_END)
+                file.write(data)
+
+                hex_codes = {row[HEX_COLUMN] for row in chunk_rows}
+                bloom = BloomFilter.for_capacity(len(hex_codes))
+                for hex_code in hex_codes:
+                    bloom.add(hex_code)
+                new_chunks.append({
+                    'offset': offset,
+                    'length': len(data),
+                    'compression': self.compression,
+                    'rows': len(chunk_rows),
+                    'min_ts': min(row[TS_COLUMN] for row in chunk_rows),
+                    'max_ts': max(row[TS_COLUMN] for row in chunk_rows),
+                    'max_id': max(row[ID_COLUMN] for row in chunk_rows),
+                    'bloom': bloom
+                })
+                chunk_rows = list(itertools.islice(rows, self.chunk_rows))
+            file.flush()
+            os.fsync(file.fileno())
+
+        index = self._load_index(month)
+        self._write_index(month, {'columns': COLD_COLUMNS, 'chunks': index['chunks'] + new_chunks})
+
+    def _read_chunk(self, month: str, chunk: Dict) -> Iterable[list]:
+        decompress = COMPRESSORS[chunk['compression']][1]
+        with open(self._chunks_path(month), 'rb') as file:
+            file.seek(chunk['offset'])
+            data = decompress(file.read(chunk['length']))
+        return (json.loads(line) for line in data.decode('utf-8').splitlines())
+
+    def month_rows(self, month: str) -> Iterable[list]:
+        """Every row of a month, one chunk in memory at a time"""
+        for chunk in self._load_index(month)['chunks']:
+            yield from self._read_chunk(month, chunk)
+
+    def query(self, hex_code: Optional[str] = None, start_epoch: Optional[int] = None,
+              end_epoch: Optional[int] = None, limit: Optional[int] = None,
+              hex_codes: Optional[Set[str]] = None,
+              row_filter: Optional[Callable[[list], bool]] = None) -> List[list]:
+        """
+        Rows matching the filters, newest first.
+
+        hex_codes matches any of several aircraft (chunks are skipped unless
+        their filter may contain one of them) and row_filter is an extra test
+        applied to each remaining row. Chunks are visited newest first, and
+        the search stops once `limit` rows are found that are newer than
+        everything left to read.
+        """
+        if hex_code:
+            hex_code = hex_code.upper()
+        if hex_codes is not None:
+            hex_codes = {code.upper() for code in hex_codes}
+
+        candidates = []
+        for month in self.months():
+            month_start, month_end = month_bounds(month)
+            if (start_epoch is not None and month_end <= start_epoch) or \
+               (end_epoch is not None and month_start > end_epoch):
+                continue
+            for chunk in self._load_index(month)['chunks']:
+                if start_epoch is not None and chunk['max_ts'] < start_epoch:
+                    continue
+                if end_epoch is not None and chunk['min_ts'] > end_epoch:
+                    continue
+                if hex_code and hex_code not in chunk['bloom']:
+                    continue
+                if hex_codes is not None and not any(code in chunk['bloom'] for code in hex_codes):
+                    continue
+                candidates.append((month, chunk))
+        candidates.sort(key=lambda candidate: candidate[1]['max_ts'], reverse=True)
+
+        results = []
+        for month, chunk in candidates:
+            if limit and len(results) >= limit and chunk['max_ts'] < results[-1][TS_COLUMN]:
+                break
+            for row in self._read_chunk(month, chunk):
+                if hex_code and row[HEX_COLUMN] != hex_code:
+                    continue
+                if hex_codes is not None and row[HEX_COLUMN] not in hex_codes:
+                    continue
+                if start_epoch is not None and row[TS_COLUMN] < start_epoch:
+                    continue
+                if end_epoch is not None and row[TS_COLUMN] > end_epoch:
+                    continue
+                if row_filter is not None and not row_filter(row):
+                    continue
+                results.append(row)
+            results.sort(key=lambda row: row[TS_COLUMN], reverse=True)
+            if limit:
+                del results[limit:]
+        return results
+
+    def stats(self) -> Dict:
+        """Row, chunk and byte counts across all cold files"""
+        rows = chunks = size = 0
+        for month in self.months():
+            index = self._load_index(month)
+            rows += sum(chunk['rows'] for chunk in index['chunks'])
+            chunks += len(index['chunks'])
+            size += os.path.getsize(self._chunks_path(month))
+        return {'months': len(self.months()), 'chunks': chunks, 'rows': rows, 'size_bytes': size}
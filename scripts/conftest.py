@@ -0,0 +1,9 @@
+import pytest
+
+from aircraft_db import AircraftDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    """An empty AircraftDatabase in a temporary directory, with its cold storage next to it"""
+    return AircraftDatabase(str(tmp_path / "aircraft_history.db"))
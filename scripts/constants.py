@@ -18,4 +18,89 @@ SQUAWK_MEANINGS = {
     "7777": "Millitary intercept",
     "0000": "discrete VFR operations",
     "1277": "Search & Rescue"
-}
\ No newline at end of file
+}
+
+# Receiver location, used for geofences and weather lookups
+HOME_LATITUDE = 40.121026
+HOME_LONGITUDE = -82.949669
+
+# Geofence definitions (radius and polygon), see geofence.py for the format
+GEOFENCE_FILE = "../geofences.json"
+
+# Weather provider: "openweathermap" or "file" (reads WEATHER_FILE)
+WEATHER_SOURCE = "openweathermap"
+WEATHER_FILE = "../weather.json"
+WEATHER_INTERVAL = 300  # seconds between fetches
+WEATHER_TTL = 900  # seconds an observation is considered current
+WEATHER_TIMEOUT = 10  # seconds per request
+WEATHER_MAX_GAP = 1800  # max seconds between a sighting and its joined observation
+
+# Default directory of the plane-alert reference CSVs and ICAO ranges, for
+# tools that run without env_vars_config (skywatch uses csv_data_base_path)
+CSV_DATA_PATH = "../csv_data"
+
+# ICAO address allocation blocks, relative to the CSV data directory
+ICAO_RANGES_FILE = "icao_ranges.csv"
+
+# Seconds without a message before an aircraft is dropped from the live tracker
+TRACKER_TIMEOUT = 60
+
+# Streaming anomaly detection (see anomaly.py). Set 'enabled' to False to turn a rule off.
+ANOMALY_WINDOW = 16  # samples kept per aircraft
+ANOMALY_COOLDOWN = 900  # seconds before the same rule can fire again for an aircraft
+ANOMALY_RULES = {
+    'rapid_descent': {
+        'enabled': True,
+        'descent_rate_fpm': 5000,
+        'min_samples': 3
+    },
+    'low_altitude_speed': {
+        'enabled': True,
+        'max_altitude': 10000,
+        'min_altitude': 500,
+        'max_speed_kts': 250,
+        'min_samples': 3
+    },
+    'orbit': {
+        'enabled': True,
+        'min_turn_degrees': 360,
+        'max_radius_km': 5
+    },
+    'transponder_dropout': {
+        'enabled': True,
+        'gap_seconds': 120,
+        'min_altitude': 3000
+    }
+}
+
+# Local read-only HTTP/JSON API (see api.py)
+API_ENABLED = True
+API_HOST = "127.0.0.1"  # Only reachable from this machine
+API_PORT = 8080
+API_POOL_SIZE = 4  # Read-only SQLite connections
+API_CACHE_SIZE = 256  # Cached responses
+API_CACHE_TTL = 5  # Seconds a cached response is served
+API_LOG_FILE = "api.log"  # The API process logs separately from skywatch.log
+API_NICE = 10  # Lower scheduling priority of the API process so ingest wins on small boxes
+
+# Poll loop timing and on-demand profiling (see profiling.py)
+SLOW_CYCLE_SECONDS = 10  # Cycles slower than this are logged with a per-stage breakdown
+PROFILE_CYCLES = 5  # Cycles profiled after SIGUSR1
+PROFILE_DIR = "../profiles"
+
+# Sightings older than this move from the live table to the archive table in the daily cleanup
+ARCHIVE_DAYS = 30
+
+# Cold tier for archived sightings (see cold_storage.py), kept next to the database file
+COLD_STORAGE_DIRNAME = "cold"
+COLD_STORAGE_AFTER_DAYS = 90  # Archived months ending more than this long ago move to cold files
+COLD_STORAGE_COMPRESSION = "lzma"  # or "gzip": faster, larger
+COLD_CHUNK_ROWS = 10000  # Rows per independently compressed chunk
+COLD_BLOOM_FALSE_POSITIVE = 0.01  # Per-chunk hex code Bloom filter false positive rate
+
+# Kinematic pass prediction (see trajectory.py), name -> (latitude, longitude)
+PREDICTION_LOCATIONS = {
+    "Home": (HOME_LATITUDE, HOME_LONGITUDE)
+}
+PREDICTION_RADIUS_KM = 5  # Closest approach within this counts as passing over a location
+PREDICTION_HORIZON = 1800  # Seconds ahead an inbound aircraft is reported
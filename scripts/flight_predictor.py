@@ -4,6 +4,8 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from aircraft_db import AircraftDatabase
+from weather import WeatherTimeIndex
+from constants import WEATHER_MAX_GAP
 import joblib
 import datetime
 import pytz
@@ -22,21 +24,18 @@ class FlightPredictor:
         sightings = self.db.get_sightings(limit=10000)  # Adjust limit as needed
         weather_data = self._get_weather_data()
         
-        # Convert to DataFrames
-        df_sightings = pd.DataFrame(sightings)
-        df_weather = pd.DataFrame(weather_data)
+        # Convert to DataFrame sorted by time
+        df = pd.DataFrame(sightings)
+        if df.empty:
+            return np.array([]), np.array([])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True, format='ISO8601')
+        df = df.sort_values('timestamp').reset_index(drop=True)
         
-        # Convert timestamps to datetime
-        df_sightings['timestamp'] = pd.to_datetime(df_sightings['timestamp'])
-        df_weather['timestamp'] = pd.to_datetime(df_weather['timestamp'])
-        
-        # Merge weather data with sightings
-        df = pd.merge_asof(
-            df_sightings.sort_values('timestamp'),
-            df_weather.sort_values('timestamp'),
-            on='timestamp',
-            direction='nearest'
-        )
+        # Join each sighting to the nearest weather observation in time
+        weather_index = WeatherTimeIndex.from_records(weather_data)
+        epochs = (df['timestamp'] - pd.Timestamp(0, tz='UTC')).dt.total_seconds()
+        for field, values in weather_index.nearest_many(epochs, max_gap=WEATHER_MAX_GAP).items():
+            df[field] = values
         
         # Calculate features
         features = []
@@ -52,6 +51,10 @@ class FlightPredictor:
             for i in range(1, len(hex_data)):
                 prev_row = hex_data.iloc[i-1]
                 curr_row = hex_data.iloc[i]
+
+                # Skip sightings without a weather observation close enough in time
+                if pd.isna(prev_row['temperature']):
+                    continue
                 
                 time_diff = (curr_row['timestamp'] - prev_row['timestamp']).total_seconds() / 3600  # hours
                 speed_diff = curr_row['ground_speed'] - prev_row['ground_speed']
@@ -75,9 +78,7 @@ class FlightPredictor:
     
     def _get_weather_data(self) -> List[Dict]:
         """Get historical weather data from database"""
-        # This would be implemented based on your database structure
-        # For now, returning empty list as placeholder
-        return []
+        return self.db.get_weather()
     
     def train(self):
         """Train the prediction model"""
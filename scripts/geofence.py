@@ -0,0 +1,166 @@
+import json
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from constants import GEOFENCE_FILE
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.195
+
+# Size of a grid cell used to prefilter geofences, in degrees
+GRID_CELL_DEG = 0.25
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometers"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def radius_bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Return (min_lat, max_lat, min_lon, max_lon) enclosing a circle of radius_km"""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    # Guard against the poles where a degree of longitude shrinks to nothing
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    dlon = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+    return latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon
+
+
+class Geofence(ABC):
+    """Base class for a named area that aircraft positions are tested against"""
+
+    kind = None
+
+    def __init__(self, name: str, bbox: Tuple[float, float, float, float]):
+        self.name = name
+        self.bbox = bbox
+
+    def in_bbox(self, latitude: float, longitude: float) -> bool:
+        min_lat, max_lat, min_lon, max_lon = self.bbox
+        return min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon
+
+    @abstractmethod
+    def contains(self, latitude: float, longitude: float) -> bool:
+        """Whether the position lies inside the area"""
+
+    @abstractmethod
+    def describe(self) -> str:
+        """Short human readable summary of the area"""
+
+
+class RadiusGeofence(Geofence):
+    """Circle of radius_km around a point"""
+
+    kind = "radius"
+
+    def __init__(self, name: str, latitude: float, longitude: float, radius_km: float):
+        super().__init__(name, radius_bounding_box(latitude, longitude, radius_km))
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius_km = radius_km
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        return haversine_km(self.latitude, self.longitude, latitude, longitude) <= self.radius_km
+
+    def describe(self) -> str:
+        return f"{self.name} ({self.radius_km} km radius)"
+
+
+class PolygonGeofence(Geofence):
+    """Polygon given as a list of (latitude, longitude) vertices"""
+
+    kind = "polygon"
+
+    def __init__(self, name: str, points: List[Tuple[float, float]]):
+        if len(points) < 3:
+            raise ValueError(f"Polygon geofence '{name}' needs at least 3 points")
+        lats = [p[0] for p in points]
+        lons = [p[1] for p in points]
+        super().__init__(name, (min(lats), max(lats), min(lons), max(lons)))
+        self.points = [(float(lat), float(lon)) for lat, lon in points]
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        # Ray casting; geofences are small enough to treat lat/lon as planar
+        inside = False
+        points = self.points
+        j = len(points) - 1
+        for i in range(len(points)):
+            lat_i, lon_i = points[i]
+            lat_j, lon_j = points[j]
+            if (lat_i > latitude) != (lat_j > latitude):
+                crossing = lon_i + (latitude - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+                if longitude < crossing:
+                    inside = not inside
+            j = i
+        return inside
+
+    def describe(self) -> str:
+        return f"{self.name} (polygon)"
+
+
+class GeofenceIndex:
+    """
+    Uniform lat/lon grid over geofence bounding boxes.
+
+    Each cell lists the geofences whose bounding box overlaps it, so testing a
+    position is a dict lookup plus an exact check against the few candidates.
+    """
+
+    def __init__(self, geofences: List[Geofence], cell_deg: float = GRID_CELL_DEG):
+        self.geofences = geofences
+        self.cell_deg = cell_deg
+        self._grid: Dict[Tuple[int, int], List[Geofence]] = {}
+
+        for geofence in geofences:
+            min_lat, max_lat, min_lon, max_lon = geofence.bbox
+            for row in range(self._cell(min_lat), self._cell(max_lat) + 1):
+                for col in range(self._cell(min_lon), self._cell(max_lon) + 1):
+                    self._grid.setdefault((row, col), []).append(geofence)
+
+    def __len__(self):
+        return len(self.geofences)
+
+    def _cell(self, value: float) -> int:
+        return math.floor(value / self.cell_deg)
+
+    def candidates(self, latitude: float, longitude: float) -> List[Geofence]:
+        """Geofences whose grid cells cover the position"""
+        return self._grid.get((self._cell(latitude), self._cell(longitude)), [])
+
+    def match(self, latitude: Optional[float], longitude: Optional[float]) -> List[Geofence]:
+        """Return every geofence containing the position"""
+        if latitude is None or longitude is None:
+            return []
+        return [
+            geofence for geofence in self.candidates(latitude, longitude)
+            if geofence.in_bbox(latitude, longitude) and geofence.contains(latitude, longitude)
+        ]
+
+
+def parse_geofence(entry: Dict) -> Geofence:
+    kind = entry.get('type', 'radius')
+    if kind == 'radius':
+        return RadiusGeofence(
+            entry['name'],
+            float(entry['latitude']),
+            float(entry['longitude']),
+            float(entry['radius_km'])
+        )
+    if kind == 'polygon':
+        return PolygonGeofence(entry['name'], entry['points'])
+    raise ValueError(f"Unknown geofence type '{kind}' for '{entry.get('name')}'")
+
+
+def load_geofences(filename: str = GEOFENCE_FILE) -> GeofenceIndex:
+    """Load geofence definitions from a JSON file into a GeofenceIndex"""
+    try:
+        with open(filename, "r") as file:
+            entries = json.load(file)
+    except FileNotFoundError:
+        entries = []
+    return GeofenceIndex([parse_geofence(entry) for entry in entries])
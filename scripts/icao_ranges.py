@@ -0,0 +1,113 @@
+import csv
+import bisect
+import numpy as np
+from typing import Iterable, List, Optional, Tuple
+
+ICAO_RANGES_FILENAME = "icao_ranges.csv"
+
+
+def parse_hex(hex_code) -> int:
+    """Parse a hex code into a 24-bit address, -1 if it is not one (e.g. '~' TIS-B codes)"""
+    try:
+        address = int(str(hex_code).strip(), 16)
+    except ValueError:
+        return -1
+    return address if 0 <= address <= 0xFFFFFF else -1
+
+
+class IcaoRangeIndex:
+    """
+    Sorted, non-overlapping address intervals for binary-search lookup.
+
+    Input ranges may nest (a military sub-block inside a country block). They
+    are flattened once at load time so that each address maps to the label of
+    the narrowest range containing it.
+    """
+
+    def __init__(self, ranges: Iterable[Tuple[int, int, str]]):
+        ranges = list(ranges)
+        boundaries = sorted({start for start, _, _ in ranges} | {end + 1 for _, end, _ in ranges})
+
+        starts, ends, labels = [], [], []
+        for low, high in zip(boundaries, boundaries[1:]):
+            covering = [r for r in ranges if r[0] <= low and high - 1 <= r[1]]
+            if not covering:
+                continue
+            label = min(covering, key=lambda r: r[1] - r[0])[2]
+            # Merge with the previous segment when it continues the same label
+            if ends and ends[-1] == low - 1 and labels[-1] == label:
+                ends[-1] = high - 1
+            else:
+                starts.append(low)
+                ends.append(high - 1)
+                labels.append(label)
+
+        self.starts = starts
+        self.ends = ends
+        self.labels = labels
+        self._starts_array = np.array(starts, dtype=np.int64)
+        self._ends_array = np.array(ends, dtype=np.int64)
+        self._labels_array = np.array(labels + [None], dtype=object)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def lookup(self, hex_code) -> Optional[str]:
+        """Label of the range containing hex_code, or None"""
+        address = parse_hex(hex_code)
+        if address < 0:
+            return None
+        position = bisect.bisect_right(self.starts, address) - 1
+        if position >= 0 and address <= self.ends[position]:
+            return self.labels[position]
+        return None
+
+    def lookup_many(self, hex_codes: Iterable) -> np.ndarray:
+        """Vectorized lookup; returns an object array of labels (None where unmatched)"""
+        addresses = np.array([parse_hex(hex_code) for hex_code in hex_codes], dtype=np.int64)
+        if len(self.starts) == 0:
+            return np.full(len(addresses), None, dtype=object)
+
+        positions = np.searchsorted(self._starts_array, addresses, side='right') - 1
+        clipped = np.clip(positions, 0, None)
+        matched = (positions >= 0) & (addresses >= 0) & (addresses <= self._ends_array[clipped])
+        # Unmatched rows point at the trailing None label
+        return self._labels_array[np.where(matched, clipped, len(self.starts))]
+
+
+class IcaoRegistry:
+    """Country and military classification of ICAO addresses"""
+
+    def __init__(self, country_ranges: List[Tuple[int, int, str]],
+                 military_ranges: List[Tuple[int, int, str]]):
+        self.countries = IcaoRangeIndex(country_ranges)
+        self.military = IcaoRangeIndex(military_ranges)
+
+    def classify(self, hex_code) -> Tuple[Optional[str], bool]:
+        """Return (country, is_military) for one hex code"""
+        return self.countries.lookup(hex_code), self.military.lookup(hex_code) is not None
+
+    def classify_many(self, hex_codes: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (countries, is_military) arrays aligned with hex_codes"""
+        hex_codes = list(hex_codes)
+        countries = self.countries.lookup_many(hex_codes)
+        military = np.not_equal(self.military.lookup_many(hex_codes), None).astype(bool)
+        return countries, military
+
+
+def load_icao_registry(filename: str) -> IcaoRegistry:
+    """
+    Load address allocations from a CSV with start,end,country,military columns.
+    Addresses are hex; lines starting with '#' are comments.
+    """
+    country_ranges = []
+    military_ranges = []
+    with open(filename, "r") as file:
+        reader = csv.DictReader(line for line in file if not line.startswith('#'))
+        for row in reader:
+            entry = (int(row['start'], 16), int(row['end'], 16), row['country'])
+            if row.get('military', '0').strip() == '1':
+                military_ranges.append(entry)
+            else:
+                country_ranges.append(entry)
+    return IcaoRegistry(country_ranges, military_ranges)
@@ -0,0 +1,155 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import numpy as np
+
+from aircraft_db import AircraftDatabase
+from api import ApiServer
+from bench_anomaly import synthetic_cycles
+from tracker import AircraftTracker
+
+
+class Poller(threading.Thread):
+    """Replays synthetic traffic into the database the way skywatch.py's loop does"""
+
+    def __init__(self, db, tracker, api_server, num_aircraft, interval):
+        super().__init__(name='poller', daemon=True)
+        self.db = db
+        self.tracker = tracker
+        self.api_server = api_server
+        self.cycles = synthetic_cycles(num_aircraft, 10 ** 6)
+        self.interval = interval
+        self.cycle_times = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        for now, aircraft_data in self.cycles:
+            if self.stopped.is_set():
+                return
+            started = time.perf_counter()
+            events = self.tracker.update(aircraft_data, now=now)
+            self.api_server.publish_live(self.tracker)
+            for state, changed in events.received():
+                self.db.record_sighting(state.aircraft)
+            elapsed = time.perf_counter() - started
+            self.cycle_times.append(elapsed * 1000)
+            self.stopped.wait(max(0, self.interval - elapsed))
+
+    def take_cycle_times(self):
+        times, self.cycle_times = self.cycle_times, []
+        return np.array(times)
+
+
+def lower_priority():
+    # Clients stand in for dashboards on other machines, not for competing local work
+    os.nice(19)
+
+
+def client(args):
+    """Request random endpoints until the deadline; returns (latencies ms, status counts)"""
+    base_url, hex_codes, deadline, seed = args
+    rng = random.Random(seed)
+    paths = [
+        lambda: "/api/sightings?minutes=60&limit=100",
+        lambda: "/api/live",
+        lambda: "/api/stats",
+        lambda: f"/api/aircraft/{rng.choice(hex_codes)}?limit=50",
+    ]
+    etags = {}
+    latencies = []
+    statuses = {}
+    while time.time() < deadline:
+        path = rng.choice(paths)()
+        request = urllib.request.Request(base_url + path)
+        # Half the requests revalidate, like a browser with a warm cache
+        if path in etags and rng.random() < 0.5:
+            request.add_header('If-None-Match', etags[path])
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                status = response.status
+                etags[path] = response.headers.get('ETag')
+        except urllib.error.HTTPError as e:
+            status = e.code
+        latencies.append((time.perf_counter() - started) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+    return latencies, statuses
+
+
+def describe(label, values):
+    if len(values) == 0:
+        return f"{label}: no samples"
+    return (f"{label}: p50 {np.percentile(values, 50):.1f} ms, p95 {np.percentile(values, 95):.1f} ms, "
+            f"max {np.max(values):.1f} ms ({len(values)} samples)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the read-only API while the poller is ingesting')
+    parser.add_argument('--db', help='Database to copy for the test (default: start empty)')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent client processes')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds of load')
+    parser.add_argument('--aircraft', type=int, default=200, help='Aircraft per poll cycle')
+    parser.add_argument('--interval', type=float, default=2, help='Seconds between poll cycles')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logger = logging.getLogger('skywatch.api')
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, 'aircraft_history.db')
+    if args.db:
+        shutil.copy(args.db, db_path)
+
+    db = AircraftDatabase(db_path)
+    tracker = AircraftTracker()
+    api_server = ApiServer(logger, db_path, port=0, log_file=os.path.join(workdir, 'api.log'))
+    api_server.start()
+    base_url = f"http://127.0.0.1:{api_server.port}"
+
+    poller = Poller(db, tracker, api_server, args.aircraft, args.interval)
+    poller.start()
+    try:
+        # Baseline ingest timing with no API traffic
+        time.sleep(args.duration / 2)
+        baseline = poller.take_cycle_times()
+
+        hex_codes = [state.hex_code for state in tracker.currently_tracking()] or ['000000']
+        deadline = time.time() + args.duration
+        with multiprocessing.Pool(args.clients, initializer=lower_priority) as pool:
+            results = pool.map(client, [(base_url, hex_codes, deadline, seed) for seed in range(args.clients)])
+        loaded = poller.take_cycle_times()
+        with urllib.request.urlopen(base_url + "/api/stats") as response:
+            stats = json.load(response)
+    finally:
+        poller.stopped.set()
+        poller.join()
+        api_server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies = np.concatenate([np.array(latency) for latency, _ in results])
+    statuses = {}
+    for _, counts in results:
+        for status, count in counts.items():
+            statuses[status] = statuses.get(status, 0) + count
+
+    print(f"Requests: {len(latencies)} in {args.duration:.0f}s with {args.clients} clients "
+          f"= {len(latencies) / args.duration:.0f} requests/sec")
+    print(f"Status codes: {dict(sorted(statuses.items()))}")
+    print(f"Cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses")
+    print(describe("Request latency", latencies))
+    print(describe("Ingest cycle, no API load", baseline))
+    print(describe("Ingest cycle, under API load", loaded))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,151 @@
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from collections import deque
 
+LOG_FILE = 'skywatch.log'
+LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotate the log file at 10 MB
+LOG_BACKUP_COUNT = 5
+TAIL_BUFFER_SIZE = 500  # Log records kept in memory for emails
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
+# Attributes every LogRecord has; anything else was passed via `extra`
+_STANDARD_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_listener = None
+_tail_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects, including any `extra` fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class TracebackQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps tracebacks as structured fields.
+
+    The stock prepare() folds the traceback into the message and drops
+    exc_info, so the listener's JsonFormatter could never write it. Here the
+    traceback is rendered to exc_text (exc_info can't cross the queue) and the
+    message is left as just the message.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Keep the most recent log lines in memory.
+
+    Records are formatted as they are emitted, so a line shows the arguments
+    as they were when it was logged even if those objects change later.
+    """
+
+    def __init__(self, capacity=TAIL_BUFFER_SIZE):
+        super().__init__()
+        self.lines = deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    def emit(self, record):
+        try:
+            self.lines.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    def get_lines(self, num_lines=10):
+        return list(self.lines)[-num_lines:]
+
+
+def setup_logging(name='skywatch', log_file=LOG_FILE, level=logging.INFO,
+                  max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT,
+                  tail_size=TAIL_BUFFER_SIZE):
+    """
+    Route all logging through a queue so file I/O happens on a listener thread.
+
+    The listener writes JSON lines to a size-rotated log file, and a ring
+    buffer of recent records is kept for get_last_log_lines().
+    """
+    global _listener, _tail_handler
+
+    if _listener is not None:
+        return logging.getLogger(name)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _tail_handler = RingBufferHandler(tail_size)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(TracebackQueueHandler(log_queue))
+    root.addHandler(_tail_handler)
+
+    _listener.start()
+    return logging.getLogger(name)
+
+
+def stop_logging():
+    """Flush queued records to disk and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_last_log_lines(log_file=LOG_FILE, num_lines=10):
+    """Get the last N log lines, from memory if setup_logging() was used"""
+    if _tail_handler is not None:
+        return '\n'.join(_tail_handler.get_lines(num_lines))
 
-def get_last_log_lines(log_file, num_lines=10):
-    """Get the last N lines from a log file"""
     try:
-        # Method that works for both small and large files
-        with open(log_file, 'r') as file:
-            # Use a deque with maxlen to efficiently get the last N lines
-            from collections import deque
-            last_lines = deque(maxlen=num_lines)
-            
-            for line in file:
-                last_lines.append(line.strip())
-            
-            return '\n'.join(last_lines)
+        # Read backwards from the end of the file in blocks until we have enough lines
+        with open(log_file, 'rb') as file:
+            file.seek(0, os.SEEK_END)
+            position = file.tell()
+            data = b''
+            while position > 0 and data.count(b'\n') <= num_lines:
+                read_size = min(8192, position)
+                position -= read_size
+                file.seek(position)
+                data = file.read(read_size) + data
+
+        lines = data.decode('utf-8', errors='replace').splitlines()
+        return '\n'.join(line.strip() for line in lines[-num_lines:])
     except Exception as e:
-        return f"Error reading log file: {str(e)}"
\ No newline at end of file
+        return f"Error reading log file: {str(e)}"
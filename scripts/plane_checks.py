@@ -2,7 +2,14 @@ import fnmatch
 from constants import MILITARY_CALLSIGNS, SQUAWK_MEANINGS
 from alerting import create_alert_message, send_email_alert
 from util import load_watchlist
-def check_possible_military_plane(flight, logger, hex_code, aircraft, squawk, csv_data):
+from env_vars_config import gatewayAddress
+def check_possible_military_plane(flight, logger, hex_code, aircraft, squawk, csv_data, military_block=False, country=None,
+                                  inbound=None):
+    """
+    Log aircraft with a military callsign prefix or a hex code inside a
+    military ICAO address block. inbound is an optional pass prediction
+    line for the message.
+    """
     for mil_callsign in MILITARY_CALLSIGNS:
         if flight.startswith(mil_callsign):
             logMessage = create_alert_message(
@@ -10,10 +17,22 @@ def check_possible_military_plane(flight, logger, hex_code, aircraft, squawk, cs
                 aircraft, 
                 "Military Callsign", 
                 f"Squawk: {squawk}", 
-                csv_data.get(hex_code)
+                csv_data.get(hex_code),
+                inbound
             )
             logger.info(f"Possible military callsign detected: {logMessage}")
-            break
+            return
+
+    if military_block:
+        logMessage = create_alert_message(
+            hex_code,
+            aircraft,
+            "Military Address Block",
+            f"Country: {country or 'Unknown'}\nSquawk: {squawk}",
+            csv_data.get(hex_code),
+            inbound
+        )
+        logger.info(f"Military ICAO address detected: {logMessage}")
 
 def check_squak(logger, hex_code, aircraft, squawk, csv_data):
     if squawk in SQUAWK_MEANINGS:
@@ -29,7 +48,7 @@ def check_squak(logger, hex_code, aircraft, squawk, csv_data):
         )
         send_email_alert(gatewayAddress, "SQUAWK ALERT!", message)
 
-def check_watchlist(flight,csv_data, hex_code, aircraft):
+def check_watchlist(flight,csv_data, hex_code, aircraft, inbound=None):
     watchlist = load_watchlist()
     for entry in watchlist:
         if entry.endswith('*'):
@@ -40,7 +59,8 @@ def check_watchlist(flight,csv_data, hex_code, aircraft):
                     aircraft, 
                     "Watchlist", 
                     f"Label: {watchlist[entry]}", 
-                    context
+                    context,
+                    inbound
                 )
                 send_email_alert(gatewayAddress, "Watchlist Match", message)
         elif hex_code == entry or flight == entry:
@@ -50,6 +70,63 @@ def check_watchlist(flight,csv_data, hex_code, aircraft):
                 aircraft, 
                 "Watchlist", 
                 f"Label: {watchlist[entry]}", 
-                context
+                context,
+                inbound
             )
-            send_email_alert(gatewayAddress, "Hex Match",message)
\ No newline at end of file
+            send_email_alert(gatewayAddress, "Hex Match",message)
+
+def check_geofences(logger, geofence_index, hex_code, aircraft, csv_data, active_geofences):
+    """
+    Alert when an aircraft enters a geofence.
+
+    active_geofences maps hex code -> names of geofences the aircraft was inside
+    on the previous cycle, so an alert is only sent on entry.
+    """
+    matches = geofence_index.match(aircraft.get('lat'), aircraft.get('lon'))
+    previous = active_geofences.get(hex_code, set())
+    current = {geofence.name for geofence in matches}
+
+    for geofence in matches:
+        if geofence.name in previous:
+            continue
+        message = create_alert_message(
+            hex_code,
+            aircraft,
+            "Geofence",
+            f"Geofence: {geofence.describe()}",
+            csv_data.get(hex_code)
+        )
+        logger.info(f"Geofence entry detected: {message}")
+        send_email_alert(gatewayAddress, "Geofence Alert", message)
+
+    if current:
+        active_geofences[hex_code] = current
+    else:
+        active_geofences.pop(hex_code, None)
+
+def check_anomalies(logger, anomalies, tracker, csv_data):
+    """
+    Alert on anomalies raised by the AnomalyDetector this cycle.
+
+    Dropouts fire after the aircraft may have left the tracker, so the last
+    values held by the detector are used when there is no live state.
+    """
+    rule_labels = {
+        'rapid_descent': "Rapid Descent",
+        'low_altitude_speed': "Low Altitude Speed",
+        'orbit': "Orbit",
+        'transponder_dropout': "Transponder Dropout"
+    }
+    for anomaly in anomalies:
+        state = tracker.get(anomaly.hex_code)
+        aircraft = state.aircraft if state is not None and state.aircraft else anomaly.as_aircraft()
+        label = rule_labels.get(anomaly.rule, anomaly.rule)
+        message = create_alert_message(
+            anomaly.hex_code,
+            aircraft,
+            "Anomaly",
+            f"{label}: {anomaly.detail}",
+            csv_data.get(anomaly.hex_code)
+        )
+        logger.info(f"Anomaly detected: {message}")
+        send_email_alert(gatewayAddress, "Anomaly Alert", message)
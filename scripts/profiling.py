@@ -0,0 +1,163 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from constants import SLOW_CYCLE_SECONDS, PROFILE_CYCLES, PROFILE_DIR
+
+# Timer of the cycle in progress, so code outside the loop (e.g. SMTP) can add spans
+_current_timer = None
+
+
+class _Span:
+    __slots__ = ('timer', 'name', 'started', 'children')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.children = 0.0
+        self.started = time.perf_counter()
+        self.timer._stack.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        stack = self.timer._stack
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+        # Exclusive time, so nested stages aren't counted twice
+        stages = self.timer.stages
+        stages[self.name] = stages.get(self.name, 0.0) + elapsed - self.children
+        return False
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str):
+    """Time a block as stage `name` of the current cycle; does nothing outside a cycle"""
+    if _current_timer is None:
+        return _NULL_SPAN
+    return _Span(_current_timer, name)
+
+
+class CycleTimer:
+    """
+    Per-stage timing for one poll cycle.
+
+    Stage times are exclusive of nested spans and accumulate when a stage is
+    entered many times (e.g. once per aircraft). Cycles slower than
+    slow_threshold are logged at WARNING with the stage breakdown.
+    """
+
+    def __init__(self, logger, slow_threshold: float = SLOW_CYCLE_SECONDS):
+        self.logger = logger
+        self.slow_threshold = slow_threshold
+        self.stages: Dict[str, float] = {}
+        self._stack: List[_Span] = []
+        self._started = None
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def begin(self):
+        global _current_timer
+        self.stages = {}
+        self._stack = []
+        self._started = time.perf_counter()
+        _current_timer = self
+
+    def end(self) -> float:
+        """Finish the cycle, log it if it was slow and return its duration in seconds"""
+        global _current_timer
+        _current_timer = None
+        total = time.perf_counter() - self._started
+        accounted = sum(self.stages.values())
+        self.stages['other'] = max(0.0, total - accounted)
+
+        breakdown = ', '.join(
+            f"{name} {seconds:.2f}s"
+            for name, seconds in sorted(self.stages.items(), key=lambda item: -item[1])
+        )
+        if total >= self.slow_threshold:
+            self.logger.warning(
+                "Slow cycle: %.2fs (%s)", total, breakdown,
+                extra={'cycle_seconds': round(total, 3),
+                       'stages': {name: round(seconds, 3) for name, seconds in self.stages.items()}}
+            )
+        else:
+            self.logger.debug("Cycle took %.2fs (%s)", total, breakdown)
+        return total
+
+
+class CycleProfiler:
+    """
+    cProfile the next N poll cycles on request (e.g. from a SIGUSR1 handler).
+
+    request() only sets a flag, so it is safe to call from a signal handler;
+    profiling starts at the next begin_cycle(). After N cycles the stats are
+    written to output_dir as a .prof file (for pstats/snakeviz) and a text
+    summary, and profiling turns itself off.
+    """
+
+    def __init__(self, logger, cycles: int = PROFILE_CYCLES, output_dir: str = PROFILE_DIR):
+        self.logger = logger
+        self.cycles = cycles
+        self.output_dir = output_dir
+        self._requested = False
+        self._profile: Optional[cProfile.Profile] = None
+        self._remaining = 0
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+
+    def request(self, *signal_args):
+        self._requested = True
+
+    def begin_cycle(self):
+        if self._requested and self._profile is None:
+            self._requested = False
+            self._remaining = self.cycles
+            self._profile = cProfile.Profile()
+            self.logger.info(f"Profiling the next {self.cycles} cycles")
+        if self._profile is not None:
+            self._profile.enable()
+
+    def end_cycle(self):
+        if self._profile is None:
+            return
+        self._profile.disable()
+        self._remaining -= 1
+        if self._remaining <= 0:
+            profile, self._profile = self._profile, None
+            self._dump(profile)
+
+    def _dump(self, profile: cProfile.Profile):
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            base = os.path.join(self.output_dir, f"skywatch-{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+            profile.dump_stats(f"{base}.prof")
+
+            summary = io.StringIO()
+            stats = pstats.Stats(profile, stream=summary)
+            stats.sort_stats('cumulative').print_stats(50)
+            with open(f"{base}.txt", "w") as file:
+                file.write(summary.getvalue())
+            self.logger.info(f"Profile of {self.cycles} cycles written to {base}.prof and {base}.txt")
+        except OSError as e:
+            self.logger.error(f"Failed to write profile: {str(e)}")
@@ -0,0 +1,29 @@
+import csv
+from typing import Dict
+
+from constants import CSV_DATA_PATH
+
+REFERENCE_CSV_FILES = [
+    "plane-alert-civ-images.csv",
+    "plane-alert-mil-images.csv",
+    "plane-alert-gov-images.csv"
+]
+
+
+def load_csv_data(filename: str) -> Dict[str, Dict]:
+    """Rows of one plane-alert CSV keyed by their $ICAO hex code"""
+    csv_data = {}
+    with open(filename, "r") as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            hex_code = row['$ICAO']
+            csv_data[hex_code] = row
+    return csv_data
+
+
+def load_reference_csv_data(base_path: str = CSV_DATA_PATH) -> Dict[str, Dict]:
+    """Load all plane-alert reference CSVs into one dict keyed by hex code"""
+    csv_data = {}
+    for filename in REFERENCE_CSV_FILES:
+        csv_data.update(load_csv_data(f"{base_path}/{filename}"))
+    return csv_data
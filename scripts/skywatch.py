@@ -12,25 +12,39 @@ from datetime import datetime, timedelta
 from collections import deque
 from env_vars_config import senderEmail, gatewayAddress, appKey, healthCheckEmail, openWeatherApiKey, csv_data_base_path
 from aircraft_db import AircraftDatabase
-from constants import MILITARY_CALLSIGNS, SQUAWK_MEANINGS
+from constants import (
+    MILITARY_CALLSIGNS, SQUAWK_MEANINGS, HOME_LATITUDE, HOME_LONGITUDE,
+    WEATHER_SOURCE, WEATHER_FILE, WEATHER_INTERVAL, WEATHER_TTL, WEATHER_TIMEOUT,
+    ICAO_RANGES_FILE, TRACKER_TIMEOUT, API_ENABLED
+)
+from anomaly import AnomalyDetector
+from trajectory import TrajectoryPredictor
+from api import ApiServer
+from profiling import CycleTimer, CycleProfiler
+from tracker import AircraftTracker
+from icao_ranges import load_icao_registry
+from weather import WeatherProvider, create_weather_source
 from alerting import send_health_check, send_email_alert
-from util import load_watchlist, get_aircraft_data, get_weather_data, load_csv_data, clean_shutdown, clean_up_db
-from plane_checks import check_possible_military_plane, check_squak, check_watchlist
-from logging_util import get_last_log_lines
+from util import load_watchlist, get_aircraft_data, clean_shutdown, clean_up_db
+from reference_data import load_reference_csv_data
+from plane_checks import check_possible_military_plane, check_squak, check_watchlist, check_geofences, check_anomalies
+from geofence import load_geofences
+from logging_util import setup_logging, stop_logging, get_last_log_lines
 program_start_time = None
 
+# Set by main() when the API is enabled, so the exit handler can stop it
+api_server = None
+
 LAST_SENT_HEALTH_CHECK = 0
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='skywatch.log'
-)
+# Configured by main(); the API process imports this module when it is spawned
 logger = logging.getLogger('skywatch')
 
 
 def main():
+    setup_logging('skywatch', 'skywatch.log', level=logging.INFO)
+
     # Log program start
     logger.info(f"SkyWatch program started on PID : {os.getpid()} and process {psutil.Process(os.getpid())}")
     global program_start_time
@@ -40,79 +54,181 @@ def main():
     signal.signal(signal.SIGINT, handle_exit_signal)
     signal.signal(signal.SIGTERM, handle_exit_signal)
 
+    # Per-stage cycle timing, and `kill -USR1 <pid>` to cProfile the next few cycles
+    cycle_timer = CycleTimer(logger)
+    profiler = CycleProfiler(logger)
+    signal.signal(signal.SIGUSR1, profiler.request)
+
 
-    csv_files = [f"{csv_data_base_path}/plane-alert-civ-images.csv", f"{csv_data_base_path}/plane-alert-mil-images.csv", f"{csv_data_base_path}/plane-alert-gov-images.csv"]
-    csv_data = {}
-    
     # Initialize the database
     db = AircraftDatabase()
     
     # Track last cleanup time
     LAST_CLEANUP = int(time.time())
     CLEANUP_INTERVAL = 86400  # 24 hours in seconds
-    ARCHIVE_DAYS = 30  # Archive records older than 30 days
 
     # Initialize LAST_SENT_HEALTH_CHECK to trigger immediate health check
     global LAST_SENT_HEALTH_CHECK
     # Setting to 0 ensures the health check condition will be true immediately
     LAST_SENT_HEALTH_CHECK = 0  
 
-    for filename in csv_files:
-        csv_data.update(load_csv_data(filename))
+    csv_data = load_reference_csv_data(csv_data_base_path)
 
-    
+    # Country / military classification by ICAO address block, for every aircraft
+    icao_registry = load_icao_registry(f"{csv_data_base_path}/{ICAO_RANGES_FILE}")
+
+    # Geofences and the hex -> geofence names each aircraft is currently inside
+    geofence_index = load_geofences()
+    active_geofences = {}
+    logger.info(f"Loaded {len(geofence_index)} geofences")
+
+    # Weather is fetched on its own thread so a slow API never stalls the loop
+    weather_provider = WeatherProvider(
+        build_weather_source(),
+        logger,
+        interval=WEATHER_INTERVAL,
+        ttl=WEATHER_TTL
+    )
+    weather_provider.start()
+
+    # Aircraft currently in coverage; each cycle is diffed against it
+    tracker = AircraftTracker(timeout=TRACKER_TIMEOUT)
+
+    # Rolling-window anomaly rules, fed with every position/altitude update
+    anomaly_detector = AnomalyDetector()
+
+    # Closest approach/ETA of every tracked aircraft to PREDICTION_LOCATIONS
+    trajectory_predictor = TrajectoryPredictor()
+
+    # Read-only HTTP API in its own process, so clients never hold up ingest
+    global api_server
+    if API_ENABLED:
+        api_server = ApiServer(logger, db.db_path)
+        try:
+            api_server.start()
+        except OSError as e:
+            logger.error(f"Failed to start API server: {str(e)}")
+            api_server = None
     
     # Send startup health check
-    send_health_check(logger,db, "SkyWatch Program Started", include_startup_info=True)
+    send_health_check(logger,db, "SkyWatch Program Started", include_startup_info=True, tracker=tracker,
+                      weather=weather_provider.latest())
 
     while True:
         logger.debug("Main loop running...")
         current_time = int(time.time())
+        profiler.begin_cycle()
+        cycle_timer.begin()
         
         # Rest of your code...
         
         # Run cleanup and archiving every 24 hours
         if current_time > (LAST_CLEANUP + CLEANUP_INTERVAL):
-            clean_up_db(logger, db)
+            with cycle_timer.span('cleanup'):
+                clean_up_db(logger, db)
             LAST_CLEANUP = current_time
 
-        aircraft_data = get_aircraft_data()
+        with cycle_timer.span('fetch'):
+            aircraft_data = get_aircraft_data()
         
-        # Record weather data periodically (every 5 minutes)
-        if current_time % 300 == 0:  # Every 5 minutes
-            logger.info("Recording weather data...")
-            # Get weather data for your location (you'll need to set these coordinates)
-            weather_data = get_weather_data(40.121026, -82.949669) 
-            if weather_data:
+        # Record any weather observations fetched by the background provider
+        with cycle_timer.span('weather'):
+            for weather_data in weather_provider.take_new_observations():
+                logger.info("Recording weather data...")
                 db.record_weather(weather_data)
-        # Refactored loop
-        logger.debug(f"Currently tracking {len(aircraft_data)} aircraft. Processing aircraft data...")
-        for aircraft in aircraft_data:
-            logger.debug(f"Processing aircraft: {aircraft}")
-            hex_code = aircraft['hex'].upper()
-            flight = aircraft.get('flight', '').strip().upper()
-            squawk = aircraft.get('squawk', '')
-
-            # Check for military callsign
-            check_possible_military_plane(flight, logger, hex_code, aircraft, squawk, csv_data)
+
+        with cycle_timer.span('tracker'):
+            events = tracker.update(aircraft_data, now=current_time)
+        logger.debug("Currently tracking %d aircraft (%d entered, %d updated, %d unchanged, %d left)",
+                     len(tracker), len(events.entered), len(events.updated), len(events.unchanged),
+                     len(events.left))
+
+        if api_server:
+            with cycle_timer.span('api'):
+                api_server.publish_live(tracker)
+
+        # Enrich new arrivals once; the state keeps the result while they're tracked
+        if events.entered:
+            with cycle_timer.span('enrichment'):
+                countries, military_blocks = icao_registry.classify_many(state.hex_code for state in events.entered)
+                for state, country, military_block in zip(events.entered, countries, military_blocks):
+                    state.country = country
+                    state.is_military = bool(military_block)
+                    state.context = csv_data.get(state.hex_code)
+
+        # Predict passes for the whole snapshot at once; alerts add an "inbound" line from it
+        with cycle_timer.span('prediction'):
+            predictions = trajectory_predictor.predict_states(tracker.currently_tracking(), now=current_time)
+
+        # Every aircraft received is recorded; checks only run on what changed
+        for state, changed in events.received():
+            aircraft = state.aircraft
+            logger.debug("Processing aircraft: %s", aircraft)
+            hex_code = state.hex_code
+            flight = state.flight
+            squawk = state.squawk
+
+            # Check for military callsign or address block
+            if 'flight' in changed:
+                with cycle_timer.span('plane_checks'):
+                    check_possible_military_plane(flight, logger, hex_code, aircraft, squawk, csv_data,
+                                                  military_block=state.is_military, country=state.country,
+                                                  inbound=predictions.inbound_line(hex_code))
             
             # Record the aircraft sighting
-            aircraft_record = aircraft.copy()
-            if hex_code in csv_data:
-                aircraft_record.update(csv_data[hex_code])
-            db.record_sighting(aircraft_record)
+            with cycle_timer.span('sqlite'):
+                aircraft_record = aircraft.copy()
+                if state.context:
+                    aircraft_record.update(state.context)
+                aircraft_record['country'] = state.country
+                aircraft_record['military'] = int(state.is_military)
+                db.record_sighting(aircraft_record)
+
+            with cycle_timer.span('plane_checks'):
+                if 'squawk' in changed:
+                    check_squak(logger, hex_code, aircraft, squawk, csv_data)
 
-            check_squak(logger, hex_code, aircraft, squawk, csv_data)
+                if 'flight' in changed:
+                    check_watchlist(flight,csv_data, hex_code, aircraft, inbound=predictions.inbound_line(hex_code))
 
-            check_watchlist(flight,csv_data, hex_code, aircraft)
+                if 'position' in changed:
+                    check_geofences(logger, geofence_index, hex_code, aircraft, csv_data, active_geofences)
+
+        # Evaluate anomaly rules over everything that changed this cycle
+        with cycle_timer.span('anomalies'):
+            moved = [state for state, changed in events.changes() if 'position' in changed or 'altitude' in changed]
+            anomalies = anomaly_detector.update_from_states(moved, now=current_time,
+                                                             tracked=tracker.currently_tracking())
+            if anomalies:
+                check_anomalies(logger, anomalies, tracker, csv_data)
+
+        # Forget geofence state for aircraft that are no longer being received
+        for state in events.left:
+            active_geofences.pop(state.hex_code, None)
 
         if current_time > (LAST_SENT_HEALTH_CHECK + 10800):
             logger.info("Sending health check")
-            send_health_check(logger, db)
+            with cycle_timer.span('health_check'):
+                send_health_check(logger, db, tracker=tracker, weather=weather_provider.latest())
             LAST_SENT_HEALTH_CHECK = current_time
+
+        cycle_timer.end()
+        profiler.end_cycle()
         time.sleep(30)
         # End Main Methode
 
+def build_weather_source():
+    """Create the weather source configured by WEATHER_SOURCE"""
+    if WEATHER_SOURCE == "file":
+        return create_weather_source("file", path=WEATHER_FILE)
+    return create_weather_source(
+        WEATHER_SOURCE,
+        api_key=openWeatherApiKey,
+        latitude=HOME_LATITUDE,
+        longitude=HOME_LONGITUDE,
+        timeout=WEATHER_TIMEOUT
+    )
+
 def handle_exit_signal(sig, frame):
     """Handle termination signals and log program exit information"""
     signal_names = {
@@ -129,7 +245,7 @@ def handle_exit_signal(sig, frame):
     # Log the termination
     logger.info(f"Program terminated by {signal_name}. Total uptime: {uptime}")
 
-    # Get the last 10 log lines
+    # Get the last 10 log lines from the in-memory buffer
     last_logs = get_last_log_lines('skywatch.log', 10)
     
     # Optional: Send an email notification about the termination
@@ -149,6 +265,13 @@ def handle_exit_signal(sig, frame):
         clean_shutdown(logger)
     except Exception as e:
         logger.error(f"Failed to send termination notification: {str(e)}")
+
+    # Don't leave the API process serving after we're gone
+    if api_server is not None:
+        api_server.stop()
+
+    # Flush queued log records to disk before exiting
+    stop_logging()
     
     # Exit the program
     sys.exit(0)
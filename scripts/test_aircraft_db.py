@@ -0,0 +1,230 @@
+import datetime
+import sqlite3
+
+import pytest
+import pytz
+
+from aircraft_db import LEGACY_MESSAGE_TYPES, ROLLUP_GRANULARITIES, AircraftDatabase, fts_match_query, normalize_callsign, to_epoch
+from cold_storage import month_bounds, month_key
+
+CSV_DATA = {
+    'AE0001': {'$Operator': 'United States Air Force', 'Category': 'Tanker'},
+    'AE0002': {'$Operator': 'United States Navy', 'Category': 'Patrol'},
+    'AE0003': {'$Operator': 'United States Air Force', 'Category': 'Tanker'}
+}
+
+
+def record(db, hex_code, altitude, **extra):
+    db.record_sighting({'hex': hex_code.lower(), 'flight': 'TEST1  ', 'alt_geom': altitude,
+                        'lat': 40.0, 'lon': -83.0, **CSV_DATA.get(hex_code, {}), **extra})
+
+
+def rollup_tables(db):
+    with db._connect() as conn:
+        return {table: sorted(conn.execute(f"SELECT * FROM {table}").fetchall())
+                for table in ('sighting_rollups', 'sighting_rollup_aircraft', 'sighting_rollup_groups')}
+
+
+def test_rollups_count_sightings_and_unique_aircraft(db):
+    record(db, 'AE0001', 20000)
+    record(db, 'AE0003', 25000)
+    record(db, 'AE0002', 1500)
+
+    for granularity in ('hour', 'day'):
+        (rollup,) = db.get_rollups(granularity)
+        assert rollup['sighting_count'] == 3
+        assert rollup['unique_aircraft'] == 3
+        assert (rollup['min_altitude'], rollup['max_altitude']) == (1500, 25000)
+
+    summary = db.get_rollup_summary(datetime.datetime.now(pytz.UTC) - datetime.timedelta(hours=1))
+    assert summary['sighting_count'] == 3
+    assert summary['unique_aircraft'] == 3
+    assert summary['top_operator'] == [('United States Air Force', 2), ('United States Navy', 1)]
+    assert dict(summary['top_category']) == {'Tanker': 2, 'Patrol': 1}
+
+
+def test_rebuild_rollups_matches_incremental_rollups(db):
+    record(db, 'AE0001', 20000)
+    record(db, 'AE0002', None)
+    record(db, 'AE0003', 1500)
+    incremental = rollup_tables(db)
+
+    db.rebuild_rollups(CSV_DATA)
+    assert rollup_tables(db) == incremental
+
+
+def test_get_rollups_rejects_unknown_granularity(db):
+    with pytest.raises(ValueError):
+        db.get_rollups('week')
+
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE aircraft_sightings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        hex_code TEXT NOT NULL, flight_number TEXT, altitude INTEGER, ground_speed INTEGER,
+        track REAL, operator TEXT, aircraft_type TEXT, image_url TEXT,
+        timestamp DATETIME NOT NULL, latitude REAL, longitude REAL, squawk_code TEXT,
+        UNIQUE(hex_code, timestamp)
+    );
+    CREATE TABLE archived_aircraft_sightings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        hex_code TEXT NOT NULL, flight_number TEXT, altitude INTEGER, ground_speed INTEGER,
+        track REAL, operator TEXT, aircraft_type TEXT, image_url TEXT,
+        timestamp DATETIME NOT NULL, latitude REAL, longitude REAL, squawk_code TEXT,
+        archive_date DATETIME NOT NULL
+    );
+    CREATE VIRTUAL TABLE sighting_positions USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+'''
+
+
+def legacy_database(path):
+    """A database written before the compact schema, with a spatial index over its rows"""
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    rows = [
+        (1, 'AE0001', 'RCH123  ', 20000, 450, 90.5, 'USAF', 'adsb_icao', 'https://img/1',
+         '2024-05-01 12:00:00.250000+00:00', 40.0, -83.0, '1200'),
+        # Same aircraft and second as row 1, only the fraction differs
+        (2, 'AE0001', 'RCH123  ', 20100, 450.2, 90.5, 'USAF', 'adsb_icao', 'https://img/1',
+         '2024-05-01 12:00:00.750000+00:00', 40.001, -83.0, '1200'),
+        (3, 'A12345', 'N123', 3000, 120, 180.0, '', 'mode_s', '',
+         '2024-05-01 13:30:00+00:00', 40.1, -82.9, '7000'),
+        (4, 'AE0002', 'TOPCAT1', 25000, 300, 45.0, 'USN', 'P-8A', '',
+         '2024-05-02 09:00:00+00:00', 40.2, -82.8, '4000')
+    ]
+    conn.executemany("INSERT INTO aircraft_sightings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.executemany("INSERT INTO sighting_positions VALUES (?, ?, ?, ?, ?)",
+                     [(row[0], row[10], row[10], row[11], row[11]) for row in rows])
+    conn.execute('''
+        INSERT INTO archived_aircraft_sightings VALUES
+        (1, 'AE0003', 'RCH9', 30000, 400, 10.0, 'USAF', 'mlat', '',
+         '2024-04-01 08:00:00+00:00', 41.0, -84.0, '1200', '2024-05-01 00:00:00+00:00')
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def legacy_rows(path, table):
+    conn = sqlite3.connect(path)
+    cursor = conn.execute(f"SELECT * FROM {table} ORDER BY id")
+    columns = [description[0] for description in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    conn.close()
+    return rows
+
+
+def test_legacy_migration(tmp_path):
+    path = str(tmp_path / "aircraft_history.db")
+    legacy_database(path)
+    before = legacy_rows(path, 'aircraft_sightings')
+    archived_before = legacy_rows(path, 'archived_aircraft_sightings')
+    db = AircraftDatabase(path)
+
+    # Every row survives, including the two in the same second
+    assert len(legacy_rows(path, 'sightings')) == len(before)
+    assert len(legacy_rows(path, 'archived_sightings')) == len(archived_before)
+    with db._connect() as conn:
+        assert conn.execute("SELECT id FROM sighting_positions ORDER BY id").fetchall() == [(1,), (2,), (3,), (4,)]
+        # Message sources are not aircraft types
+        assert conn.execute("SELECT value FROM aircraft_types").fetchall() == [('P-8A',)]
+        assert conn.execute('''
+            SELECT hex_code, aircraft_type, archive_date FROM archived_aircraft_sightings
+        ''').fetchone() == ('AE0003', '', '2024-05-01 00:00:00+00:00')
+
+    # get_sightings returns the legacy values in the legacy formats. Callsigns
+    # are trimmed, message sources are dropped as types, and the ICAO block
+    # columns are added.
+    after = sorted(db.get_sightings(limit=10), key=lambda sighting: sighting['id'])
+    for sighting in before:
+        sighting.update(flight_number=sighting['flight_number'].strip(), country=None, is_military=None)
+        if sighting['aircraft_type'] in LEGACY_MESSAGE_TYPES:
+            sighting['aircraft_type'] = ''
+    assert after == before
+    assert [type(sighting['ground_speed']) for sighting in after] == [int, float, int, int]
+
+    # Rollups and the search index cover the migrated history
+    days = {rollup['bucket_start']: rollup for rollup in db.get_rollups('day')}
+    assert [rollup['sighting_count'] for rollup in days.values()] == [1, 3, 1]
+    assert sum(rollup['sighting_count'] for rollup in db.get_rollups('hour')) == 5
+    assert [sighting['hex_code'] for sighting in db.search_sightings("topcat")] == ['AE0002']
+
+
+def insert(db, hex_code, epoch):
+    with db._connect() as conn:
+        db.insert_sightings(conn.cursor(), [
+            (hex_code, 'TEST1', 20000, None, None, None, None, None, epoch, None, None, '1200', None, 0)
+        ])
+        conn.commit()
+
+
+def day_counts(db):
+    return {rollup['bucket_start']: rollup['sighting_count'] for rollup in db.get_rollups('day')}
+
+
+def test_rebuild_rollups_around_cold_storage(db):
+    now = to_epoch(datetime.datetime.now(pytz.UTC))
+    cold_month = month_bounds(month_key(now - 400 * 86400))[0] + 10 * 86400
+    older_month = month_bounds(month_key(now - 500 * 86400))[0] + 10 * 86400
+    day = ROLLUP_GRANULARITIES['day']
+
+    insert(db, 'AE0001', cold_month)
+    insert(db, 'AE0002', cold_month + 60)
+    db.rebuild_rollups()
+    db.archive_old_records(days_old=30)
+    assert db.export_cold_storage(days_old=90) == 2
+
+    # Months only in cold storage keep their rollups
+    db.rebuild_rollups()
+    assert day_counts(db) == {cold_month: 2}
+
+    # History backfilled into and before the cold month is counted alongside it
+    insert(db, 'AE0003', cold_month + 120)
+    insert(db, 'AE0004', older_month)
+    insert(db, 'AE0005', now - 3600)
+    db.rebuild_rollups()
+    assert day_counts(db) == {older_month: 1, cold_month: 3, now - 3600 - (now - 3600) % day: 1}
+    (rollup,) = [rollup for rollup in db.get_rollups('day') if rollup['bucket_start'] == cold_month]
+    assert rollup['unique_aircraft'] == 3
+
+
+def test_fts_match_query():
+    assert fts_match_query("Coast Guard C-130") == '"Coast"* "Guard"* "C130"*'
+    assert fts_match_query("callsign:RCH Operator:navy foo:bar") == 'callsign : "RCH"* operator : "navy"* "foobar"*'
+    assert fts_match_query(" - , ") == ''
+
+
+def test_normalize_callsign():
+    assert normalize_callsign('rch123  ') == 'RCH123'
+    assert normalize_callsign(None) == ''
+
+
+def search_history(db):
+    record(db, 'AE0001', 20000, flight='RCH123  ', **{'$Type': 'KC-135R Stratotanker'})
+    record(db, 'AE0002', 1500, flight='TOPCAT1 ', **{'$Type': 'P-8A Poseidon'})
+    record(db, 'AE0004', 25000, flight='rch456', **{'$Operator': 'United States Air Force',
+                                                     '$Type': 'HC-130J Combat King II'})
+
+
+def hex_codes(sightings):
+    return sorted(sighting['hex_code'] for sighting in sightings)
+
+
+@pytest.mark.parametrize('time_scan', [False, True])
+def test_search_sightings(db, monkeypatch, time_scan):
+    search_history(db)
+    monkeypatch.setattr(AircraftDatabase, '_prefer_time_scan', staticmethod(lambda *args: time_scan))
+
+    assert hex_codes(db.search_sightings("rch")) == ['AE0001', 'AE0004']
+    assert hex_codes(db.search_sightings("RCH", hex_code='ae0004')) == ['AE0004']
+    assert db.search_sightings("topcat", hex_code='AE0001') == []
+    assert [sighting['flight_number'] for sighting in db.search_sightings("callsign:rch456")] == ['RCH456']
+    # Mission prefixes can be left off type designators
+    assert hex_codes(db.search_sightings("C130")) == ['AE0004']
+    assert hex_codes(db.search_sightings("C-135")) == ['AE0001']
+    assert hex_codes(db.search_sightings("operator:navy")) == ['AE0002']
+    assert db.search_sightings("callsign:navy") == []
+
+    now = datetime.datetime.now(pytz.UTC)
+    assert db.search_sightings("rch", end_date=now - datetime.timedelta(hours=1)) == []
+    with pytest.raises(ValueError):
+        db.search_sightings(" - ")
@@ -0,0 +1,98 @@
+from anomaly import AnomalyDetector
+from tracker import AircraftTracker
+
+
+def aircraft(hex_code, seen=0, **fields):
+    return {'hex': hex_code, 'flight': 'TEST1', 'lat': 40.0, 'lon': -83.0,
+            'alt_geom': 20000, 'gs': 400, 'track': 90, 'seen': seen, **fields}
+
+
+def cycle(tracker, detector, aircraft_data, now):
+    """One skywatch cycle: only moved aircraft are sampled, every tracked one is touched"""
+    events = tracker.update(aircraft_data, now=now)
+    moved = [state for state, changed in events.changes() if 'position' in changed or 'altitude' in changed]
+    return detector.update_from_states(moved, now=now, tracked=tracker.currently_tracking())
+
+
+def rules(anomalies):
+    return [(anomaly.hex_code, anomaly.rule) for anomaly in anomalies]
+
+
+def test_rapid_descent():
+    detector = AnomalyDetector()
+    fired = []
+    for i in range(4):
+        fired += detector.update(['AE0001'], [1000 + 30 * i], [30000 - 3000 * i], [400], [90],
+                                 [40.0], [-83.0 + 0.1 * i])
+    assert rules(fired) == [('AE0001', 'rapid_descent')]
+    assert fired[0].detail == "Descending at 6000 ft/min"
+
+
+def test_low_altitude_speed():
+    detector = AnomalyDetector()
+    fired = []
+    for i in range(3):
+        fired += detector.update(['AE0001'], [1000 + 30 * i], [3000], [350], [90], [40.0], [-83.0 + 0.1 * i])
+    assert rules(fired) == [('AE0001', 'low_altitude_speed')]
+
+
+def test_orbit():
+    detector = AnomalyDetector(window=16)
+    fired = []
+    for i in range(16):
+        # A 25 degree turn every sample, staying within a couple of km
+        fired += detector.update(['AE0001'], [1000 + 30 * i], [5000], [150], [(25 * i) % 360],
+                                 [40.0 + 0.01 * (i % 2)], [-83.0])
+    assert rules(fired) == [('AE0001', 'orbit')]
+
+
+def test_cooldown_limits_repeats():
+    detector = AnomalyDetector(cooldown=900)
+    fired = []
+    for i in range(10):
+        fired += detector.update(['AE0001'], [1000 + 30 * i], [3000], [350], [90], [40.0], [-83.0 + 0.1 * i])
+    assert len(fired) == 1
+
+
+def test_aircraft_heard_without_moving_is_not_a_dropout():
+    tracker, detector = AircraftTracker(timeout=60), AnomalyDetector(expire_after=900)
+    cycle(tracker, detector, [aircraft('ae0001')], now=1000)
+
+    # Still transmitting every cycle from the same position and altitude
+    for now in range(1030, 2200, 30):
+        assert cycle(tracker, detector, [aircraft('ae0001')], now=now) == []
+    assert len(detector) == 1
+
+
+def test_silent_aircraft_drops_out_once_then_expires():
+    tracker, detector = AircraftTracker(timeout=60), AnomalyDetector(expire_after=900)
+    cycle(tracker, detector, [aircraft('ae0001')], now=1000)
+
+    fired = []
+    for now in range(1030, 1300, 30):
+        # Last message stays at 1000 while tar1090 keeps listing it for a while
+        fired += cycle(tracker, detector, [aircraft('ae0001', seen=now - 1000)], now=now)
+    assert rules(fired) == [('AE0001', 'transponder_dropout')]
+    assert 'AE0001' not in tracker
+
+    cycle(tracker, detector, [], now=1901)
+    assert len(detector) == 0
+
+
+def test_low_aircraft_do_not_drop_out():
+    detector = AnomalyDetector()
+    detector.update(['AE0001'], [1000], [1500], [120], [90], [40.0], [-83.0])
+    assert detector.update([], [], [], [], [], [], [], now=1200) == []
+
+
+def test_touch_ignores_unknown_aircraft():
+    detector = AnomalyDetector()
+    detector.touch(['AE0001'], [1000])
+    assert len(detector) == 0
+
+
+def test_slots_grow_past_capacity():
+    detector = AnomalyDetector(capacity=2)
+    hex_codes = [f"AE{i:04X}" for i in range(5)]
+    detector.update(hex_codes, [1000] * 5, [20000] * 5, [400] * 5, [90] * 5, [40.0] * 5, [-83.0] * 5)
+    assert len(detector) == 5 and detector.capacity >= 5
@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import urllib.request
+
+import psutil
+import pytest
+
+from aircraft_db import AircraftDatabase
+from api import ApiServer
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs skywatch's exit handling next to a real API process, with the email
+# patched (at import, so the spawned API process gets it too) to append to a file
+EXIT_HARNESS = textwrap.dedent('''
+    import logging, os, signal, sys, time
+    from datetime import datetime
+
+    import skywatch
+    from api import ApiServer
+
+    def record_email(recipient, subject, message):
+        with open(os.environ['NOTIFICATIONS'], 'a') as file:
+            file.write(f"{os.getpid()} {subject}\\n")
+
+    skywatch.send_email_alert = record_email
+
+    if __name__ == '__main__':
+        skywatch.setup_logging('skywatch', 'skywatch.log', level=logging.INFO)
+        skywatch.program_start_time = datetime.now()
+        signal.signal(signal.SIGINT, skywatch.handle_exit_signal)
+        signal.signal(signal.SIGTERM, skywatch.handle_exit_signal)
+
+        skywatch.api_server = ApiServer(skywatch.logger, sys.argv[1], host='127.0.0.1', port=0, log_file='api.log')
+        skywatch.api_server.start()
+        print(skywatch.api_server._process.pid, flush=True)
+        time.sleep(60)
+''')
+
+
+def get_json(port, path):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=10) as response:
+        return json.load(response)
+
+
+def test_api_process_serves_the_database(db, tmp_path):
+    db.record_sighting({'hex': 'ae0001', 'flight': 'RCH123', 'lat': 40.0, 'lon': -83.0, 'alt_geom': 20000})
+    server = ApiServer(logging.getLogger('test_api'), db.db_path, host='127.0.0.1', port=0,
+                       log_file=str(tmp_path / "api.log"))
+    server.start()
+    try:
+        assert server.port > 0
+        history = get_json(server.port, "/api/aircraft/AE0001")
+        assert [(sighting['hex_code'], sighting['flight_number']) for sighting in history] == [('AE0001', 'RCH123')]
+    finally:
+        server.stop()
+
+
+@pytest.mark.parametrize("deliver", ['sigterm', 'ctrl_c'])
+def test_shutdown_sends_one_exit_notification(tmp_path, deliver):
+    pytest.importorskip('env_vars_config')
+    db_path = str(tmp_path / "aircraft_history.db")
+    AircraftDatabase(db_path)
+    harness = tmp_path / "exit_harness.py"
+    harness.write_text(EXIT_HARNESS)
+    notifications = tmp_path / "notifications.txt"
+
+    env = dict(os.environ, NOTIFICATIONS=str(notifications),
+               PYTHONPATH=os.pathsep.join(filter(None, [SCRIPTS_DIR, os.environ.get('PYTHONPATH')])))
+    process = subprocess.Popen([sys.executable, str(harness), db_path], cwd=tmp_path, env=env,
+                               stdout=subprocess.PIPE, text=True, start_new_session=True)
+    try:
+        api_pid = int(process.stdout.readline())
+        api_process = psutil.Process(api_pid)
+
+        if deliver == 'sigterm':
+            process.send_signal(signal.SIGTERM)
+        else:
+            # Ctrl+C in a terminal signals the whole foreground process group
+            os.killpg(process.pid, signal.SIGINT)
+        assert process.wait(timeout=30) == 0
+        # The exit handler stopped the API process rather than leaving it running
+        _, alive = psutil.wait_procs([api_process], timeout=10)
+        assert alive == []
+    finally:
+        if process.poll() is None:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+    senders = notifications.read_text().splitlines()
+    assert senders == [f"{process.pid} SkyWatch Terminated"]
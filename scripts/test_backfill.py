@@ -0,0 +1,151 @@
+import gzip
+import json
+import logging
+import os
+import sqlite3
+
+import pytest
+
+import backfill as backfill_module
+from backfill import Thinner, parse_aircraft_json, parse_file, parse_trace
+from icao_ranges import IcaoRegistry
+
+logger = logging.getLogger('test_backfill')
+
+CSV_DATA = os.path.join(os.path.dirname(__file__), "..", "csv_data")
+
+BASE = 1714564800  # 2024-05-01 12:00 UTC
+
+SNAPSHOT = {
+    'now': BASE + 10.5,
+    'aircraft': [
+        {'hex': 'ae0001', 'flight': 'RCH123  ', 'alt_geom': 20000, 'gs': 450.2, 'track': 90.25,
+         'lat': 40.0, 'lon': -83.0, 'squawk': '1200', 'seen': 1, 'seen_pos': 2.5, 't': 'C17'},
+        {'hex': 'a12345', 'seen': 0},
+        {'flight': 'NOHEX'}
+    ]
+}
+
+TRACE = {
+    'icao': 'ae0002',
+    'timestamp': BASE,
+    't': 'P8',
+    'trace': [
+        [0, 40.0, -83.0, 25000, 300, 45, 0, 0, {'flight': 'TOPCAT1 ', 'squawk': '4000'}, 'adsb_icao', 25200],
+        [5, 40.01, -83.0, 25100, 300, 45, 0, 0, None, 'adsb_icao', None],
+        [60, 40.1, -82.9, 'ground', 10, 90, 0, 0, {'squawk': '7000'}, 'adsb_icao']
+    ]
+}
+
+
+def test_parse_aircraft_json_times_positions_by_seen_pos():
+    first, second = parse_aircraft_json(SNAPSHOT)
+    assert first['hex'] == 'ae0001' and first['epoch'] == BASE + 8
+    assert first['flight'] == 'RCH123' and first['t'] == 'C17'
+    assert second['hex'] == 'a12345' and second['lat'] is None
+    assert parse_aircraft_json({'aircraft': SNAPSHOT['aircraft']}) == []
+
+
+def test_parse_trace_carries_details_forward():
+    points = parse_trace(TRACE)
+    assert [point['epoch'] for point in points] == [BASE, BASE + 5, BASE + 60]
+    # Geometric altitude when the point has one, barometric otherwise, 0 on the ground
+    assert [point['alt_geom'] for point in points] == [25200, 25100, 0]
+    assert [point['flight'] for point in points] == ['TOPCAT1'] * 3
+    assert [point['squawk'] for point in points] == ['4000', '4000', '7000']
+
+
+def test_thinner_keeps_one_position_per_interval():
+    rows = [(hex_code, *[None] * 7, epoch) for hex_code, epoch in
+            [('A', 0), ('A', 10), ('B', 10), ('A', 30), ('A', 45), ('B', 39), ('B', 40)]]
+    kept = Thinner(30).filter(rows)
+    assert [(row[0], row[8]) for row in kept] == [('A', 0), ('B', 10), ('A', 30), ('B', 40)]
+    assert Thinner(0).filter(rows) == rows
+
+
+def test_parse_file_enriches_and_sorts(tmp_path):
+    backfill_module._init_worker({'AE0002': {'$Operator': 'United States Navy', '$Type': 'P-8A Poseidon'}},
+                                 IcaoRegistry([(0xA00000, 0xAFFFFF, 'United States')],
+                                              [(0xADF7C8, 0xAFFFFF, 'United States')]))
+    # readsb gzips traces without a .gz suffix
+    path = tmp_path / "trace_full_ae0002.json"
+    path.write_bytes(gzip.compress(json.dumps(TRACE).encode()))
+
+    _, rows, error = parse_file(str(path))
+    assert error is None
+    assert [row[8] for row in rows] == [BASE, BASE + 5, BASE + 60]
+    hex_code, flight, altitude, speed, track, operator, aircraft_type, _, _, lat, lon, squawk, country, military = rows[0]
+    assert (hex_code, flight, altitude, speed, track) == ('AE0002', 'TOPCAT1', 25200, 3000, 4500)
+    assert (operator, aircraft_type, lat, lon) == ('United States Navy', 'P-8A Poseidon', 40000000, -83000000)
+    assert (squawk, country, military) == ('4000', 'United States', 1)
+
+    bad = tmp_path / "bad.json"
+    bad.write_text("{not json")
+    assert parse_file(str(bad))[2]
+    other = tmp_path / "other.json"
+    other.write_text('{"hello": 1}')
+    assert parse_file(str(other))[2] == "not an aircraft.json or trace file"
+
+
+@pytest.fixture
+def history(tmp_path):
+    directory = tmp_path / "history"
+    directory.mkdir()
+    (directory / "aircraft-1.json").write_text(json.dumps(SNAPSHOT))
+    (directory / "trace_full_ae0002.json").write_text(json.dumps(TRACE))
+    (directory / "notes.txt").write_text("ignored")
+    return str(directory)
+
+
+def backfill(db, paths, **kwargs):
+    return backfill_module.backfill(logger, db, paths, workers=1, csv_path=CSV_DATA, **kwargs)
+
+
+def count(db, sql):
+    with sqlite3.connect(db.db_path) as conn:
+        return conn.execute(sql).fetchone()[0]
+
+
+def test_backfill_imports_once(db, history):
+    totals = backfill(db, [history], min_interval=30)
+    assert (totals['files'], totals['errors'], totals['inserted']) == (2, 0, 4)
+    assert count(db, "SELECT COUNT(*) FROM sightings") == 4
+    assert count(db, "SELECT COUNT(*) FROM sighting_positions") == 3
+    assert count(db, "SELECT COUNT(*) FROM sqlite_master WHERE name = 'idx_sightings_ts'") == 1
+    assert [sighting['hex_code'] for sighting in db.search_sightings("topcat")] == ['AE0002', 'AE0002']
+
+    assert backfill(db, [history])['files'] == 0
+    assert count(db, "SELECT COUNT(*) FROM sightings") == 4
+
+
+def test_interrupted_rebuild_is_finished_by_the_next_run(db, history, monkeypatch):
+    def crash(csv_data=None):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(db, 'rebuild_rollups', crash)
+    with pytest.raises(KeyboardInterrupt):
+        backfill(db, [history])
+    monkeypatch.undo()
+    assert db.get_rollups('day') == []
+
+    # Every file is already imported; the rebuild still has to happen
+    totals = backfill(db, [history])
+    assert totals['files'] == 0
+    assert sum(rollup['sighting_count'] for rollup in db.get_rollups('day')) == 4
+    assert len(db.search_sightings("topcat")) == 2
+    assert count(db, "SELECT COUNT(*) FROM backfill_state") == 0
+
+
+def test_backfill_older_than_cold_storage_is_rolled_up(db, history):
+    cold = 1736942400  # 2025-01-15 12:00 UTC, newer than the history files
+    with sqlite3.connect(db.db_path) as conn:
+        db.insert_sightings(conn.cursor(), [
+            ('AE0003', 'RCH456', 30000, None, None, None, None, None, cold, None, None, '1200', None, 1)
+        ])
+    db.rebuild_rollups()
+    db.archive_old_records(days_old=30)
+    assert db.export_cold_storage(days_old=90) == 1
+
+    backfill(db, [history])
+    counts = {rollup['bucket_start']: rollup['sighting_count'] for rollup in db.get_rollups('day')}
+    assert counts == {BASE - BASE % 86400: 4, cold - cold % 86400: 1}
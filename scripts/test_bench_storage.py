@@ -0,0 +1,48 @@
+import sqlite3
+
+from bench_storage import benchmark_size, compare, generate_history
+
+RESULT_KEYS = {'calls', 'p50_ms', 'p95_ms', 'rows_per_sec', 'peak_rss_mb'}
+
+
+def timing(p50_ms):
+    return {'calls': 5, 'p50_ms': p50_ms, 'p95_ms': p50_ms, 'rows_per_sec': 1.0, 'peak_rss_mb': 1.0}
+
+
+def test_compare_reports_only_real_slowdowns():
+    baseline = {'results': {'1000': {'get_sightings_hex': timing(10.0), 'get_rollups': timing(0.2),
+                                     'search_sightings': timing(5.0), 'database_size_mb': 1.0}}}
+    results = {'results': {'1000': {'get_sightings_hex': timing(15.0),   # +50%, 5 ms: regression
+                                    'get_rollups': timing(0.4),          # +100% but only 0.2 ms
+                                    'search_sightings': timing(5.5),     # +10%
+                                    'record_sighting': timing(1.0),      # not in the baseline
+                                    'database_size_mb': 2.0}}}
+
+    assert compare(results, baseline, threshold=0.25) == [['1000', 'get_sightings_hex', '10.00', '15.00', '+50%']]
+    assert compare(results, {}, threshold=0.25) == []
+
+
+def test_generate_history(tmp_path):
+    db = generate_history(str(tmp_path / "bench.db"), 2000)
+    with sqlite3.connect(db.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sightings").fetchone()[0] == 2000
+        assert conn.execute("SELECT COUNT(*) FROM weather_conditions").fetchone()[0] > 0
+        assert conn.execute("SELECT COUNT(*) FROM aircraft_flights").fetchone()[0] > 0
+    assert sum(rollup['sighting_count'] for rollup in db.get_rollups('day')) == 2000
+
+
+def test_benchmark_size_times_every_method(tmp_path):
+    results = benchmark_size(2000, calls=2, workdir=str(tmp_path))
+
+    timings = {method: result for method, result in results.items() if isinstance(result, dict)}
+    assert {'generate', 'get_sightings_hex', 'search_sightings', 'record_sighting',
+            'archive_old_records', 'export_cold_storage', 'cold_query_hex', 'cold_query_day',
+            'vacuum_database'} <= set(timings)
+    for result in timings.values():
+        assert set(result) == RESULT_KEYS
+    assert results['database_size_mb'] > 0
+    # The archive was moved to the cold files before they were queried
+    assert results['export_cold_storage']['rows_per_sec'] > 0
+    # The temporary database and cold files are removed afterwards
+    assert not list(tmp_path.glob("bench_*.db*"))
+    assert not (tmp_path / "cold").exists()
@@ -0,0 +1,128 @@
+import datetime
+import os
+
+import pytest
+import pytz
+
+from aircraft_db import to_epoch
+from cold_storage import COLD_COLUMNS, BloomFilter, ColdStore, month_bounds, month_key
+
+HEX_CODES = [f"A{i:05X}" for i in range(200)]
+
+
+def cold_row(row_id, hex_code, epoch):
+    row = dict.fromkeys(COLD_COLUMNS)
+    row.update(id=row_id, hex_code=hex_code, flight_number='TEST1', ts=epoch, archive_ts=epoch)
+    return [row[column] for column in COLD_COLUMNS]
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter.for_capacity(len(HEX_CODES), false_positive=0.01)
+    for hex_code in HEX_CODES:
+        bloom.add(hex_code)
+    assert all(hex_code in bloom for hex_code in HEX_CODES)
+
+    others = [f"B{i:05X}" for i in range(2000)]
+    false_positives = sum(hex_code in bloom for hex_code in others)
+    assert false_positives < len(others) * 0.03
+
+    restored = BloomFilter.from_dict(bloom.to_dict())
+    assert all(hex_code in restored for hex_code in HEX_CODES)
+    assert [hex_code in restored for hex_code in others] == [hex_code in bloom for hex_code in others]
+
+
+def test_month_bounds():
+    start, end = month_bounds('2024-12')
+    assert datetime.datetime.fromtimestamp(start, pytz.UTC) == datetime.datetime(2024, 12, 1, tzinfo=pytz.UTC)
+    assert datetime.datetime.fromtimestamp(end, pytz.UTC) == datetime.datetime(2025, 1, 1, tzinfo=pytz.UTC)
+    assert month_key(end - 1) == '2024-12' and month_key(end) == '2025-01'
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Two months of cold rows, 250 rows in chunks of 100, one hex code per row"""
+    store = ColdStore(str(tmp_path / "cold"), compression='gzip', chunk_rows=100)
+    start, _ = month_bounds('2024-03')
+    store.append('2024-03', (cold_row(i + 1, HEX_CODES[i % 200], start + i * 60) for i in range(250)))
+    start, _ = month_bounds('2024-04')
+    store.append('2024-04', [cold_row(1000, 'AE0001', start + 3600)])
+    return store
+
+
+def test_append_writes_chunks_and_index(store):
+    assert store.months() == ['2024-03', '2024-04']
+    assert store.stats()['rows'] == 251
+    assert store.stats()['chunks'] == 4
+    assert store.max_id('2024-03') == 250
+    assert store.max_id('2024-05') == 0
+    assert store.end_epoch() == month_bounds('2024-05')[0]
+
+
+def test_query_by_hex_and_time(store):
+    rows = store.query('a00005')
+    assert [row[COLD_COLUMNS.index('id')] for row in rows] == [206, 6]
+
+    start, _ = month_bounds('2024-03')
+    rows = store.query(start_epoch=start + 100 * 60, end_epoch=start + 104 * 60)
+    assert [row[COLD_COLUMNS.index('id')] for row in rows] == [105, 104, 103, 102, 101]
+
+    rows = store.query(hex_codes={'AE0001', 'A00001'}, row_filter=lambda row: row[0] != 2)
+    assert [row[COLD_COLUMNS.index('id')] for row in rows] == [1000, 202]
+
+    assert len(store.query(limit=10)) == 10
+    assert store.query(limit=1)[0][COLD_COLUMNS.index('id')] == 1000
+
+
+def test_query_skips_chunks_outside_the_filters(store, monkeypatch):
+    read = []
+    original = ColdStore._read_chunk
+    monkeypatch.setattr(ColdStore, '_read_chunk',
+                        lambda self, month, chunk: read.append((month, chunk['offset'])) or original(self, month, chunk))
+    store.query('AE0001')
+    assert [month for month, _ in read] == ['2024-04']
+
+    read.clear()
+    start, _ = month_bounds('2024-03')
+    store.query(start_epoch=start + 210 * 60, end_epoch=start + 220 * 60)
+    assert len(read) == 1
+
+
+def test_unindexed_bytes_are_ignored(store):
+    # A crash between writing chunk data and replacing the sidecar
+    with open(os.path.join(store.directory, "sightings-2024-04.chunks"), 'ab') as file:
+        file.write(b'partial chunk')
+    assert len(store.query('AE0001')) == 1
+
+    store.append('2024-04', [cold_row(1001, 'AE0001', month_bounds('2024-04')[0] + 7200)])
+    assert len(ColdStore(store.directory).query('AE0001')) == 2
+
+
+def test_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        ColdStore(str(tmp_path), compression='zip')
+
+
+def test_export_cold_storage_moves_old_archived_months(db):
+    now = datetime.datetime.now(pytz.UTC)
+    old = to_epoch(now - datetime.timedelta(days=200))
+    recent = to_epoch(now - datetime.timedelta(days=40))
+    with db._connect() as conn:
+        db.insert_sightings(conn.cursor(), [
+            ('AE0001', 'RCH1', 20000, 4500, 9000, 'USAF', 'C17', None, old, 40000000, -83000000, '1200', None, 1),
+            ('AE0002', 'RCH2', 21000, 4500, 9000, 'USAF', 'C17', None, recent, 40000000, -83000000, '1200', None, 1)
+        ])
+        conn.execute("UPDATE sightings SET ts_us = 250000 WHERE hex_code = 'AE0001'")
+        conn.commit()
+    db.archive_old_records(days_old=30)
+
+    assert db.export_cold_storage(days_old=90) == 1
+    assert db.export_cold_storage(days_old=90) == 0
+    assert db.cold_storage.stats()['rows'] == 1
+    assert db.get_database_stats()['archived_aircraft_sightings_count'] == 1
+
+    (sighting,) = db.get_sightings(hex_code='AE0001', include_archive=True)
+    assert (sighting['flight_number'], sighting['operator'], sighting['aircraft_type']) == ('RCH1', 'USAF', 'C17')
+    assert sighting['ground_speed'] == 450 and isinstance(sighting['ground_speed'], int)
+    assert sighting['latitude'] == 40.0
+    # The fraction of a second survives archiving and export
+    assert sighting['timestamp'] == str(datetime.datetime.fromtimestamp(old, pytz.UTC).replace(microsecond=250000))
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from geofence import (
+    Geofence, GeofenceIndex, PolygonGeofence, RadiusGeofence, haversine_km, load_geofences,
+    parse_geofence, radius_bounding_box
+)
+
+HOME = (40.121026, -82.949669)
+SQUARE = [(40.0, -83.0), (40.0, -82.9), (39.9, -82.9), (39.9, -83.0)]
+
+
+def test_haversine_km_one_degree_of_latitude():
+    assert haversine_km(40.0, -83.0, 41.0, -83.0) == pytest.approx(111.195, abs=0.01)
+    assert haversine_km(*HOME, *HOME) == 0
+
+
+def test_radius_bounding_box_encloses_circle():
+    min_lat, max_lat, min_lon, max_lon = radius_bounding_box(*HOME, 5)
+    assert haversine_km(*HOME, max_lat, HOME[1]) == pytest.approx(5, rel=1e-3)
+    assert haversine_km(*HOME, HOME[0], max_lon) == pytest.approx(5, rel=1e-3)
+    assert min_lat < HOME[0] < max_lat and min_lon < HOME[1] < max_lon
+
+
+def test_radius_geofence_contains():
+    fence = RadiusGeofence("Home", *HOME, 5)
+    assert fence.contains(*HOME)
+    assert fence.contains(HOME[0] + 0.04, HOME[1])  # ~4.4 km north
+    assert not fence.contains(HOME[0] + 0.05, HOME[1])  # ~5.6 km north
+
+
+def test_polygon_geofence_contains():
+    fence = PolygonGeofence("Square", SQUARE)
+    assert fence.contains(39.95, -82.95)
+    assert not fence.contains(40.05, -82.95)
+    assert not fence.contains(39.95, -83.05)
+
+
+def test_polygon_geofence_needs_three_points():
+    with pytest.raises(ValueError):
+        PolygonGeofence("Line", SQUARE[:2])
+
+
+def test_geofence_subclass_must_implement_contains_and_describe():
+    class Unfinished(Geofence):
+        def contains(self, latitude, longitude):
+            return True
+
+    with pytest.raises(TypeError):
+        Unfinished("Unfinished", (0, 0, 0, 0))
+    with pytest.raises(TypeError):
+        Geofence("Base", (0, 0, 0, 0))
+
+
+def test_index_matches_only_containing_geofences():
+    home = RadiusGeofence("Home", *HOME, 5)
+    square = PolygonGeofence("Square", SQUARE)
+    index = GeofenceIndex([home, square])
+
+    assert index.match(*HOME) == [home]
+    assert index.match(39.95, -82.95) == [square]
+    assert index.match(45.0, -90.0) == []
+    assert index.match(None, None) == []
+
+
+def test_index_spans_geofences_larger_than_a_cell():
+    big = RadiusGeofence("Big", 40.0, -83.0, 100)
+    index = GeofenceIndex([big], cell_deg=0.25)
+    assert index.match(40.8, -83.0) == [big]
+
+
+def test_parse_geofence_rejects_unknown_type():
+    with pytest.raises(ValueError):
+        parse_geofence({'name': 'x', 'type': 'hexagon'})
+
+
+def test_load_geofences(tmp_path):
+    path = tmp_path / "geofences.json"
+    path.write_text(json.dumps([
+        {'name': 'Home', 'type': 'radius', 'latitude': HOME[0], 'longitude': HOME[1], 'radius_km': 5},
+        {'name': 'Square', 'type': 'polygon', 'points': SQUARE}
+    ]))
+    index = load_geofences(str(path))
+    assert len(index) == 2
+    assert [fence.name for fence in index.match(*HOME)] == ['Home']
+
+    assert len(load_geofences(str(tmp_path / "missing.json"))) == 0
+
+
+def test_get_sightings_near_uses_exact_distance(db):
+    # Inside the 5 km circle, inside its bounding box but outside the circle, and far away
+    corner_lat, _, corner_lon, _ = radius_bounding_box(*HOME, 5)
+    for hex_code, lat, lon in [('AAA001', HOME[0] + 0.01, HOME[1]),
+                               ('AAA002', corner_lat + 0.001, corner_lon + 0.001),
+                               ('AAA003', 41.0, -84.0)]:
+        db.record_sighting({'hex': hex_code, 'flight': 'TEST1', 'lat': lat, 'lon': lon, 'alt_geom': 5000})
+
+    near = db.get_sightings_near(*HOME, 5)
+    assert [sighting['hex_code'] for sighting in near] == ['AAA001']
+    assert near[0]['distance_km'] == pytest.approx(1.11, abs=0.01)
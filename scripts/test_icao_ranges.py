@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+
+from icao_ranges import IcaoRangeIndex, load_icao_registry, parse_hex
+
+SHIPPED_RANGES = os.path.join(os.path.dirname(__file__), "..", "csv_data", "icao_ranges.csv")
+
+
+@pytest.mark.parametrize("hex_code, address", [
+    ('ae0001', 0xAE0001), (' A00000 ', 0xA00000), ('~2a5bd1', -1), ('', -1), ('1000000', -1)
+])
+def test_parse_hex(hex_code, address):
+    assert parse_hex(hex_code) == address
+
+
+def test_nested_ranges_map_to_the_narrowest():
+    index = IcaoRangeIndex([(0x100, 0x1FF, 'outer'), (0x140, 0x14F, 'inner'), (0x300, 0x3FF, 'other')])
+    assert index.lookup('100') == 'outer'
+    assert index.lookup('140') == 'inner'
+    assert index.lookup('14F') == 'inner'
+    assert index.lookup('150') == 'outer'
+    assert index.lookup('200') is None
+    assert index.lookup('3FF') == 'other'
+    assert index.lookup('~140') is None
+    # outer is split around inner; adjacent 'other' stays its own segment
+    assert len(index) == 4
+
+
+def test_lookup_many_matches_lookup():
+    index = IcaoRangeIndex([(0x100, 0x1FF, 'outer'), (0x140, 0x14F, 'inner')])
+    hex_codes = ['0FF', '100', '145', '1FF', '200', '~145', 'zz']
+    assert list(index.lookup_many(hex_codes)) == [index.lookup(hex_code) for hex_code in hex_codes]
+    assert list(IcaoRangeIndex([]).lookup_many(['100'])) == [None]
+
+
+def test_registry_from_csv(tmp_path):
+    path = tmp_path / "icao_ranges.csv"
+    path.write_text(
+        "# comment\n"
+        "start,end,country,military\n"
+        "A00000,AFFFFF,United States,0\n"
+        "ADF7C8,AFFFFF,United States,1\n"
+        "400000,43FFFF,United Kingdom,0\n"
+    )
+    registry = load_icao_registry(str(path))
+    assert registry.classify('A1B2C3') == ('United States', False)
+    assert registry.classify('AE0001') == ('United States', True)
+    assert registry.classify('406A1B') == ('United Kingdom', False)
+    assert registry.classify('000001') == (None, False)
+
+    countries, military = registry.classify_many(['A1B2C3', 'AE0001', '000001'])
+    assert list(countries) == ['United States', 'United States', None]
+    np.testing.assert_array_equal(military, [False, True, False])
+
+
+def test_shipped_ranges_load():
+    registry = load_icao_registry(SHIPPED_RANGES)
+    assert registry.classify('AE1234') == ('United States', True)
+    assert registry.classify('43C123') == ('United Kingdom', True)
@@ -0,0 +1,78 @@
+import json
+import logging
+
+import pytest
+
+import logging_util
+from logging_util import get_last_log_lines, setup_logging, stop_logging
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    path = tmp_path / "test.log"
+    yield path
+    stop_logging()
+    logging_util._tail_handler = None
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def read_entries(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_exceptions_reach_the_json_log(log_file):
+    logger = setup_logging('test', str(log_file))
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logger.exception("Cycle failed for %s", 'AE0001', extra={'stage': 'checks'})
+    stop_logging()
+
+    (entry,) = read_entries(log_file)
+    assert entry['message'] == "Cycle failed for AE0001"
+    assert entry['level'] == 'ERROR'
+    assert entry['stage'] == 'checks'
+    assert entry['exception'].startswith("Traceback")
+    assert "ZeroDivisionError" in entry['exception']
+
+
+def test_records_without_exceptions_have_no_exception_field(log_file):
+    logger = setup_logging('test', str(log_file))
+    logger.info("Started")
+    stop_logging()
+
+    (entry,) = read_entries(log_file)
+    assert entry['message'] == "Started"
+    assert 'exception' not in entry
+
+
+def test_last_log_lines_come_from_memory(log_file):
+    logger = setup_logging('test', str(log_file))
+    for i in range(5):
+        logger.info("line %d", i)
+
+    lines = get_last_log_lines(str(log_file), 2).splitlines()
+    assert len(lines) == 2
+    assert lines[0].endswith("line 3") and lines[1].endswith("line 4")
+
+
+def test_last_log_lines_keep_arguments_as_logged(log_file):
+    logger = setup_logging('test', str(log_file))
+    state = {'squawk': '1200'}
+    logger.info("State %s", state)
+    state['squawk'] = '7700'
+
+    assert get_last_log_lines(str(log_file), 1).endswith("State {'squawk': '1200'}")
+
+
+def test_last_log_lines_fall_back_to_the_file(tmp_path):
+    path = tmp_path / "old.log"
+    path.write_text(''.join(f"line {i}\n" for i in range(100)))
+    assert get_last_log_lines(str(path), 3) == "line 97\nline 98\nline 99"
+    assert get_last_log_lines(str(tmp_path / "missing.log")).startswith("Error reading log file")
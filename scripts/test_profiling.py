@@ -0,0 +1,71 @@
+import logging
+import time
+
+import pytest
+
+import profiling
+from profiling import CycleProfiler, CycleTimer, span
+
+logger = logging.getLogger('test_profiling')
+
+
+def test_stage_times_are_exclusive_and_accumulate():
+    timer = CycleTimer(logger, slow_threshold=60)
+    timer.begin()
+    with timer.span('checks'):
+        time.sleep(0.02)
+        with timer.span('sqlite'):
+            time.sleep(0.05)
+    with timer.span('checks'):
+        time.sleep(0.02)
+    total = timer.end()
+
+    assert timer.stages['sqlite'] >= 0.05
+    # 0.04s of its own; the nested sqlite time would take it past 0.09s
+    assert 0.04 <= timer.stages['checks'] < 0.09
+    assert sum(timer.stages.values()) == pytest.approx(total, abs=1e-6)
+
+
+def test_module_span_only_times_inside_a_cycle():
+    with span('smtp'):
+        pass
+    assert profiling._current_timer is None
+
+    timer = CycleTimer(logger, slow_threshold=60)
+    timer.begin()
+    with span('smtp'):
+        time.sleep(0.01)
+    timer.end()
+    assert timer.stages['smtp'] >= 0.009
+
+
+def test_slow_cycles_are_logged_with_stages(caplog):
+    timer = CycleTimer(logger, slow_threshold=0)
+    timer.begin()
+    with timer.span('fetch'):
+        pass
+    with caplog.at_level(logging.WARNING, logger='test_profiling'):
+        timer.end()
+
+    (record,) = caplog.records
+    assert record.getMessage().startswith("Slow cycle")
+    assert set(record.stages) == {'fetch', 'other'}
+
+
+def test_profiler_writes_after_requested_cycles(tmp_path):
+    profiler = CycleProfiler(logger, cycles=2, output_dir=str(tmp_path / "profiles"))
+    profiler.begin_cycle()
+    profiler.end_cycle()
+    assert not profiler.active
+
+    profiler.request(None, None)  # as a signal handler
+    for _ in range(2):
+        profiler.begin_cycle()
+        assert profiler.active
+        sum(range(1000))
+        profiler.end_cycle()
+
+    assert not profiler.active
+    assert len(list((tmp_path / "profiles").glob("skywatch-*.prof"))) == 1
+    (summary,) = (tmp_path / "profiles").glob("skywatch-*.txt")
+    assert "function calls" in summary.read_text()
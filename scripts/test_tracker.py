@@ -0,0 +1,58 @@
+from tracker import CHANGE_FIELDS, AircraftTracker
+
+
+def aircraft(hex_code, seen=0, **fields):
+    return {'hex': hex_code, 'flight': 'RCH123  ', 'lat': 40.0, 'lon': -83.0,
+            'alt_geom': 20000, 'squawk': '1200', 'seen': seen, **fields}
+
+
+def test_new_aircraft_enter_with_every_field_changed():
+    tracker = AircraftTracker()
+    events = tracker.update([aircraft('ae0001')], now=1000)
+
+    (state,) = events.entered
+    assert state.hex_code == 'AE0001' and state.flight == 'RCH123'
+    assert 'AE0001' in tracker and len(tracker) == 1
+    assert list(events.changes()) == [(state, frozenset(CHANGE_FIELDS))]
+    assert events.updated == [] and events.left == []
+
+
+def test_only_changed_aircraft_are_updated():
+    tracker = AircraftTracker()
+    tracker.update([aircraft('ae0001'), aircraft('ae0002')], now=1000)
+
+    # Ground speed isn't a change field; a new position and squawk are
+    events = tracker.update([aircraft('ae0001', gs=450),
+                             aircraft('ae0002', lat=40.1, squawk='7700')], now=1001)
+    assert events.entered == []
+    ((state, changed),) = events.updated
+    assert state.hex_code == 'AE0002'
+    assert changed == {'position', 'squawk'}
+    # Unchanged aircraft are still reported as received, with nothing changed
+    assert [state.hex_code for state in events.unchanged] == ['AE0001']
+    assert [(state.hex_code, changed) for state, changed in events.received()] == [
+        ('AE0002', {'position', 'squawk'}), ('AE0001', frozenset())
+    ]
+    # Unchanged aircraft still have their state refreshed
+    assert tracker.get('AE0001').ground_speed == 450
+    assert tracker.get('AE0001').last_seen == 1001
+
+
+def test_aircraft_leave_after_timeout():
+    tracker = AircraftTracker(timeout=60)
+    tracker.update([aircraft('ae0001'), aircraft('ae0002')], now=1000)
+
+    # Still listed by tar1090 but silent for a while; the other drops out of the feed
+    events = tracker.update([aircraft('ae0001', seen=30)], now=1030)
+    assert events.left == []
+    assert tracker.get('AE0001').last_seen == 1000
+
+    events = tracker.update([aircraft('ae0001', seen=61)], now=1061)
+    assert sorted(state.hex_code for state in events.left) == ['AE0001', 'AE0002']
+    assert len(tracker) == 0
+
+
+def test_stale_aircraft_are_not_entered():
+    tracker = AircraftTracker(timeout=60)
+    events = tracker.update([aircraft('ae0001', seen=120)], now=1000)
+    assert events.entered == [] and len(tracker) == 0
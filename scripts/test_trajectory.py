@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from geofence import haversine_km
+from tracker import AircraftTracker
+from trajectory import KNOTS_TO_KM_PER_SECOND, TrajectoryPredictor, closest_approach, destination, extrapolate
+
+HOME = (40.0, -83.0)
+SPEED = 300  # knots
+KM_PER_DEGREE = haversine_km(40.0, -83.0, 41.0, -83.0)
+
+
+def seconds_to_fly(km, knots=SPEED):
+    return km / (knots * KNOTS_TO_KM_PER_SECOND)
+
+
+def test_destination_follows_bearing():
+    lat, lon = destination(np.array([40.0, 40.0]), np.array([-83.0, -83.0]), np.array([0.0, 180.0]), KM_PER_DEGREE)
+    assert lat == pytest.approx([41.0, 39.0])
+    assert lon == pytest.approx([-83.0, -83.0])
+    # Longitude wraps across the antimeridian
+    assert destination(0.0, 179.9, 90.0, 50)[1] < -179
+
+
+def test_extrapolate_moves_and_clips_altitude_at_ground():
+    lat, lon, altitude = extrapolate(40.0, -83.0, SPEED, 90.0, 1000.0, -3000.0, 60)
+    assert haversine_km(40.0, -83.0, float(lat), float(lon)) == pytest.approx(SPEED * KNOTS_TO_KM_PER_SECOND * 60)
+    assert float(lon) > -83.0
+    assert float(altitude) == 0
+    # A missing vertical rate holds altitude
+    assert float(extrapolate(40.0, -83.0, SPEED, 90.0, 1000.0, np.nan, 60)[2]) == 1000
+
+
+def test_closest_approach_ahead_behind_and_stationary():
+    south = HOME[0] - 0.2
+    distance = 0.2 * KM_PER_DEGREE
+
+    # Heading straight for the target, then slightly off to the side
+    _, cpa_km, cpa_seconds = closest_approach(south, HOME[1], SPEED, 0.0, *HOME)
+    assert cpa_km == pytest.approx(0, abs=1e-6)
+    assert cpa_seconds == pytest.approx(seconds_to_fly(distance), rel=1e-3)
+    _, cpa_km, _ = closest_approach(south, HOME[1] + 0.02, SPEED, 0.0, *HOME)
+    assert cpa_km == pytest.approx(haversine_km(*HOME, HOME[0], HOME[1] + 0.02), rel=1e-2)
+
+    # Heading away or not moving: closest approach is now
+    for speed, track in [(SPEED, 180.0), (0, 0.0), (np.nan, 0.0)]:
+        distance_km, cpa_km, cpa_seconds = closest_approach(south, HOME[1], speed, track, *HOME)
+        assert distance_km == pytest.approx(distance)
+        assert cpa_km == pytest.approx(distance) and cpa_seconds == 0
+
+
+def predictor():
+    return TrajectoryPredictor({"Home": HOME, "Far": (45.0, -80.0)}, radius_km=5, horizon=1800)
+
+
+def test_predict_inbound_within_radius_and_horizon():
+    predictions = predictor().predict(
+        ['NORTH', 'SOUTH', 'DISTANT', 'PARKED', 'OFFSET'],
+        [1000] * 5,
+        [HOME[0] - 0.2, HOME[0] - 0.2, HOME[0] - 3, HOME[0], HOME[0] - 0.1],
+        [HOME[1], HOME[1], HOME[1], HOME[1], HOME[1] + 0.1],
+        [SPEED, SPEED, SPEED, None, SPEED],
+        [0, 180, 0, None, 0],
+        [10000, 10000, 10000, None, 5000],
+        [-1000, 0, 0, None, 0]
+    )
+    assert len(predictions) == 5
+    # Too far to arrive within the horizon, flying away, or passing ~8.5 km to the side
+    assert predictions.inbound_to("Home") == ['PARKED', 'NORTH']
+    assert predictions.inbound_to("Far") == []
+    assert predictions.for_hex('SOUTH') == [] and predictions.for_hex('UNKNOWN') == []
+
+    (upcoming,) = predictions.for_hex('NORTH')
+    assert upcoming['location'] == "Home"
+    assert upcoming['cpa_seconds'] == pytest.approx(seconds_to_fly(0.2 * KM_PER_DEGREE), rel=1e-3)
+    assert upcoming['cpa_altitude'] == pytest.approx(10000 - upcoming['cpa_seconds'] / 60 * 1000)
+    assert predictions.for_hex('PARKED')[0]['cpa_altitude'] is None
+
+
+def test_predict_dead_reckons_by_age():
+    args = (['NORTH'], [1000], [HOME[0] - 0.2], [HOME[1]], [SPEED], [0], [10000])
+    reported = predictor().predict(*args, now=1000).for_hex('NORTH')[0]
+    later = predictor().predict(*args, now=1060).for_hex('NORTH')[0]
+    assert later['cpa_seconds'] == pytest.approx(reported['cpa_seconds'] - 60, rel=1e-3)
+    assert later['distance_km'] == pytest.approx(reported['distance_km'] - SPEED * KNOTS_TO_KM_PER_SECOND * 60)
+    # Reports from the future don't move aircraft backwards
+    assert predictor().predict(*args, now=900).for_hex('NORTH')[0] == reported
+
+
+def test_inbound_line():
+    predictions = predictor().predict(
+        ['NORTH', 'PARKED', 'SOUTH'], [1000] * 3, [HOME[0] - 0.2, HOME[0], HOME[0] - 0.2],
+        [HOME[1]] * 3, [SPEED, None, SPEED], [0, None, 180], [10000, None, 10000], [-1000, None, 0]
+    )
+    assert predictions.inbound_line('NORTH') == "Inbound to Home in ~2 minutes, closest approach 0.0 km at 7,598 ft"
+    assert predictions.inbound_line('PARKED') == "Overhead Home now, closest approach 0.0 km"
+    assert predictions.inbound_line('SOUTH') is None
+
+
+def test_predict_states_uses_tracker_snapshot():
+    tracker = AircraftTracker()
+    tracker.update([{'hex': 'ae0001', 'lat': HOME[0] - 0.2, 'lon': HOME[1], 'gs': SPEED, 'track': 0,
+                     'alt_geom': 10000, 'baro_rate': -1000, 'seen': 0}], now=1000)
+    predictions = predictor().predict_states(tracker.currently_tracking(), now=1000)
+    assert predictions.inbound_to("Home") == ['AE0001']
+    assert predictions.inbound_line('AE0001').endswith("at 7,598 ft")
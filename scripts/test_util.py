@@ -0,0 +1,33 @@
+import datetime
+import logging
+
+import pytest
+import pytz
+
+from aircraft_db import to_epoch
+
+# util reads the local, untracked env_vars_config at import
+util = pytest.importorskip('util')
+
+
+def test_clean_up_db_archives_and_moves_to_cold_storage(db, tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)  # the backup is written to the working directory
+    now = datetime.datetime.now(pytz.UTC)
+    with db._connect() as conn:
+        db.insert_sightings(conn.cursor(), [
+            (hex_code, 'TEST1', 20000, None, None, None, None, None,
+             to_epoch(now - datetime.timedelta(days=days)), None, None, '1200', None, 0)
+            for hex_code, days in [('AE0001', 200), ('AE0002', 45), ('AE0003', 1)]
+        ])
+        conn.commit()
+
+    with caplog.at_level(logging.INFO):
+        util.clean_up_db(logging.getLogger('test_util'), db)
+    assert "Error during cleanup" not in caplog.text
+
+    stats = db.get_database_stats()
+    assert stats['aircraft_sightings_count'] == 1
+    assert stats['archived_aircraft_sightings_count'] == 1
+    assert stats['cold_storage_sightings_count'] == 1
+    assert [row[1] for row in db.cold_storage.query()] == ['AE0001']
+    assert list(tmp_path.glob("aircraft_history_backup_*.db"))
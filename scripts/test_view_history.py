@@ -0,0 +1,22 @@
+import datetime
+
+import pytest
+import pytz
+
+import view_history
+
+NOW = datetime.datetime(2024, 5, 15, 16, 0, tzinfo=pytz.UTC)  # noon in New York
+MIDNIGHT = datetime.datetime(2024, 5, 15, 4, 0, tzinfo=pytz.UTC)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("coast guard today", ("coast guard", MIDNIGHT, NOW)),
+    ("Yesterday", ("", MIDNIGHT - datetime.timedelta(days=1), MIDNIGHT)),
+    ("RCH last month", ("RCH", NOW - datetime.timedelta(days=30), NOW)),
+    ("RCH past 2 weeks", ("RCH", NOW - datetime.timedelta(weeks=2), NOW)),
+    ("C-130 last 3 Days", ("C-130", NOW - datetime.timedelta(days=3), NOW)),
+    ("navy hours", ("navy hours", None, None)),
+    ("", ("", None, None)),
+])
+def test_parse_search_time(text, expected):
+    assert view_history.parse_search_time(text, NOW) == expected
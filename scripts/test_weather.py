@@ -0,0 +1,134 @@
+import datetime
+import json
+import logging
+
+import numpy as np
+import pytest
+
+from weather import WEATHER_FIELDS, WeatherProvider, WeatherTimeIndex, create_weather_source
+
+logger = logging.getLogger('test_weather')
+
+
+def observation(temperature):
+    return {field: None for field in WEATHER_FIELDS} | {'temperature': temperature}
+
+
+def test_time_index_keeps_observations_sorted():
+    index = WeatherTimeIndex()
+    index.add(1000, observation(10))
+    index.add(3000, observation(30))
+    index.add(2000, observation(20))  # late arrival
+
+    assert index.nearest(1400)['temperature'] == 10
+    assert index.nearest(1600)['temperature'] == 20
+    assert index.nearest(9000)['temperature'] == 30
+    assert index.nearest(9000, max_gap=60) is None
+
+
+def test_time_index_max_size_drops_oldest():
+    index = WeatherTimeIndex(max_size=2)
+    for epoch in (1000, 2000, 3000):
+        index.add(epoch, observation(epoch))
+    assert len(index) == 2
+    assert index.nearest(0)['temperature'] == 2000
+
+
+def test_nearest_many_matches_nearest():
+    index = WeatherTimeIndex.from_records(
+        {'timestamp': epoch, **observation(epoch / 100)} for epoch in (1000, 2000, 3000)
+    )
+    epochs = [0, 1499, 1501, 2600, 5000]
+    columns = index.nearest_many(epochs, max_gap=1000)
+
+    assert set(columns) == set(WEATHER_FIELDS)
+    np.testing.assert_array_equal(columns['temperature'], [10, 10, 20, 30, np.nan])
+    assert np.isnan(columns['wind_speed']).all()
+    for epoch, temperature in zip(epochs[:4], columns['temperature']):
+        assert index.nearest(epoch, max_gap=1000)['temperature'] == temperature
+
+
+def test_nearest_many_on_empty_index():
+    columns = WeatherTimeIndex().nearest_many([1000, 2000])
+    assert np.isnan(columns['temperature']).all()
+
+
+class FlakySource:
+    name = "flaky"
+
+    def __init__(self, failures):
+        self.failures = failures
+
+    def fetch(self):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("timed out")
+        return observation(15)
+
+
+def test_provider_retries_then_queues_observation():
+    provider = WeatherProvider(FlakySource(failures=2), logger, retries=2, retry_delay=0)
+    assert provider.refresh()['temperature'] == 15
+
+    (new,) = provider.take_new_observations()
+    assert new['temperature'] == 15 and new['timestamp'] is not None
+    assert provider.take_new_observations() == []
+
+
+def test_provider_gives_up_after_retries():
+    provider = WeatherProvider(FlakySource(failures=5), logger, retries=1, retry_delay=0)
+    assert provider.refresh() is None
+    assert provider.take_new_observations() == []
+
+
+def test_file_source(tmp_path):
+    path = tmp_path / "weather.json"
+    path.write_text(json.dumps({'temperature': 21.5, 'pressure': 1013, 'ignored': 1}))
+    source = create_weather_source("file", path=str(path))
+    assert source.fetch() == observation(21.5) | {'pressure': 1013}
+
+    with pytest.raises(ValueError):
+        create_weather_source("barometer")
+
+
+class CountingSource:
+    name = "counting"
+
+    def __init__(self, fail=False):
+        self.fetches = 0
+        self.fail = fail
+
+    def fetch(self):
+        self.fetches += 1
+        if self.fail:
+            raise OSError("timed out")
+        return observation(self.fetches)
+
+
+def test_latest_is_cached_for_the_ttl():
+    source = CountingSource()
+    provider = WeatherProvider(source, logger, ttl=900)
+    assert provider.latest()['temperature'] == 1
+    assert provider.latest()['temperature'] == 1
+    assert source.fetches == 1
+
+    # Once stale, the next read fetches again
+    provider._latest['timestamp'] -= datetime.timedelta(seconds=901)
+    assert provider.latest()['temperature'] == 2
+    assert source.fetches == 2
+    assert [new['temperature'] for new in provider.take_new_observations()] == [1, 2]
+
+
+def test_latest_does_not_retry_a_failing_source_on_every_read():
+    source = CountingSource(fail=True)
+    provider = WeatherProvider(source, logger, retries=3, retry_delay=60)
+    assert provider.latest() == {}
+    assert provider.latest() == {}
+    assert source.fetches == 1
+
+
+def test_provider_nearest_uses_fetched_observations():
+    provider = WeatherProvider(CountingSource(), logger)
+    first = provider.refresh()
+    assert provider.nearest(first['timestamp'])['temperature'] == 1
+    assert provider.nearest(first['timestamp'] + datetime.timedelta(hours=1), max_gap=60) is None
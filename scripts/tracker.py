@@ -0,0 +1,152 @@
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Fields compared between cycles to decide whether an aircraft was updated
+CHANGE_FIELDS = ('flight', 'position', 'altitude', 'squawk')
+
+
+class TrackedAircraft:
+    """Latest known state of one aircraft"""
+
+    __slots__ = (
+        'hex_code', 'flight', 'latitude', 'longitude', 'altitude',
+        'ground_speed', 'track', 'squawk', 'first_seen', 'last_seen',
+        'country', 'is_military', 'context', 'aircraft'
+    )
+
+    def __init__(self, hex_code: str, now: float):
+        self.hex_code = hex_code
+        self.flight = ''
+        self.latitude = None
+        self.longitude = None
+        self.altitude = None
+        self.ground_speed = None
+        self.track = None
+        self.squawk = ''
+        self.first_seen = now
+        self.last_seen = now
+        # Enrichment, filled in by the caller when the aircraft enters
+        self.country = None
+        self.is_military = False
+        self.context = None
+        # Raw tar1090 dict from the most recent cycle
+        self.aircraft = None
+
+    def apply(self, aircraft: Dict, last_seen: float) -> frozenset:
+        """Update from a tar1090 aircraft dict and return the CHANGE_FIELDS that changed"""
+        flight = aircraft.get('flight', '').strip().upper()
+        latitude = aircraft.get('lat')
+        longitude = aircraft.get('lon')
+        altitude = aircraft.get('alt_geom')
+        squawk = aircraft.get('squawk', '')
+
+        changed = []
+        if flight != self.flight:
+            changed.append('flight')
+        if latitude != self.latitude or longitude != self.longitude:
+            changed.append('position')
+        if altitude != self.altitude:
+            changed.append('altitude')
+        if squawk != self.squawk:
+            changed.append('squawk')
+
+        self.flight = flight
+        self.latitude = latitude
+        self.longitude = longitude
+        self.altitude = altitude
+        self.ground_speed = aircraft.get('gs')
+        self.track = aircraft.get('track')
+        self.squawk = squawk
+        self.last_seen = max(self.last_seen, last_seen)
+        self.aircraft = aircraft
+        return frozenset(changed)
+
+
+class TrackerEvents:
+    """Aircraft that entered, changed, stayed the same or left coverage during one update"""
+
+    __slots__ = ('entered', 'updated', 'unchanged', 'left')
+
+    def __init__(self):
+        self.entered: List[TrackedAircraft] = []
+        self.updated: List[Tuple[TrackedAircraft, frozenset]] = []
+        self.unchanged: List[TrackedAircraft] = []
+        self.left: List[TrackedAircraft] = []
+
+    def changes(self) -> Iterator[Tuple[TrackedAircraft, frozenset]]:
+        """Entered and updated aircraft with their changed fields (all fields on entry)"""
+        everything = frozenset(CHANGE_FIELDS)
+        for state in self.entered:
+            yield state, everything
+        yield from self.updated
+
+    def received(self) -> Iterator[Tuple[TrackedAircraft, frozenset]]:
+        """Every aircraft in the snapshot with its changed fields, empty for unchanged ones"""
+        yield from self.changes()
+        for state in self.unchanged:
+            yield state, frozenset()
+
+
+class AircraftTracker:
+    """
+    Live table of aircraft currently being received, keyed by hex code.
+
+    Each update diffs the latest tar1090 snapshot against the table, so later
+    stages can work on deltas instead of the full list.
+    """
+
+    def __init__(self, timeout: float = 60):
+        self.timeout = timeout
+        self._aircraft: Dict[str, TrackedAircraft] = {}
+
+    def __len__(self):
+        return len(self._aircraft)
+
+    def __contains__(self, hex_code):
+        return hex_code in self._aircraft
+
+    def get(self, hex_code: str) -> Optional[TrackedAircraft]:
+        return self._aircraft.get(hex_code)
+
+    def currently_tracking(self) -> List[TrackedAircraft]:
+        return list(self._aircraft.values())
+
+    def update(self, aircraft_data: List[Dict], now: Optional[float] = None) -> TrackerEvents:
+        """
+        Apply one tar1090 snapshot and return the resulting events.
+
+        Aircraft are dropped once nothing has been received from them for
+        `timeout` seconds, based on tar1090's `seen` age.
+        """
+        if now is None:
+            now = time.time()
+        events = TrackerEvents()
+
+        for aircraft in aircraft_data:
+            hex_code = aircraft['hex'].upper()
+            last_seen = now - aircraft.get('seen', 0)
+            if now - last_seen > self.timeout:
+                continue
+
+            state = self._aircraft.get(hex_code)
+            if state is None:
+                state = TrackedAircraft(hex_code, last_seen)
+                state.apply(aircraft, last_seen)
+                self._aircraft[hex_code] = state
+                events.entered.append(state)
+                continue
+
+            changed = state.apply(aircraft, last_seen)
+            if changed:
+                events.updated.append((state, changed))
+            else:
+                events.unchanged.append(state)
+
+        expired = [
+            hex_code for hex_code, state in self._aircraft.items()
+            if now - state.last_seen > self.timeout
+        ]
+        for hex_code in expired:
+            events.left.append(self._aircraft.pop(hex_code))
+
+        return events
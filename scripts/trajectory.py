@@ -0,0 +1,201 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from constants import PREDICTION_LOCATIONS, PREDICTION_RADIUS_KM, PREDICTION_HORIZON
+from geofence import EARTH_RADIUS_KM
+
+KNOTS_TO_KM_PER_SECOND = 1.852 / 3600
+
+
+def _array(values) -> np.ndarray:
+    return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+
+def destination(lat, lon, bearing, distance_km):
+    """
+    Point reached from (lat, lon) after distance_km along the great circle
+    with initial bearing, in degrees. All arguments broadcast as NumPy arrays.
+    """
+    phi1 = np.radians(lat)
+    lambda1 = np.radians(lon)
+    theta = np.radians(bearing)
+    delta = np.asarray(distance_km) / EARTH_RADIUS_KM
+    sin_phi2 = np.sin(phi1) * np.cos(delta) + np.cos(phi1) * np.sin(delta) * np.cos(theta)
+    phi2 = np.arcsin(np.clip(sin_phi2, -1, 1))
+    lambda2 = lambda1 + np.arctan2(np.sin(theta) * np.sin(delta) * np.cos(phi1),
+                                   np.cos(delta) - np.sin(phi1) * sin_phi2)
+    return np.degrees(phi2), (np.degrees(lambda2) + 540) % 360 - 180
+
+
+def extrapolate(lat, lon, ground_speed, track, altitude, vertical_rate, seconds):
+    """
+    Dead-reckon positions `seconds` ahead, flying the great circle of the
+    current track at constant ground speed (knots) and vertical rate (ft/min).
+    Returns (lat, lon, altitude) arrays; altitude is clipped at the ground.
+    """
+    seconds = np.asarray(seconds, dtype=float)
+    new_lat, new_lon = destination(lat, lon, track, ground_speed * KNOTS_TO_KM_PER_SECOND * seconds)
+    new_altitude = np.clip(altitude + np.nan_to_num(vertical_rate) * seconds / 60, 0, None)
+    return new_lat, new_lon, new_altitude
+
+
+def closest_approach(lat, lon, ground_speed, track, target_lat, target_lon):
+    """
+    Closest point of approach of aircraft to targets, assuming they hold
+    their great-circle track and ground speed.
+
+    Returns (distance now km, CPA distance km, seconds until CPA). Aircraft
+    heading away, or not moving, have their CPA now. Target arguments may
+    have an extra leading axis to evaluate several locations at once.
+    """
+    phi1, lambda1 = np.radians(lat), np.radians(lon)
+    phi2, lambda2 = np.radians(target_lat), np.radians(target_lon)
+    delta_lambda = lambda2 - lambda1
+
+    # Angular distance and initial bearing from each aircraft to each target
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+    d13 = 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    theta13 = np.arctan2(np.sin(delta_lambda) * np.cos(phi2),
+                         np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(delta_lambda))
+    relative = theta13 - np.radians(track)
+
+    # Cross-track distance off the aircraft's great circle, and signed
+    # along-track distance to the foot of the perpendicular (negative = behind)
+    cross_track = np.arcsin(np.clip(np.sin(d13) * np.sin(relative), -1, 1))
+    along_track = np.arctan2(np.sin(d13) * np.cos(relative), np.cos(d13))
+
+    speed = np.nan_to_num(ground_speed) * KNOTS_TO_KM_PER_SECOND
+    ahead = (along_track > 0) & (speed > 0)
+    distance_km = d13 * EARTH_RADIUS_KM
+    cpa_km = np.where(ahead, np.abs(cross_track) * EARTH_RADIUS_KM, distance_km)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cpa_seconds = np.where(ahead, along_track * EARTH_RADIUS_KM / speed, 0.0)
+    return distance_km, cpa_km, cpa_seconds
+
+
+class TrajectoryPredictions:
+    """Closest approach of every aircraft in one snapshot to each prediction location"""
+
+    def __init__(self, hex_codes: List[str], locations: List[str], distance_km, cpa_km,
+                 cpa_seconds, cpa_altitude, inbound):
+        self.hex_codes = hex_codes
+        self.locations = locations
+        # (locations, aircraft) arrays
+        self.distance_km = distance_km
+        self.cpa_km = cpa_km
+        self.cpa_seconds = cpa_seconds
+        self.cpa_altitude = cpa_altitude
+        self.inbound = inbound
+        self._index = {hex_code: i for i, hex_code in enumerate(hex_codes)}
+
+    def __len__(self):
+        return len(self.hex_codes)
+
+    def for_hex(self, hex_code: str) -> List[Dict]:
+        """Locations the aircraft will pass within the radius of, soonest first"""
+        i = self._index.get(hex_code)
+        if i is None:
+            return []
+        passes = [
+            {
+                'location': location,
+                'distance_km': float(self.distance_km[j, i]),
+                'cpa_km': float(self.cpa_km[j, i]),
+                'cpa_seconds': float(self.cpa_seconds[j, i]),
+                'cpa_altitude': None if np.isnan(self.cpa_altitude[j, i]) else float(self.cpa_altitude[j, i])
+            }
+            for j, location in enumerate(self.locations) if self.inbound[j, i]
+        ]
+        return sorted(passes, key=lambda item: item['cpa_seconds'])
+
+    def inbound_to(self, location: str) -> List[str]:
+        """Hex codes of aircraft inbound to a location, soonest first"""
+        j = self.locations.index(location)
+        indexes = np.flatnonzero(self.inbound[j])
+        return [self.hex_codes[i] for i in indexes[np.argsort(self.cpa_seconds[j, indexes])]]
+
+    def inbound_line(self, hex_code: str) -> Optional[str]:
+        """One alert message line for the aircraft's next pass, or None"""
+        passes = self.for_hex(hex_code)
+        if not passes:
+            return None
+        upcoming = passes[0]
+        minutes = int(round(upcoming['cpa_seconds'] / 60))
+        if minutes < 1:
+            line = f"Overhead {upcoming['location']} now"
+        else:
+            line = f"Inbound to {upcoming['location']} in ~{minutes} minute{'s' if minutes != 1 else ''}"
+        line += f", closest approach {upcoming['cpa_km']:.1f} km"
+        if upcoming['cpa_altitude'] is not None:
+            line += f" at {upcoming['cpa_altitude']:,.0f} ft"
+        return line
+
+
+class TrajectoryPredictor:
+    """
+    Kinematic pass prediction for a whole tracker snapshot.
+
+    Each aircraft is dead-reckoned from its last report to `now`, then its
+    closest point of approach to every configured location is computed on
+    the great circle of its current track. Everything is one vectorized
+    pass over (locations, aircraft) arrays, so thousands of aircraft take a
+    few milliseconds. An aircraft is inbound to a location when its CPA is
+    within radius_km and no more than horizon seconds away.
+    """
+
+    def __init__(self, locations: Dict[str, Tuple[float, float]] = PREDICTION_LOCATIONS,
+                 radius_km: float = PREDICTION_RADIUS_KM, horizon: float = PREDICTION_HORIZON):
+        self.locations = list(locations)
+        coordinates = np.array([locations[name] for name in self.locations], dtype=float).reshape(-1, 2)
+        self._target_lat = coordinates[:, 0:1]
+        self._target_lon = coordinates[:, 1:2]
+        self.radius_km = radius_km
+        self.horizon = horizon
+
+    def predict(self, hex_codes: List[str], times, latitudes, longitudes, speeds, tracks,
+                altitudes, vertical_rates=None, now: Optional[float] = None) -> TrajectoryPredictions:
+        """Predict passes for parallel lists of aircraft values (None for missing)"""
+        hex_codes = list(hex_codes)
+        times = _array(times)
+        lat, lon = _array(latitudes), _array(longitudes)
+        speed, track, altitude = _array(speeds), _array(tracks), _array(altitudes)
+        vertical_rate = _array(vertical_rates) if vertical_rates is not None else np.zeros(len(hex_codes))
+        if now is not None:
+            age = np.clip(now - times, 0, None)
+        else:
+            age = np.zeros(len(hex_codes))
+
+        # Where each aircraft is now, not where it last reported
+        has_velocity = ~np.isnan(speed) & ~np.isnan(track)
+        moved_lat, moved_lon, altitude = extrapolate(lat, lon, np.nan_to_num(speed), np.nan_to_num(track),
+                                                     altitude, vertical_rate, age)
+        lat = np.where(has_velocity, moved_lat, lat)
+        lon = np.where(has_velocity, moved_lon, lon)
+
+        distance_km, cpa_km, cpa_seconds = closest_approach(
+            lat, lon, speed, np.nan_to_num(track), self._target_lat, self._target_lon
+        )
+        cpa_altitude = np.clip(altitude + np.nan_to_num(vertical_rate) * cpa_seconds / 60, 0, None)
+        inbound = (cpa_km <= self.radius_km) & (cpa_seconds <= self.horizon)
+        return TrajectoryPredictions(hex_codes, self.locations, distance_km, cpa_km,
+                                     cpa_seconds, cpa_altitude, inbound)
+
+    def predict_states(self, states: Iterable, now: Optional[float] = None) -> TrajectoryPredictions:
+        """Predict passes for TrackedAircraft states (see tracker.py)"""
+        states = list(states)
+        vertical_rates = []
+        for state in states:
+            aircraft = state.aircraft or {}
+            rate = aircraft.get('geom_rate')
+            vertical_rates.append(rate if rate is not None else aircraft.get('baro_rate'))
+        return self.predict(
+            [state.hex_code for state in states],
+            [state.last_seen for state in states],
+            [state.latitude for state in states],
+            [state.longitude for state in states],
+            [state.ground_speed for state in states],
+            [state.track for state in states],
+            [state.altitude for state in states],
+            vertical_rates,
+            now=now
+        )
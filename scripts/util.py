@@ -1,7 +1,7 @@
-import csv
 import logging
 import requests
-from env_vars_config import healthCheckEmail
+from env_vars_config import healthCheckEmail, openWeatherApiKey
+from constants import ARCHIVE_DAYS
 
 def load_watchlist():
     watchlist = {}
@@ -20,15 +20,6 @@ def get_aircraft_data():
     data = response.json()
     return data['aircraft']
 
-def load_csv_data(filename):
-    csv_data = {}
-    with open(filename, "r") as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            hex_code = row['$ICAO']
-            csv_data[hex_code] = row
-    return csv_data
-
 def clean_shutdown(logger):
     """Perform cleanup operations before shutting down"""
     logger.info("Performing clean shutdown...")
@@ -44,26 +35,13 @@ def clean_shutdown(logger):
     # Any other cleanup operations
     logger.info("Cleanup completed")
 
-def get_weather_data(latitude: float, longitude: float) -> dict:
+def get_weather_data(latitude: float, longitude: float, timeout: float = 10) -> dict:
     """Get current weather data from OpenWeatherMap API"""
-    # You'll need to get an API key from OpenWeatherMap and set it here
-    API_KEY = openWeatherApiKey
-    url = f"https://api.openweathermap.org/data/2.5/weather?lat={latitude}&lon={longitude}&appid={API_KEY}&units=metric"
-    
+    from weather import OpenWeatherMapSource
     try:
-        response = requests.get(url)
-        data = response.json()
-        
-        return {
-            'temperature': data['main']['temp'],
-            'wind_speed': data['wind']['speed'],
-            'wind_direction': data['wind']['deg'],
-            'visibility': data.get('visibility', 10000) / 1000,  # Convert to km
-            'precipitation': data.get('rain', {}).get('1h', 0),
-            'pressure': data['main']['pressure']
-        }
+        return OpenWeatherMapSource(openWeatherApiKey, latitude, longitude, timeout).fetch()
     except Exception as e:
-        logger.error(f"Error fetching weather data: {e}")
+        logging.getLogger('skywatch').error(f"Error fetching weather data: {e}")
         return {}
 
 def clean_up_db(logger,db):
@@ -75,6 +53,10 @@ def clean_up_db(logger,db):
         
         # Archive old records
         db.archive_old_records(days_old=ARCHIVE_DAYS)
+
+        # Move old archived months out of the database into compressed cold files
+        moved = db.export_cold_storage()
+        logger.info(f"Moved {moved} archived sightings to cold storage")
         
         # Vacuum database to reclaim space
         db.vacuum_database()
@@ -85,9 +67,11 @@ def clean_up_db(logger,db):
         logger.info(f"Current sightings: {stats['aircraft_sightings_count']}")
         logger.info(f"Archived sightings: {stats['archived_aircraft_sightings_count']}")
         logger.info(f"Database size: {stats['database_size_mb']:.2f} MB")
+        logger.info(f"Cold storage sightings: {stats['cold_storage_sightings_count']} "
+                    f"({stats['cold_storage_size_mb']:.2f} MB)")
         
     except Exception as e:
-        logger.info(f"Error during cleanup: {e}")
+        logger.error(f"Error during cleanup: {e}")
         # Send alert about cleanup failure
         error_message = f"Database cleanup failed: {str(e)}"
         # send_email_alert(healthCheckEmail, "Database Cleanup Error", error_message)
\ No newline at end of file
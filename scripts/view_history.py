@@ -3,6 +3,7 @@ from aircraft_db import AircraftDatabase
 import datetime
 import pytz
 from tabulate import tabulate
+from reference_data import load_reference_csv_data
 
 def format_timestamp(timestamp_str):
     """Format timestamp for display"""
@@ -11,33 +12,53 @@ def format_timestamp(timestamp_str):
     local_dt = dt.astimezone(local_tz)
     return local_dt.strftime('%Y-%m-%d %H:%M:%S %Z')
 
-def main():
-    parser = argparse.ArgumentParser(description='View aircraft sighting history')
-    parser.add_argument('--hex', help='Filter by hex code')
-    parser.add_argument('--days', type=int, default=7, help='Number of days to look back')
-    parser.add_argument('--limit', type=int, default=50, help='Maximum number of records to show')
-    
-    args = parser.parse_args()
-    
-    db = AircraftDatabase()
-    
-    # Calculate date range
-    end_date = datetime.datetime.now(pytz.UTC)
-    start_date = end_date - datetime.timedelta(days=args.days)
-    
-    # Get sightings
-    sightings = db.get_sightings(
-        hex_code=args.hex,
-        start_date=start_date,
-        end_date=end_date,
-        limit=args.limit
-    )
-    
-    if not sightings:
-        print("No sightings found matching the criteria.")
-        return
-    
-    # Prepare data for tabulate
+def format_bucket(epoch, granularity):
+    """Format a rollup bucket start (UTC epoch seconds) for display"""
+    dt = datetime.datetime.fromtimestamp(epoch, pytz.UTC)
+    if granularity == 'day':
+        return dt.strftime('%Y-%m-%d')
+    local_tz = pytz.timezone('America/New_York')
+    return dt.astimezone(local_tz).strftime('%Y-%m-%d %H:%M %Z')
+
+# Time words accepted at the end of a --search query ("last month", "past 2 weeks")
+SEARCH_TIME_UNITS = {
+    'hour': datetime.timedelta(hours=1),
+    'day': datetime.timedelta(days=1),
+    'week': datetime.timedelta(weeks=1),
+    'month': datetime.timedelta(days=30),
+    'year': datetime.timedelta(days=365)
+}
+
+def parse_search_time(text, now):
+    """
+    Split a trailing time phrase off a search query.
+
+    Understands "today", "yesterday" and "last/past [N] hours/days/weeks/
+    months/years". Returns (remaining text, start, end); start and end are
+    None when there is no time phrase.
+    """
+    words = text.split()
+    lowered = [word.lower() for word in words]
+    local_tz = pytz.timezone('America/New_York')
+    midnight = local_tz.localize(datetime.datetime.combine(now.astimezone(local_tz).date(), datetime.time()))
+
+    if lowered[-1:] == ['today']:
+        return ' '.join(words[:-1]), midnight, now
+    if lowered[-1:] == ['yesterday']:
+        return ' '.join(words[:-1]), midnight - datetime.timedelta(days=1), midnight
+
+    unit = lowered[-1].rstrip('s') if lowered else None
+    if unit in SEARCH_TIME_UNITS:
+        count, phrase_start = 1, len(words) - 2
+        if len(words) >= 3 and lowered[-2].isdigit():
+            count, phrase_start = int(lowered[-2]), len(words) - 3
+        if phrase_start >= 0 and lowered[phrase_start] in ('last', 'past'):
+            return ' '.join(words[:phrase_start]), now - count * SEARCH_TIME_UNITS[unit], now
+
+    return text, None, None
+
+def print_sightings(sightings):
+    """Print sightings as a table followed by a short summary"""
     table_data = []
     for sighting in sightings:
         table_data.append([
@@ -59,5 +80,106 @@ def main():
     print(f"Total sightings: {len(sightings)}")
     print(f"Unique aircraft: {unique_aircraft}")
 
+def print_rollup_summary(db, start_date, end_date, granularity):
+    """Print bucketed and overall statistics read from the rollup tables"""
+    rollups = db.get_rollups(granularity, start_date=start_date, end_date=end_date)
+    if not rollups:
+        print("No rollups found. Run with --rebuild-rollups to generate them from history.")
+        return
+
+    table_data = [[
+        format_bucket(rollup['bucket_start'], granularity),
+        rollup['sighting_count'],
+        rollup['unique_aircraft'],
+        rollup['min_altitude'] if rollup['min_altitude'] is not None else 'N/A',
+        rollup['max_altitude'] if rollup['max_altitude'] is not None else 'N/A'
+    ] for rollup in rollups]
+    headers = ['Period', 'Sightings', 'Unique Aircraft', 'Min Altitude', 'Max Altitude']
+    print(tabulate(table_data, headers=headers, tablefmt='grid'))
+
+    summary = db.get_rollup_summary(start_date, end_date)
+    print(f"\nSummary:")
+    print(f"Total sightings: {summary['sighting_count']}")
+    print(f"Unique aircraft: {summary['unique_aircraft']}")
+    for dimension in ('operator', 'category'):
+        top = summary[f'top_{dimension}']
+        if top:
+            print(f"\nTop {dimension}s:")
+            print(tabulate(top, headers=[dimension.capitalize(), 'Sightings'], tablefmt='simple'))
+
+def main():
+    parser = argparse.ArgumentParser(description='View aircraft sighting history')
+    parser.add_argument('--hex', help='Filter by hex code')
+    parser.add_argument('--days', type=int, default=7, help='Number of days to look back')
+    parser.add_argument('--limit', type=int, default=50, help='Maximum number of records to show')
+    parser.add_argument('--archive', action='store_true',
+                        help='Also search archived sightings, including cold storage files')
+    parser.add_argument('--summary', choices=['hour', 'day'],
+                        help='Show hourly or daily rollup statistics instead of individual sightings')
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help='Regenerate the rollup tables from sighting history')
+    parser.add_argument('--search',
+                        help='Search callsign, registration, operator, type and tags, e.g. '
+                             '"Coast Guard C-130 last month" or "callsign:RCH"')
+    parser.add_argument('--rebuild-search', action='store_true',
+                        help='Regenerate the search index from sighting history and the reference CSVs')
+    
+    args = parser.parse_args()
+    
+    db = AircraftDatabase()
+
+    if args.rebuild_rollups:
+        print("Rebuilding rollups from sighting history...")
+        db.rebuild_rollups(load_reference_csv_data())
+        print("Rollups rebuilt.")
+        return
+
+    if args.rebuild_search:
+        print("Rebuilding search index from sighting history...")
+        flights = db.rebuild_search_index(load_reference_csv_data())
+        print(f"Search index rebuilt: {flights} flights.")
+        return
+    
+    # Calculate date range
+    end_date = datetime.datetime.now(pytz.UTC)
+    start_date = end_date - datetime.timedelta(days=args.days)
+
+    if args.summary:
+        print_rollup_summary(db, start_date, end_date, args.summary)
+        return
+    
+    if args.search:
+        # A time phrase in the query ("last month") overrides --days
+        text, phrase_start, phrase_end = parse_search_time(args.search, end_date)
+        if phrase_start is not None:
+            start_date, end_date = phrase_start, phrase_end
+        try:
+            sightings = db.search_sightings(
+                text,
+                start_date=start_date,
+                end_date=end_date,
+                limit=args.limit,
+                include_archive=args.archive,
+                hex_code=args.hex
+            )
+        except ValueError as e:
+            print(str(e))
+            return
+    else:
+        # Get sightings
+        sightings = db.get_sightings(
+            hex_code=args.hex,
+            start_date=start_date,
+            end_date=end_date,
+            limit=args.limit,
+            include_archive=args.archive
+        )
+    
+    if not sightings:
+        print("No sightings found matching the criteria.")
+        return
+    
+    print_sightings(sightings)
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
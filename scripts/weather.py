@@ -0,0 +1,289 @@
+import bisect
+import datetime
+import json
+import threading
+import time
+import pytz
+import requests
+import numpy as np
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+WEATHER_FIELDS = [
+    'temperature',
+    'wind_speed',
+    'wind_direction',
+    'visibility',
+    'precipitation',
+    'pressure'
+]
+
+
+class OpenWeatherMapSource:
+    """Current conditions from the OpenWeatherMap API"""
+
+    name = "openweathermap"
+
+    def __init__(self, api_key: str, latitude: float, longitude: float, timeout: float = 10):
+        self.api_key = api_key
+        self.latitude = latitude
+        self.longitude = longitude
+        self.timeout = timeout
+
+    def fetch(self) -> Dict:
+        url = (
+            f"https://api.openweathermap.org/data/2.5/weather?lat={self.latitude}"
+            f"&lon={self.longitude}&appid={self.api_key}&units=metric"
+        )
+        response = requests.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+
+        return {
+            'temperature': data['main']['temp'],
+            'wind_speed': data['wind']['speed'],
+            'wind_direction': data['wind'].get('deg'),
+            'visibility': data.get('visibility', 10000) / 1000,  # Convert to km
+            'precipitation': data.get('rain', {}).get('1h', 0),
+            'pressure': data['main']['pressure']
+        }
+
+
+class FileWeatherSource:
+    """
+    Reads conditions from a local JSON file holding one observation, keyed by
+    WEATHER_FIELDS. Useful offline or when another process writes the file.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def fetch(self) -> Dict:
+        with open(self.path, "r") as file:
+            data = json.load(file)
+        return {field: data.get(field) for field in WEATHER_FIELDS}
+
+
+# Available weather sources, keyed by name
+WEATHER_SOURCES = {
+    OpenWeatherMapSource.name: OpenWeatherMapSource,
+    FileWeatherSource.name: FileWeatherSource
+}
+
+
+def create_weather_source(name: str, **kwargs):
+    """Instantiate a weather source from WEATHER_SOURCES by name"""
+    try:
+        source_class = WEATHER_SOURCES[name]
+    except KeyError:
+        raise ValueError(f"Unknown weather source: {name}")
+    return source_class(**kwargs)
+
+
+def _to_epoch(timestamp) -> float:
+    if isinstance(timestamp, datetime.datetime):
+        return timestamp.timestamp()
+    if isinstance(timestamp, str):
+        return datetime.datetime.fromisoformat(timestamp).timestamp()
+    return float(timestamp)
+
+
+class WeatherTimeIndex:
+    """
+    Weather observations kept sorted by time for nearest-observation lookups.
+
+    Observations normally arrive in time order, so adding one is an append;
+    lookups are a binary search.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size
+        self._epochs: List[float] = []
+        self._observations: List[Dict] = []
+
+    def __len__(self):
+        return len(self._epochs)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "WeatherTimeIndex":
+        """Build an index from dicts with a 'timestamp' and WEATHER_FIELDS"""
+        index = cls()
+        for record in records:
+            index.add(record['timestamp'], record)
+        return index
+
+    def add(self, timestamp, observation: Dict):
+        epoch = _to_epoch(timestamp)
+        if not self._epochs or epoch >= self._epochs[-1]:
+            position = len(self._epochs)
+        else:
+            position = bisect.bisect_right(self._epochs, epoch)
+        self._epochs.insert(position, epoch)
+        self._observations.insert(position, observation)
+
+        if self.max_size is not None and len(self._epochs) > self.max_size:
+            del self._epochs[0]
+            del self._observations[0]
+
+    def nearest(self, timestamp, max_gap: Optional[float] = None) -> Optional[Dict]:
+        """
+        Return the observation closest in time to timestamp.
+
+        Args:
+            timestamp: datetime, ISO string or epoch seconds
+            max_gap: Maximum allowed distance in seconds, None for unlimited
+        """
+        if not self._epochs:
+            return None
+        epoch = _to_epoch(timestamp)
+        position = bisect.bisect_left(self._epochs, epoch)
+
+        best = None
+        for candidate in (position - 1, position):
+            if 0 <= candidate < len(self._epochs):
+                if best is None or abs(self._epochs[candidate] - epoch) < abs(self._epochs[best] - epoch):
+                    best = candidate
+
+        if max_gap is not None and abs(self._epochs[best] - epoch) > max_gap:
+            return None
+        return self._observations[best]
+
+    def nearest_many(self, epochs, max_gap: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Vectorized nearest lookup for an array of epoch seconds.
+
+        Returns a dict of WEATHER_FIELDS -> float arrays aligned with epochs,
+        NaN where no observation is within max_gap.
+        """
+        epochs = np.asarray(epochs, dtype=float)
+        columns = {field: np.full(len(epochs), np.nan) for field in WEATHER_FIELDS}
+        if not self._epochs or len(epochs) == 0:
+            return columns
+
+        index_epochs = np.asarray(self._epochs)
+        right = np.clip(np.searchsorted(index_epochs, epochs), 0, len(index_epochs) - 1)
+        left = np.clip(right - 1, 0, len(index_epochs) - 1)
+        use_left = np.abs(epochs - index_epochs[left]) <= np.abs(index_epochs[right] - epochs)
+        best = np.where(use_left, left, right)
+
+        matched = np.ones(len(epochs), dtype=bool)
+        if max_gap is not None:
+            matched = np.abs(index_epochs[best] - epochs) <= max_gap
+
+        for field in WEATHER_FIELDS:
+            values = np.array(
+                [observation.get(field) for observation in self._observations],
+                dtype=float
+            )
+            columns[field] = np.where(matched, values[best], np.nan)
+        return columns
+
+
+class WeatherProvider:
+    """
+    Polls a weather source on a background thread.
+
+    Each fetch has a timeout and is retried with backoff. The latest
+    observation is cached for ttl seconds, every observation is kept in a
+    WeatherTimeIndex for nearest-in-time joins, and new observations are
+    queued until the main loop takes them for the database.
+    """
+
+    def __init__(self, source, logger, interval: float = 300, ttl: float = 900,
+                 retries: int = 3, retry_delay: float = 5, history_size: int = 2016):
+        self.source = source
+        self.logger = logger
+        self.interval = interval
+        self.ttl = ttl
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.index = WeatherTimeIndex(max_size=history_size)
+
+        self._lock = threading.Lock()
+        self._latest: Optional[Dict] = None
+        self._failed_at: Optional[float] = None
+        self._pending = deque()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="weather-provider", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Weather provider started using source '{self.source.name}'")
+
+    def stop(self, timeout: float = 5):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.refresh()
+            self._stop_event.wait(self.interval)
+
+    def refresh(self, retries: Optional[int] = None) -> Optional[Dict]:
+        """Fetch one observation, retrying with backoff on failure"""
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            try:
+                observation = self.source.fetch()
+            except Exception as e:
+                self.logger.warning(
+                    f"Weather fetch from '{self.source.name}' failed "
+                    f"(attempt {attempt + 1}/{retries + 1}): {e}"
+                )
+                if attempt < retries and self._stop_event.wait(self.retry_delay * (2 ** attempt)):
+                    return None
+                continue
+
+            observation['timestamp'] = datetime.datetime.now(pytz.UTC)
+            self._failed_at = None
+            with self._lock:
+                self._latest = observation
+                self._pending.append(observation)
+                self.index.add(observation['timestamp'], observation)
+            return observation
+
+        self._failed_at = time.monotonic()
+        self.logger.error(f"Giving up on weather fetch from '{self.source.name}' until next interval")
+        return None
+
+    def latest(self) -> Dict:
+        """
+        Most recent observation, or {} if none can be had.
+
+        Within the TTL this is the cached observation. Once it is stale (the
+        background thread stopped or keeps failing) a single fetch is tried,
+        but no sooner than retry_delay seconds after a failed one, so a dead
+        source can't stall every caller.
+        """
+        with self._lock:
+            observation = self._latest
+        if observation is not None and self._age(observation) <= self.ttl:
+            return observation
+        if self._failed_at is None or time.monotonic() - self._failed_at >= self.retry_delay:
+            observation = self.refresh(retries=0) or observation
+        if observation is None or self._age(observation) > self.ttl:
+            return {}
+        return observation
+
+    @staticmethod
+    def _age(observation: Dict) -> float:
+        return (datetime.datetime.now(pytz.UTC) - observation['timestamp']).total_seconds()
+
+    def take_new_observations(self) -> List[Dict]:
+        """Return and clear observations fetched since the last call"""
+        with self._lock:
+            observations = list(self._pending)
+            self._pending.clear()
+        return observations
+
+    def nearest(self, timestamp, max_gap: Optional[float] = None) -> Optional[Dict]:
+        """Observation fetched closest in time to timestamp (see WeatherTimeIndex.nearest)"""
+        with self._lock:
+            return self.index.nearest(timestamp, max_gap)